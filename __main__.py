@@ -20,6 +20,9 @@ Moving any of these folders or files will prevent the game from working properly
 Author: Walker M. White (wmw2)
 Date:   November 1, 2017 (Python 3 Version)
 """
+from startup import *
+start_profiling()
+
 from consts import *
 from app import *
 
@@ -12,8 +12,22 @@ John Anim, ja857; Brendan Shek, bs863
 """
 from consts import *
 from game2d import *
-from wave import *
+from assets import *
+from startup import *
+from kivy.clock import Clock
 import json
+import os
+import struct
+import sys
+
+# The modules that are only needed to play. They (and NumPy, the models and the
+# renderer with them) are imported by _load_game, after the title is on screen.
+wave = lazy_import('wave')
+loader = lazy_import('loader')
+replay = lazy_import('replay')
+# The modules of optional features, only imported if their flag is given
+profiler = lazy_import('profiler')
+campaign = lazy_import('campaign')
 
 # PRIMARY RULE: Planetoids can only access attributes in wave.py via getters/setters
 # Planetoids is NOT allowed to access anything in models.py
@@ -74,6 +88,28 @@ class Planetoids(GameApp):
     # Attribute _message: the currently active message
     # Invariant: _message is a GLabel, or None if there is no message to display. It is
     #            only None if _state is STATE_ACTIVE.
+    #
+    # Attribute _profiler: the frame profiler (turned on with --profile)
+    # Invariant: _profiler is a FrameProfiler, or None if profiling is off
+    #
+    # Attribute _overlay: the text showing the profiler summary
+    # Invariant: _overlay is a GLabel, or None if profiling is off
+    #
+    # Attribute _campaign: the campaign being played (turned on with --campaign)
+    # Invariant: _campaign is a Campaign, or None to play DEFAULT_WAVE only
+    #
+    # Attribute _upcoming: the file name of the wave to load next
+    # Invariant: _upcoming is a string, or None if the campaign is over
+    #
+    # Attribute _played: the number of waves started so far
+    # Invariant: _played is an int >= 0
+    #
+    # Attribute _snapshot: the state of the wave to continue from
+    # Invariant: _snapshot is bytes from Wave.snapshot, or None if the _state
+    #            is not STATE_PAUSED or STATE_CONTINUE
+    #
+    # Attribute _loaded: whether _load_game has run
+    # Invariant: _loaded is a bool
 
     # DO NOT MAKE A NEW INITIALIZER!
 
@@ -90,8 +126,14 @@ class Planetoids(GameApp):
         invariants. When done, it sets the _state to STATE_INACTIVE and creates both
         the title (in attribute _title) and a message (in attribute _message) saying
         that the user should press a key to play a game.
+
+        Only what the title needs is loaded here, so the window shows it as soon
+        as possible. The game itself (the wave modules, images and the first
+        wave file) is loaded by _title_shown, once the title is on screen.
         """
         self._state = STATE_INACTIVE
+        self._loaded = False
+        ASSETS.preload(fonts=(TITLE_FONT, MESSAGE_FONT))
         self._title = GLabel(text="Planetoids")
         self._message = GLabel(text="Press 'S' to start")
         self._title.font_size = TITLE_SIZE
@@ -100,10 +142,65 @@ class Planetoids(GameApp):
         self._title.y = GAME_HEIGHT/2
         self._message.x = GAME_WIDTH/2
         self._message.y = GAME_WIDTH/3
-        self._title.font_name = TITLE_FONT
-        self._message.font_name = MESSAGE_FONT
+        self._title.font_name = ASSETS.font(TITLE_FONT)
+        self._message.font_name = ASSETS.font(MESSAGE_FONT)
         self._wave = None
+        self._snapshot = None
+        self._played = 0
+        self._campaign = None
+        if CAMPAIGN is not None:
+            self._campaign = campaign.Campaign(CAMPAIGN)
+        self._upcoming = self._following_wave()
+        if self._upcoming is None:
+            self._message.text = 'The campaign has no waves'
+        self._profiler = None
+        self._overlay = None
+        if PROFILE:
+            self._profiler = profiler.FrameProfiler()
+            self._overlay = GLabel(text='', font_size=PROFILE_SIZE,
+                                   halign='left', valign='top')
+            self._overlay.left = 10
+            self._overlay.top = GAME_HEIGHT - 10
         self.draw()
+        if IMPORT_PROFILER.is_installed():
+            IMPORT_PROFILER.mark('title drawn')
+        # Kivy calls a callback with timeout 0 after the next frame is shown
+        Clock.schedule_once(self._title_shown, 0)
+
+    def _title_shown(self, dt):
+        """
+        Loads the game once the first frame (the title) is on screen.
+
+        Parameter dt: The time in seconds since it was scheduled
+        Precondition: dt is a number (int or float)
+        """
+        if IMPORT_PROFILER.is_installed():
+            IMPORT_PROFILER.mark('title shown')
+            print(IMPORT_PROFILER.report(), file=sys.stderr)
+        self._load_game()
+
+    def _load_game(self):
+        """
+        Imports and loads everything needed to play, if not done already.
+
+        This imports the wave modules (with NumPy, the models and the renderer),
+        loads the images, and starts loading the first wave on WAVE_LOADER. It is
+        called by _title_shown, or by STATE_LOADING if a wave is started first.
+        """
+        if self._loaded:
+            return
+        self._loaded = True
+        ASSETS.preload(images=(SHIP_IMAGE, LARGE_IMAGE, MEDIUM_IMAGE, SMALL_IMAGE))
+        # Using an attribute of a lazy module is what imports it
+        wave.Wave
+        loader.WAVE_LOADER.set_fallback(self.load_json)
+        if self._upcoming is not None:
+            loader.WAVE_LOADER.request(self._upcoming)
+        if RECORD_FILE is not None:
+            replay.ReplayRecorder
+        if IMPORT_PROFILER.is_installed():
+            IMPORT_PROFILER.mark('game loaded')
+            print(IMPORT_PROFILER.report(), file=sys.stderr)
 
     def update(self,dt):
         """
@@ -124,24 +221,34 @@ class Planetoids(GameApp):
         message on the screen. The application remains in this state so long as the
         player never presses a key. In addition, the application returns to this state
         when the game is over (all lives are lost or all planetoids are destroyed).
+        If the campaign has no waves, the message says so and the game never starts.
 
         STATE_LOADING: This is the state creates a new wave and shows it on the screen.
         The application switches to this state if the state was STATE_INACTIVE in the
-        previous frame, and the player pressed a key. This state only lasts one animation
-        frame before switching to STATE_ACTIVE.
+        previous frame, and the player pressed a key. The wave file is read by
+        WAVE_LOADER in the background (it is requested by _load_game, and each wave
+        requests the next one), so this state waits without blocking until the
+        file is loaded, and then lasts one animation frame before switching to
+        STATE_ACTIVE.
 
         STATE_ACTIVE: This is a session of normal gameplay. The player can move the
         ship and fire bullets. All of this should be handled inside of class Wave
         (NOT in this class). Hence the Wave class should have an update() method, just
-        like the subcontroller example in lecture.
+        like the subcontroller example in lecture. In a campaign, once the wave is
+        won and the player presses a key, the application switches to
+        STATE_LOADING for the next wave.
 
         STATE_PAUSED: Like STATE_INACTIVE, this is a paused state. However, the game is
-        still visible on the screen.
+        still visible on the screen. The player pauses with 'P', and the wave is
+        snapshotted at that moment. While paused, 'W' writes the snapshot to
+        SAVE_FILE and 'L' replaces it with the one in SAVE_FILE (a save game of
+        the same wave).
 
         STATE_CONTINUE: This state restores the ship after it was destroyed. The
         application switches to this state if the state was STATE_PAUSED in the
         previous frame, and the player pressed a key. This state only lasts one animation
-        frame before switching to STATE_ACTIVE.
+        frame before switching to STATE_ACTIVE. It restores the wave from the
+        snapshot, so the game goes on exactly where it was paused (or saved).
 
         You are allowed to add more states if you wish. Should you do so, you should
         describe them here.
@@ -149,17 +256,35 @@ class Planetoids(GameApp):
         Parameter dt: The time in seconds since last update
         Precondition: dt is a number (int or float)
         """
+        if self._profiler is not None:
+            self._profiler.begin_frame()
+            if self.input.is_key_pressed('d'):
+                self._profiler.dump(PROFILE_FILE)
         if self._state == STATE_INACTIVE:
-            if self.input.is_key_pressed('s'):
+            if self._upcoming is not None and self.input.is_key_pressed('s'):
                 self._state = STATE_LOADING
                 self._message = None
                 self._title = None
         elif self._state == STATE_LOADING:
-            save_level = self.load_json(DEFAULT_WAVE)
-            self._wave = Wave(save_level)
-            self._state = STATE_ACTIVE
+            self._load_game()
+            if self._is_wave_ready():
+                self._start_wave()
         elif self._state== STATE_ACTIVE and self._wave:
             self._wave.update(self.input, dt)
+            if self._wave.state == STATE_COMPLETE:
+                self._save_replay()
+            if (self._wave.is_won() and self._upcoming is not None and
+                self.input.is_key_pressed('s')):
+                self._state = STATE_LOADING
+            elif self.input.is_key_pressed('p'):
+                self._pause()
+        elif self._state == STATE_PAUSED:
+            self._update_paused()
+        elif self._state == STATE_CONTINUE:
+            self._wave.restore(self._snapshot)
+            self._snapshot = None
+            self._message = None
+            self._state = STATE_ACTIVE
 
     def draw(self):
         """
@@ -173,12 +298,143 @@ class Planetoids(GameApp):
         attributes or you need to add a draw method to class Wave. We suggest the latter.
         See the example subcontroller.py from class.
         """
-        if self._state == STATE_ACTIVE and self._wave:
+        if self._profiler is not None:
+            self._profiler.skip()
+        if self._state in (STATE_ACTIVE, STATE_PAUSED) and self._wave:
             self._wave.draw(self.view)
+        if self._state == STATE_PAUSED and self._message:
+            self._message.draw(self.view)
         if self._state == STATE_INACTIVE:
             if self._title:
                 self._title.draw(self.view)
             if self._message:
                 self._message.draw(self.view)
+        if self._profiler is not None:
+            self._draw_profile()
 
     # HELPER METHODS FOR THE STATES GO HERE
+    def _is_wave_ready(self):
+        """
+        Returns True if the wave to load next has finished loading.
+
+        Before the first wave, this is _upcoming. If it is not loading (the
+        request was already taken), it is requested again, and so is ready in a
+        later frame.
+        """
+        if self._wave is not None:
+            return self._wave.is_next_ready()
+        if self._upcoming is None:
+            return False
+        if not loader.WAVE_LOADER.is_requested(self._upcoming):
+            loader.WAVE_LOADER.request(self._upcoming)
+        return loader.WAVE_LOADER.is_ready(self._upcoming)
+
+    def _start_wave(self):
+        """
+        Replaces the current wave (if any) with a new one from the loaded data.
+
+        The new wave starts loading its own next wave right away.
+        """
+        if self._wave is not None:
+            save_level = self._wave.get_next_wave()
+            self._save_replay()
+            self._wave.dispose()
+        else:
+            save_level = loader.WAVE_LOADER.take(self._upcoming)
+        self._wave = wave.Wave(save_level)
+        self._played += 1
+        if RECORD_FILE is not None:
+            self._wave.set_recorder(replay.ReplayRecorder(name=self._upcoming))
+        self._upcoming = self._following_wave()
+        if self._upcoming is not None:
+            self._wave.set_next_wave(self._upcoming)
+        self._wave.set_profiler(self._profiler)
+        self._state = STATE_ACTIVE
+
+    def _pause(self):
+        """
+        Pauses the game, keeping a snapshot of the wave to continue from.
+        """
+        self._snapshot = self._wave.snapshot()
+        self._show_message("Paused: 'P' to go on, 'W' to save, 'L' to load")
+        self._state = STATE_PAUSED
+
+    def _update_paused(self):
+        """
+        Handles the keys of STATE_PAUSED: continuing, saving and loading.
+
+        Loading is refused while the wave is recorded (with --record).
+        """
+        if self.input.is_key_pressed('p'):
+            self._state = STATE_CONTINUE
+        elif self.input.is_key_pressed('w'):
+            with open(SAVE_FILE, 'wb') as file:
+                file.write(self._snapshot)
+            self._show_message("Saved: 'P' to go on")
+        elif self.input.is_key_pressed('l'):
+            # A replay is the keys of every tick from the start of the wave, so
+            # jumping to a saved state would make it impossible to play back
+            if self._wave.get_recorder() is not None:
+                self._show_message("Can't load while recording: 'P' to go on")
+                return
+            try:
+                with open(SAVE_FILE, 'rb') as file:
+                    snapshot = file.read()
+                self._wave.restore(snapshot)
+                self._snapshot = snapshot
+                self._show_message("Loaded: 'P' to go on")
+            except (OSError, ValueError, struct.error):
+                self._show_message("No save game for this wave: 'P' to go on")
+
+    def _show_message(self, text):
+        """
+        Shows the given text as the message in the middle of the screen.
+
+        Parameter text: the message
+        Precondition: text is a string
+        """
+        self._message = GLabel(text=text, font_size=MESSAGE_SIZE)
+        self._message.font_name = ASSETS.font(MESSAGE_FONT)
+        self._message.x = GAME_WIDTH/2
+        self._message.y = GAME_WIDTH/3
+
+    def _save_replay(self):
+        """
+        Writes the replay of the current wave (if recording) and stops recording.
+
+        In a campaign, the wave number is added to the name of each replay file
+        (game.replay becomes game-1.replay, game-2.replay, ...).
+        """
+        recorder = self._wave.get_recorder()
+        if recorder is None:
+            return
+        filename = RECORD_FILE
+        if self._campaign is not None:
+            root, extension = os.path.splitext(filename)
+            filename = '%s-%d%s' % (root, self._played, extension)
+        recorder.save(self._wave, filename)
+        self._wave.set_recorder(None)
+
+    def _following_wave(self):
+        """
+        Returns the file name of the wave after the one being loaded.
+
+        Without a campaign, this is DEFAULT_WAVE before the first wave and None
+        after it. It is None once the campaign is over.
+        """
+        if self._campaign is None:
+            return DEFAULT_WAVE if self._wave is None else None
+        return self._campaign.next_wave()
+
+    def _draw_profile(self):
+        """
+        Finishes profiling the frame and draws the profiler overlay.
+
+        The overlay text only changes every PROFILE_REFRESH frames, so that the
+        label is not rebuilt every frame.
+        """
+        self._profiler.mark('draw')
+        self._profiler.end_frame()
+        if self._profiler.get_frames() % PROFILE_REFRESH == 0:
+            self._overlay.text = self._profiler.summary()
+        self._overlay.draw(self.view)
@@ -0,0 +1,288 @@
+"""
+Shared-arena rules for Planetoids
+
+This module contains Arena, a Simulation with several ships in one wave. Each
+ship belongs to a player, who controls it with the same keys a single player
+uses (left, right, up and spacebar). The asteroids and bullets are shared: any
+bullet breaks any asteroid, and an asteroid that hits a ship destroys it. A
+destroyed ship comes back at its starting point after ARENA_RESPAWN ticks, so
+an arena is never lost; it is won once every asteroid is gone.
+
+The arena is only ever played headlessly (see server.py). Instead of a model
+to draw it, every asteroid and bullet gets a unique id number as its view, so
+the server can tell clients which objects changed.
+
+Like simulation.py, this module does not import game2d (or Kivy).
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from simulation import *
+import math
+import numpy as np
+
+# The number of ticks before a destroyed ship comes back
+ARENA_RESPAWN = 2 * TICK_RATE
+# The distance of the starting points from the ship position of the wave
+ARENA_SPREAD = 120
+# The number of starting points, evenly spaced around the ship position
+ARENA_SLOTS = 8
+
+
+class Player(object):
+    """
+    A class representing one player of an arena and their ship.
+    """
+    __slots__ = ('id', 'slot', 'ship', 'firerate', 'respawn', 'input')
+    # Attribute id: the number of the player (unique on the server)
+    # Invariant: id is an int >= 0
+    #
+    # Attribute slot: the starting point of the ship
+    # Invariant: slot is an int in 0..ARENA_SLOTS-1
+    #
+    # Attribute ship: the ship of the player
+    # Invariant: ship is a ShipBody, or None while waiting to respawn
+    #
+    # Attribute firerate: the number of ticks since the ship last fired
+    # Invariant: firerate is an int >= 0
+    #
+    # Attribute respawn: the number of ticks until the ship comes back
+    # Invariant: respawn is an int >= 0 (0 if ship is not None)
+    #
+    # Attribute input: the keys the player is holding down
+    # Invariant: input is a ScriptedInput
+
+    def __init__(self, id, slot):
+        """
+        Initializes a player with no ship and no keys held down.
+
+        Parameter id: the number of the player
+        Precondition: id is an int >= 0
+
+        Parameter slot: the starting point of the ship
+        Precondition: slot is an int in 0..ARENA_SLOTS-1
+        """
+        self.id = id
+        self.slot = slot
+        self.ship = None
+        self.firerate = 0
+        self.respawn = 0
+        self.input = ScriptedInput()
+
+
+class Arena(Simulation):
+    """
+    A class that plays a single wave of Planetoids with several ships.
+
+    Players join with add_player and leave with remove_player, at any time. The
+    keys of each player are set with set_keys, and stay held down until they are
+    set again. step advances every ship, the bullets and the asteroids by one
+    tick, in the same order as Simulation.step.
+
+    The ids of the asteroids and bullets are their views, so get_ids returns
+    them in row order. New objects are always added at the end of the rows with
+    a larger id, so the ids are in increasing order.
+    """
+    # The attributes for the game state are listed in Simulation. The single
+    # _ship of Simulation is only set while a player's ship is being moved; the
+    # ships of the players are in _players. In addition:
+    #
+    # Attribute _players: the players in the arena, in the order they joined
+    # Invariant: _players is a dict mapping player ids to Player objects
+    #
+    # Attribute _next_id: the id of the next asteroid or bullet
+    # Invariant: _next_id is an int > every id in use
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_players(self):
+        """Returns the list of players, in the order they joined."""
+        return list(self._players.values())
+
+    def get_next_id(self):
+        """Returns the id the next asteroid or bullet will get."""
+        return self._next_id
+
+    def get_ids(self, bodies):
+        """
+        Returns an array with the id of every row of bodies.
+
+        Parameter bodies: the asteroids or the bullets of this arena
+        Precondition: bodies is get_asteroids() or get_bullets()
+        """
+        return np.array(bodies.get_views(), dtype=np.int64)
+
+    # INITIALIZER
+    def __init__(self, save_level, first_id=0):
+        """
+        Initializes an arena with no players from the data of a wave.
+
+        Parameter save_level: the wave data
+        Precondition: save_level is a dict loaded from a wave JSON file, or a
+        CompiledWave
+
+        Parameter first_id: the id of the first asteroid or bullet
+        Precondition: first_id is an int >= 0
+        """
+        self._players = {}
+        self._next_id = first_id
+        Simulation.__init__(self, save_level)
+        self._ship = None
+
+    # PLAYERS
+    def add_player(self, id, slot):
+        """
+        Adds a player, with a new ship at the starting point of slot.
+
+        Parameter id: the number of the player
+        Precondition: id is an int >= 0 not already in the arena
+
+        Parameter slot: the starting point of the ship
+        Precondition: slot is an int in 0..ARENA_SLOTS-1
+        """
+        player = Player(id, slot)
+        player.ship = self._start(slot)
+        self._players[id] = player
+
+    def remove_player(self, id):
+        """
+        Removes a player and their ship. Their bullets stay in play.
+
+        Parameter id: the number of the player
+        Precondition: id is an int (nothing happens if it is not in the arena)
+        """
+        self._players.pop(id, None)
+
+    def set_keys(self, id, keys):
+        """
+        Sets the keys a player is holding down from the next tick on.
+
+        Parameter id: the number of the player
+        Precondition: id is an int (nothing happens if it is not in the arena)
+
+        Parameter keys: the keys held down
+        Precondition: keys is an iterable of key names (e.g. 'left', 'spacebar')
+        """
+        player = self._players.get(id)
+        if player is not None:
+            player.input.set_keys(keys)
+
+    # UPDATE
+    def step(self, input=None):
+        """
+        Advances the arena by exactly one tick.
+
+        Every ship is turned and fires with the keys of its player; input is
+        ignored (it is only here so an Arena can stand in for a Simulation).
+
+        Parameter input: ignored
+        Precondition: input is anything
+        """
+        self._ticks += 1
+        players = list(self._players.values())
+        for player in players:
+            if player.ship is not None:
+                player.ship.save()
+            else:
+                player.respawn -= 1
+                if player.respawn <= 0:
+                    player.ship = self._start(player.slot)
+                    player.firerate = 0
+        self._asteroids.save()
+        self._bullets.save()
+        self.spawn_asteroids()
+        for player in players:
+            if player.ship is not None:
+                self._ship = player.ship
+                self._firerate = player.firerate
+                self.handle_turning(player.input)
+                self.handle_firing(player.input)
+                player.firerate = self._firerate
+        self._ship = None
+        self.move_bullets()
+        self.bullets_to_use()
+        for player in players:
+            if player.ship is not None:
+                player.ship.move()
+                player.ship.wrap()
+        self.process_collisions()
+        self.move_asteroids()
+
+    # HELPER METHODS
+    def _start(self, slot):
+        """
+        Returns a new ship at the starting point of slot.
+
+        The starting points are evenly spaced on a circle around the ship
+        position of the wave, and every ship faces the same way as in the wave.
+
+        Parameter slot: the starting point
+        Precondition: slot is an int in 0..ARENA_SLOTS-1
+        """
+        x, y, angle = self._data.ship
+        turn = 2 * math.pi * slot / ARENA_SLOTS
+        return ShipBody(x + ARENA_SPREAD * math.cos(turn),
+                        y + ARENA_SPREAD * math.sin(turn), angle)
+
+    def _collide_ships(self, ax, ay, codes, asteroids_to_remove):
+        """
+        Destroys every ship that touches an asteroid, and breaks that asteroid.
+
+        Each asteroid destroys at most one ship. The player of a destroyed ship
+        waits ARENA_RESPAWN ticks for a new one.
+
+        Parameter ax, ay: the centers of the asteroids
+        Precondition: ax and ay are lists of floats, indexed by row
+
+        Parameter codes: the size codes of the asteroids
+        Precondition: codes is a list of size codes, indexed by row
+
+        Parameter asteroids_to_remove: the rows of the asteroids to remove
+        Precondition: asteroids_to_remove is a set of rows (added to here)
+        """
+        for player in self._players.values():
+            ship = player.ship
+            if ship is None:
+                continue
+            for i in self._grid.nearby(ship.x, ship.y):
+                if (i not in asteroids_to_remove and
+                    touches(ax[i], ay[i], codes[i], ship.x, ship.y, SHIP_KIND)):
+                    asteroids_to_remove.add(i)
+                    player.ship = None
+                    player.respawn = ARENA_RESPAWN
+                    self._break_asteroid(i, ship.get_velocity())
+                    break
+
+    # VIEW HOOKS
+    def _wants_views(self):
+        """Returns True, as every asteroid and bullet gets an id."""
+        return True
+
+    def _make_asteroid_view(self, code, position, direction):
+        """
+        Returns the id of a new asteroid.
+
+        Parameter code: the size code of the asteroid
+        Precondition: code is one of SMALL_CODE, MEDIUM_CODE or LARGE_CODE
+
+        Parameter position: contains the x and y coordinates of the center
+        Precondition: position is a sequence of two numbers
+
+        Parameter direction: the direction the asteroid moves in
+        Precondition: direction is a sequence of two numbers
+        """
+        self._next_id += 1
+        return self._next_id - 1
+
+    def _make_bullet_view(self, position, velocity):
+        """
+        Returns the id of a new bullet.
+
+        Parameter position: contains the x and y coordinates of the center
+        Precondition: position is a sequence of two numbers
+
+        Parameter velocity: the velocity of the bullet
+        Precondition: velocity is an (x, y) tuple of numbers
+        """
+        self._next_id += 1
+        return self._next_id - 1
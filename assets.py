@@ -0,0 +1,187 @@
+"""
+Asset cache for Planetoids
+
+This module contains a registry that loads every texture and font the game uses
+once, and then hands out the same object every time it is asked for again. It
+also holds the object pools for the model objects, so that a new wave reuses the
+asteroids and bullets of the previous one instead of building new GImages (and
+going back to the filesystem and the image decoder for their images).
+
+Kivy is only imported the first time a texture or font is actually loaded, so
+a headless game can import this module without it.
+
+This module does not access any other module of the game except consts.py and
+pools.py.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from pools import *
+import os
+
+# The folder with the image files (relative to the game folder)
+IMAGE_FOLDER = 'Images'
+# The folder with the font files (relative to the game folder)
+FONT_FOLDER = 'Fonts'
+
+
+class AssetCache(object):
+    """
+    A class that loads each asset once and shares it.
+
+    Textures and fonts are loaded lazily (the first time they are asked for), or
+    all at once with preload. Every request is counted as a hit (already loaded)
+    or a miss (loaded now), so it is easy to check that nothing is loaded on the
+    hot path.
+    """
+    # Attribute _folder: the game folder, which has the Images and Fonts folders
+    # Invariant: _folder is a string naming a folder
+    #
+    # Attribute _textures: the loaded textures
+    # Invariant: _textures is a dict mapping image file names to Kivy textures
+    #
+    # Attribute _fonts: the registered fonts
+    # Invariant: _fonts is a dict mapping font file names to font names
+    #
+    # Attribute _pools: the shared object pools
+    # Invariant: _pools is a dict mapping keys to ObjectPool objects
+    #
+    # Attribute _hits: the number of requests for an asset already loaded
+    # Invariant: _hits is an int >= 0
+    #
+    # Attribute _misses: the number of requests that had to load the asset
+    # Invariant: _misses is an int >= 0
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_hits(self):
+        """Returns the number of requests for an asset that was already loaded."""
+        return self._hits
+
+    def get_misses(self):
+        """Returns the number of requests that had to load their asset."""
+        return self._misses
+
+    # INITIALIZER
+    def __init__(self, folder=None):
+        """
+        Initializes an empty cache.
+
+        Parameter folder: the game folder (None for the folder of this module)
+        Precondition: folder is a string naming a folder, or None
+        """
+        if folder is None:
+            folder = os.path.dirname(os.path.abspath(__file__))
+        self._folder = folder
+        self._textures = {}
+        self._fonts = {}
+        self._pools = {}
+        self._hits = 0
+        self._misses = 0
+
+    # ASSETS
+    def texture(self, name):
+        """
+        Returns the shared texture for the given image file.
+
+        Parameter name: the image file name (e.g. SHIP_IMAGE)
+        Precondition: name is a string naming a file in the Images folder
+        """
+        texture = self._textures.get(name)
+        if texture is not None:
+            self._hits += 1
+            return texture
+        self._misses += 1
+        from kivy.core.image import Image
+        texture = Image(self._path(IMAGE_FOLDER, name)).texture
+        self._textures[name] = texture
+        return texture
+
+    def font(self, name):
+        """
+        Returns the font name to use in a GLabel for the given font file.
+
+        The font is registered with Kivy the first time it is asked for, so
+        later labels do not have to look for the file again.
+
+        Parameter name: the font file name (e.g. MESSAGE_FONT)
+        Precondition: name is a string naming a file in the Fonts folder
+        """
+        font = self._fonts.get(name)
+        if font is not None:
+            self._hits += 1
+            return font
+        self._misses += 1
+        from kivy.core.text import LabelBase
+        LabelBase.register(name, self._path(FONT_FOLDER, name))
+        self._fonts[name] = name
+        return name
+
+    def pool(self, key, factory):
+        """
+        Returns the shared object pool for key, creating it if necessary.
+
+        Parameter key: the name of the pool (e.g. 'bullet')
+        Precondition: key is a hashable value
+
+        Parameter factory: the function that creates new objects for the pool
+        Precondition: factory is a callable (see ObjectPool)
+        """
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = ObjectPool(factory)
+            self._pools[key] = pool
+        return pool
+
+    def preload(self, images=(), fonts=()):
+        """
+        Loads the given textures and fonts now, so that they are never loaded
+        in the middle of a game.
+
+        Parameter images: the image files to load
+        Precondition: images is a sequence of image file names
+
+        Parameter fonts: the font files to load
+        Precondition: fonts is a sequence of font file names
+        """
+        for name in images:
+            self.texture(name)
+        for name in fonts:
+            self.font(name)
+
+    def stats(self):
+        """
+        Returns a dict with the hit and miss counts and the pool statistics.
+        """
+        result = {'hits': self._hits, 'misses': self._misses,
+                  'textures': len(self._textures), 'fonts': len(self._fonts),
+                  'pools': {}}
+        for key, pool in self._pools.items():
+            result['pools'][str(key)] = {'created': pool.get_created(),
+                                         'reused': pool.get_reused(),
+                                         'free': pool.get_free()}
+        return result
+
+    # HELPER METHODS
+    def _path(self, folder, name):
+        """
+        Returns the path of an asset file.
+
+        Kivy's resource paths are tried first (game2d adds its folders to them),
+        and then the given folder of the game folder.
+
+        Parameter folder: the subfolder for this kind of asset
+        Precondition: folder is a string
+
+        Parameter name: the file name
+        Precondition: name is a string
+        """
+        from kivy.resources import resource_find
+        path = resource_find(name)
+        if path is None:
+            path = os.path.join(self._folder, folder, name)
+        return path
+
+
+# The asset cache shared by the whole game
+ASSETS = AssetCache()
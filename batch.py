@@ -0,0 +1,630 @@
+"""
+Batched waves of Planetoids for training automated players
+
+This module contains WaveBatch, which plays many independent waves at once.
+Stepping one Simulation at a time costs a few dozen Python calls per object per
+tick, which is far too slow for training. A WaveBatch keeps every wave in the
+same NumPy arrays instead, one row per wave: the ship of each wave in arrays of
+length n, and the asteroids and bullets in (n, capacity) arrays with a mask of
+the slots in use. Each tick is a fixed number of array operations on the whole
+batch, however many waves there are.
+
+The API is shaped like a vectorized gym environment:
+
+    batch = WaveBatch(wave, 1024)
+    observation = batch.reset()
+    observation, reward, done, info = batch.step(actions)
+
+An action is a key mask, with the same bits as a replay file (ACTION_LEFT,
+ACTION_RIGHT, ACTION_UP and ACTION_FIRE). The reward is the number of asteroids
+shot that tick. A wave that is won or lost (or reaches the tick limit) is
+reset in the same step, so the observation of a done wave is the start of its
+next one.
+
+The rules are those of Simulation.step, process_collisions and _break_asteroid,
+in the same order and with the same arithmetic, so a wave in a batch plays out
+exactly like a Simulation given the same keys (batchcheck.py checks this). The
+only difference is the tie break when a bullet reaches two asteroids at the same
+instant, or the ship touches two at once. Waves that bounce are not supported.
+
+Like simulation.py, this module does not import game2d (or Kivy).
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from simulation import *
+import math
+import numpy as np
+
+# The bits of an action (the same bits as the key masks of replay.py)
+ACTION_LEFT  = 1
+ACTION_RIGHT = 2
+ACTION_UP    = 4
+ACTION_FIRE  = 8
+# The keys of each action bit, in bit order
+ACTION_KEYS = ('left', 'right', 'up', 'spacebar')
+
+# The most slots an asteroid of each size can ever fill (itself, or its pieces)
+ASTEROID_PIECES = (1, 3, 9)
+# The most bullets a wave can have at once. A bullet leaves the dead zone after
+# crossing it at most once, and the ship fires once every BULLET_RATE ticks.
+BATCH_BULLETS = int(math.hypot(WRAP_WIDTH, WRAP_HEIGHT) / BULLET_SPEED) // BULLET_RATE + 2
+
+# The facing vectors of HEADINGS as arrays, indexed by degree
+HEADING_X = np.array([facing[0] for facing in HEADINGS])
+HEADING_Y = np.array([facing[1] for facing in HEADINGS])
+# The radius and speed of each asteroid size, as arrays indexed by size code
+RADIUS_ARRAY = np.array(ASTEROID_RADII, dtype=float)
+SPEED_ARRAY = np.array(ASTEROID_SPEEDS, dtype=float)
+# The squared contact distance of each asteroid size with the ship
+SHIP_REACH_SQUARED = CONTACT_SQUARED_ARRAY[:len(ASTEROID_RADII), SHIP_KIND]
+
+
+def action_mask(keys):
+    """
+    Returns the action for the given keys held down.
+
+    Parameter keys: the keys held down
+    Precondition: keys is an iterable of ACTION_KEYS
+    """
+    keys = set(keys)
+    return sum(1 << bit for bit, key in enumerate(ACTION_KEYS) if key in keys)
+
+
+class WaveBatch(object):
+    """
+    A class that plays many waves of Planetoids at once, as arrays.
+
+    Wave k of the batch plays waves[k % len(waves)]. All of the state is kept in
+    arrays indexed by wave (and by slot, for asteroids and bullets), and every
+    method works on the whole batch at once.
+
+    The observation returned by reset and step is a dict of new arrays:
+
+        'ship'          (n, 5) floats: x, y, angle, velocity x, velocity y
+        'cooldown'      (n,) ints: the ticks until the ship can fire (0 if ready)
+        'asteroids'     (n, capacity, 5) floats: x, y, velocity x, velocity y,
+                        and size code of every asteroid slot
+        'asteroid_mask' (n, capacity) bools: the asteroid slots in use
+        'bullets'       (n, BATCH_BULLETS, 4) floats: x, y, velocity x and y
+        'bullet_mask'   (n, BATCH_BULLETS) bools: the bullet slots in use
+
+    Slots that are not in use hold zeros.
+    """
+    # Attribute _count: the number of waves in the batch
+    # Invariant: _count is an int > 0
+    #
+    # Attribute _limit: the number of ticks after which a wave is cut off
+    # Invariant: _limit is an int > 0, or None for no limit
+    #
+    # Attribute _waves: the wave of each row, as an index into the wave data
+    # Invariant: _waves is an int array of length _count
+    #
+    # Attribute _ship0: the starting x, y and angle of the ship of each wave
+    # Invariant: _ship0 is a float array of shape (number of waves, 3)
+    #
+    # Attribute _total: the number of asteroids in each wave
+    # Invariant: _total is an int array, one entry per wave
+    #
+    # Attribute _spawn: the spawn tick, x, y, velocity x, velocity y and size
+    #           code of every asteroid of each wave, padded with spawn ticks
+    #           that never come
+    # Invariant: _spawn is a tuple of 6 arrays of shape (number of waves, most
+    #            asteroids in a wave)
+    #
+    # Attribute _capacity: the number of asteroid slots of each row
+    # Invariant: _capacity is an int, enough for every piece of every wave
+    #
+    # Attribute _ticks: the ticks played by each row
+    # Invariant: _ticks is an int array of length _count
+    #
+    # Attribute _spawned: the number of asteroids of its wave each row spawned
+    # Invariant: _spawned is an int array of length _count
+    #
+    # Attribute _sx, _sy, _angle, _svx, _svy, _fx, _fy: the ship of each row
+    #           (center, angle, velocity and facing vector, as in ShipBody)
+    # Invariant: each is a float array of length _count
+    #
+    # Attribute _alive: whether the ship of each row is alive
+    # Invariant: _alive is a bool array of length _count
+    #
+    # Attribute _firerate: the ticks since each ship fired (as in Simulation)
+    # Invariant: _firerate is an int array of length _count
+    #
+    # Attribute _ax, _ay, _avx, _avy, _ar: the center, velocity and radius of
+    #           every asteroid slot
+    # Invariant: each is a float array of shape (_count, _capacity)
+    #
+    # Attribute _acode: the size code of every asteroid slot
+    # Invariant: _acode is an int array of shape (_count, _capacity)
+    #
+    # Attribute _aused: the asteroid slots in use
+    # Invariant: _aused is a bool array of shape (_count, _capacity)
+    #
+    # Attribute _bx, _by, _bpx, _bpy, _bvx, _bvy: the center, saved center and
+    #           velocity of every bullet slot
+    # Invariant: each is a float array of shape (_count, BATCH_BULLETS)
+    #
+    # Attribute _born: the tick each bullet was fired on (bullets are tested in
+    #           the order they were fired, like the rows of Simulation)
+    # Invariant: _born is an int array of shape (_count, BATCH_BULLETS)
+    #
+    # Attribute _bused: the bullet slots in use
+    # Invariant: _bused is a bool array of shape (_count, BATCH_BULLETS)
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_count(self):
+        """Returns the number of waves in the batch."""
+        return self._count
+
+    def get_capacity(self):
+        """Returns the number of asteroid slots of each wave."""
+        return self._capacity
+
+    def get_ticks(self):
+        """Returns an array with the ticks played by each wave since its reset."""
+        return self._ticks.copy()
+
+    # INITIALIZER
+    def __init__(self, waves, count, limit=None):
+        """
+        Initializes a batch of count waves, all at their start.
+
+        Parameter waves: the wave data (one for every row, or a list to share)
+        Precondition: waves is a wave dict or CompiledWave, or a non-empty list
+        of them, none of which bounce
+
+        Parameter count: the number of waves in the batch
+        Precondition: count is an int > 0
+
+        Parameter limit: the number of ticks after which a wave is cut off
+        Precondition: limit is an int > 0, or None for no limit
+        """
+        if not isinstance(waves, list):
+            waves = [waves]
+        waves = [data if isinstance(data, CompiledWave) else
+                 CompiledWave.from_dict(data) for data in waves]
+        for data in waves:
+            if data.bounce:
+                raise ValueError('WaveBatch does not play waves that bounce')
+        self._count = count
+        self._limit = limit
+        self._waves = np.arange(count) % len(waves)
+        self._ship0 = np.array([data.ship for data in waves], dtype=float)
+        self._total = np.array([len(data) for data in waves], dtype=np.int64)
+
+        most = max(1, int(self._total.max()))
+        ticks = np.full((len(waves), most), np.iinfo(np.int64).max, dtype=np.int64)
+        x = np.zeros((len(waves), most))
+        y = np.zeros((len(waves), most))
+        vx = np.zeros((len(waves), most))
+        vy = np.zeros((len(waves), most))
+        codes = np.zeros((len(waves), most), dtype=np.int64)
+        capacity = 1
+        for w, data in enumerate(waves):
+            n = len(data)
+            sizes = np.asarray(data.sizes, dtype=np.int64)
+            ticks[w, :n] = data.ticks
+            x[w, :n] = data.positions[:, 0]
+            y[w, :n] = data.positions[:, 1]
+            vx[w, :n], vy[w, :n] = asteroid_velocities(
+                np.asarray(data.directions, dtype=float).reshape(-1, 2), sizes)
+            codes[w, :n] = sizes
+            capacity = max(capacity, int(np.take(ASTEROID_PIECES, sizes).sum()))
+        self._spawn = (ticks, x, y, vx, vy, codes)
+        self._capacity = capacity
+
+        self._ticks = np.zeros(count, dtype=np.int64)
+        self._spawned = np.zeros(count, dtype=np.int64)
+        self._sx = np.zeros(count)
+        self._sy = np.zeros(count)
+        self._angle = np.zeros(count)
+        self._svx = np.zeros(count)
+        self._svy = np.zeros(count)
+        self._fx = np.zeros(count)
+        self._fy = np.zeros(count)
+        self._alive = np.zeros(count, dtype=bool)
+        self._firerate = np.zeros(count, dtype=np.int64)
+
+        shape = (count, capacity)
+        self._ax = np.zeros(shape)
+        self._ay = np.zeros(shape)
+        self._avx = np.zeros(shape)
+        self._avy = np.zeros(shape)
+        self._ar = np.zeros(shape)
+        self._acode = np.zeros(shape, dtype=np.int64)
+        self._aused = np.zeros(shape, dtype=bool)
+
+        shape = (count, BATCH_BULLETS)
+        self._bx = np.zeros(shape)
+        self._by = np.zeros(shape)
+        self._bpx = np.zeros(shape)
+        self._bpy = np.zeros(shape)
+        self._bvx = np.zeros(shape)
+        self._bvy = np.zeros(shape)
+        self._born = np.zeros(shape, dtype=np.int64)
+        self._bused = np.zeros(shape, dtype=bool)
+        self._reset(np.arange(count))
+
+    # GYM API
+    def reset(self):
+        """
+        Starts every wave over, and returns the observation.
+        """
+        self._reset(np.arange(self._count))
+        return self.observe()
+
+    def step(self, actions):
+        """
+        Advances every wave by one tick, and returns (observation, reward, done, info).
+
+        reward is an int array with the number of asteroids each wave shot this
+        tick, and done is a bool array marking the waves that ended. Those waves
+        are started over before the observation is taken. info is a dict with
+        the bool arrays 'won', 'lost' and 'truncated' (cut off by the limit),
+        and the int array 'ticks' with the length of each wave that ended.
+
+        Parameter actions: the key mask of every wave
+        Precondition: actions is an int array of length get_count() with
+        values in 0..15 (or a bool array of shape (get_count(), 4), in the
+        order of ACTION_KEYS)
+        """
+        actions = np.asarray(actions)
+        if actions.ndim == 2:
+            actions = actions.astype(np.int64) @ (1 << np.arange(len(ACTION_KEYS)))
+        self._ticks += 1
+        self._bpx[:] = self._bx
+        self._bpy[:] = self._by
+        self._spawn_asteroids()
+        self._handle_turning(actions)
+        self._handle_firing(actions)
+        self._move_bullets()
+        self._move_ship()
+        reward = self._process_collisions()
+        self._move_asteroids()
+
+        lost = ~self._alive
+        won = self._alive & (self._spawned == self._total[self._waves]) & \
+            ~self._aused.any(axis=1)
+        truncated = np.zeros(self._count, dtype=bool)
+        if self._limit is not None:
+            truncated = ~(won | lost) & (self._ticks >= self._limit)
+        done = won | lost | truncated
+        ticks = self._ticks.copy()
+        if done.any():
+            self._reset(np.nonzero(done)[0])
+        info = {'won': won, 'lost': lost, 'truncated': truncated, 'ticks': ticks}
+        return (self.observe(), reward, done, info)
+
+    def observe(self):
+        """
+        Returns the observation of every wave (see the class docstring).
+        """
+        return {'ship': np.stack([self._sx, self._sy, self._angle,
+                                  self._svx, self._svy], axis=-1),
+                'cooldown': np.maximum(BULLET_RATE - self._firerate, 0),
+                'asteroids': np.stack([self._ax, self._ay, self._avx, self._avy,
+                                       self._acode], axis=-1),
+                'asteroid_mask': self._aused.copy(),
+                'bullets': np.stack([self._bx, self._by, self._bvx, self._bvy],
+                                    axis=-1),
+                'bullet_mask': self._bused.copy()}
+
+    # RULES (IN THE ORDER OF Simulation.step)
+    def _spawn_asteroids(self):
+        """
+        Adds the asteroids whose spawn tick has come, as Simulation.spawn_asteroids.
+        """
+        ticks, x, y, vx, vy, codes = self._spawn
+        waves = self._waves
+        due = (ticks[waves] <= self._ticks[:, None]).sum(axis=1)
+        counts = due - self._spawned
+        if not counts.any():
+            return
+        rows = np.repeat(np.arange(self._count), counts)
+        first = np.repeat(self._spawned, counts)
+        rank = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        index = first + rank
+        w = waves[rows]
+        self._insert(rows, x[w, index], y[w, index], vx[w, index], vy[w, index],
+                     codes[w, index])
+        self._spawned = due
+
+    def _handle_turning(self, actions):
+        """
+        Turns and thrusts every ship, as Simulation.handle_turning.
+
+        Parameter actions: the key mask of every wave
+        Precondition: actions is an int array of length _count
+        """
+        alive = self._alive
+        turn = (SHIP_TURN_RATE * ((actions & ACTION_LEFT) != 0) -
+                SHIP_TURN_RATE * ((actions & ACTION_RIGHT) != 0))
+        turning = np.nonzero(alive & (turn != 0))[0]
+        if len(turning):
+            angle = (self._angle[turning] + turn[turning]) % 360
+            self._angle[turning] = angle
+            whole = angle == np.floor(angle)
+            degrees = angle[whole].astype(np.int64)
+            self._fx[turning[whole]] = HEADING_X[degrees]
+            self._fy[turning[whole]] = HEADING_Y[degrees]
+            for k in turning[~whole].tolist():
+                self._fx[k], self._fy[k] = heading(float(self._angle[k]))
+        thrust = np.nonzero(alive & ((actions & ACTION_UP) != 0))[0]
+        if len(thrust):
+            vx = self._svx[thrust] + self._fx[thrust] * SHIP_IMPULSE
+            vy = self._svy[thrust] + self._fy[thrust] * SHIP_IMPULSE
+            speed = np.sqrt(vx*vx + vy*vy)
+            fast = speed > SHIP_MAX_SPEED
+            self._svx[thrust] = np.where(fast, vx / speed * SHIP_MAX_SPEED, vx)
+            self._svy[thrust] = np.where(fast, vy / speed * SHIP_MAX_SPEED, vy)
+
+    def _handle_firing(self, actions):
+        """
+        Fires a bullet from every ready ship with the fire key down, as
+        Simulation.handle_firing and bullet_release.
+
+        Parameter actions: the key mask of every wave
+        Precondition: actions is an int array of length _count
+        """
+        ready = self._alive & (self._firerate >= BULLET_RATE) & \
+            ((actions & ACTION_FIRE) != 0)
+        self._firerate = np.where(ready, 0, self._firerate + 1)
+        rows = np.nonzero(ready)[0]
+        if not len(rows):
+            return
+        slots = np.argmin(self._bused[rows], axis=1)
+        fx = self._fx[rows]
+        fy = self._fy[rows]
+        x = self._sx[rows] + (fx * SHIP_RADIUS)
+        y = self._sy[rows] + (fy * SHIP_RADIUS)
+        self._bx[rows, slots] = x
+        self._by[rows, slots] = y
+        self._bpx[rows, slots] = x
+        self._bpy[rows, slots] = y
+        self._bvx[rows, slots] = fx * BULLET_SPEED
+        self._bvy[rows, slots] = fy * BULLET_SPEED
+        self._born[rows, slots] = self._ticks[rows]
+        self._bused[rows, slots] = True
+
+    def _move_bullets(self):
+        """
+        Moves every bullet and drops the ones outside the dead zone, as
+        Simulation.move_bullets and bullets_to_use.
+        """
+        self._bx += self._bvx
+        self._by += self._bvy
+        x = self._bx
+        y = self._by
+        inside = ((-DEAD_ZONE < x) & (x < GAME_WIDTH + DEAD_ZONE) &
+                  (-DEAD_ZONE < y) & (y < GAME_HEIGHT + DEAD_ZONE))
+        self._bused &= inside
+        self._clear_bullets(~self._bused)
+
+    def _move_ship(self):
+        """
+        Moves and wraps every ship, as Simulation.move_ship.
+        """
+        alive = self._alive
+        x = self._sx + np.where(alive, self._svx, 0.0)
+        y = self._sy + np.where(alive, self._svy, 0.0)
+        x = np.where(x - SHIP_RADIUS < -DEAD_ZONE, x + WRAP_WIDTH,
+                     np.where(x + SHIP_RADIUS > GAME_WIDTH + DEAD_ZONE,
+                              x - WRAP_WIDTH, x))
+        y = np.where(y + SHIP_RADIUS < -DEAD_ZONE, y + WRAP_HEIGHT,
+                     np.where(y - SHIP_RADIUS > GAME_HEIGHT + DEAD_ZONE,
+                              y - WRAP_HEIGHT, y))
+        self._sx = x
+        self._sy = y
+
+    def _process_collisions(self):
+        """
+        Tests every bullet and ship against the asteroids, as
+        Simulation.process_collisions, and returns the asteroids shot per wave.
+
+        The bullets of all waves are tested together, one bullet per wave at a
+        time in the order they were fired, so an asteroid shot by an earlier
+        bullet is out of the way of the later ones. Each test is the swept test
+        of collisions.time_of_impact against every asteroid of the wave.
+        """
+        count = self._count
+        rows = np.arange(count)
+        shot = np.zeros(count, dtype=np.int64)
+        hit = np.zeros(self._aused.shape, dtype=bool)
+        breaks = []
+
+        bdx = self._bx - self._bpx
+        bdy = self._by - self._bpy
+        bdx -= WRAP_WIDTH * np.round(bdx / WRAP_WIDTH)
+        bdy -= WRAP_HEIGHT * np.round(bdy / WRAP_HEIGHT)
+        never = np.iinfo(np.int64).max
+        order = np.argsort(np.where(self._bused, self._born, never), axis=1,
+                           kind='stable')
+        for k in range(BATCH_BULLETS):
+            slots = order[:, k]
+            live = np.nonzero(self._bused[rows, slots] & self._alive)[0]
+            if not len(live):
+                break
+            j = slots[live]
+            ddx = bdx[live, j]
+            ddy = bdy[live, j]
+            avx = self._avx[live]
+            avy = self._avy[live]
+            x = (self._bx[live, j] - ddx)[:, None] - self._ax[live] + avx
+            y = (self._by[live, j] - ddy)[:, None] - self._ay[live] + avy
+            dx = ddx[:, None] - avx
+            dy = ddy[:, None] - avy
+            radius = self._ar[live] + BULLET_RADIUS
+            c = x * x + y * y - radius * radius
+            b = x * dx + y * dy
+            a = dx * dx + dy * dy
+            disc = b * b - a * c
+            moving = (b < 0) & (disc > 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = (-b - np.sqrt(np.where(moving, disc, 0.0))) / np.where(moving, a, 1.0)
+            t = np.where(c < 0, 0.0, np.where(moving & (t < 1), t, np.inf))
+            t[~self._aused[live] | hit[live]] = np.inf
+            first = np.argmin(t, axis=1)
+            found = t[np.arange(len(live)), first] < np.inf
+            e = live[found]
+            i = first[found]
+            j = j[found]
+            hit[e, i] = True
+            shot[e] += 1
+            self._bused[e, j] = False
+            breaks.append((e, i, self._bvx[e, j], self._bvy[e, j]))
+
+        dx = self._ax - self._sx[:, None]
+        dy = self._ay - self._sy[:, None]
+        touching = ((dx * dx + dy * dy < SHIP_REACH_SQUARED[self._acode]) &
+                    self._aused & ~hit & self._alive[:, None])
+        crashed = np.nonzero(touching.any(axis=1))[0]
+        if len(crashed):
+            i = np.argmax(touching[crashed], axis=1)
+            hit[crashed, i] = True
+            self._alive[crashed] = False
+            breaks.append((crashed, i, self._svx[crashed], self._svy[crashed]))
+
+        self._clear_bullets(~self._bused)
+        if breaks:
+            pieces = self._break_asteroids(breaks)
+            self._aused &= ~hit
+            self._clear_asteroids(hit)
+            if len(pieces[0]):
+                self._insert(*pieces)
+        return shot
+
+    def _break_asteroids(self, breaks):
+        """
+        Returns the pieces of every broken asteroid, as Simulation._break_asteroid.
+
+        The pieces are returned as a tuple (rows, x, y, vx, vy, codes) of arrays
+        for _insert, to add once the broken asteroids are removed (so they can
+        take the freed slots). Like in Simulation, they cannot be hit in the
+        tick they are made.
+
+        Parameter breaks: for each group of hits, the rows, the asteroid slots
+        and the x and y of the colliding velocity
+        Precondition: breaks is a list of tuples of four arrays
+        """
+        rows = np.concatenate([group[0] for group in breaks])
+        slots = np.concatenate([group[1] for group in breaks])
+        cx = np.concatenate([group[2] for group in breaks])
+        cy = np.concatenate([group[3] for group in breaks])
+        codes = self._acode[rows, slots]
+        big = codes != SMALL_CODE
+        rows, slots, cx, cy, codes = rows[big], slots[big], cx[big], cy[big], codes[big]
+        x = self._ax[rows, slots]
+        y = self._ay[rows, slots]
+        new_code = codes - 1
+        new_radius = RADIUS_ARRAY[new_code]
+        speed = SPEED_ARRAY[new_code]
+        magnitude = np.sqrt(cx*cx + cy*cy)
+        still = magnitude == 0
+        safe = np.where(still, 1.0, magnitude)
+        ux = np.where(still, 1.0, cx / safe)
+        uy = np.where(still, 0.0, cy / safe)
+        pieces = []
+        for cos, sin in SPLIT_ROTATIONS:
+            dx = ux * cos - uy * sin
+            dy = ux * sin + uy * cos
+            pieces.append((x + new_radius * dx, y + new_radius * dy,
+                           dx * speed, dy * speed))
+        # Interleave the pieces so each asteroid's three are together, in order
+        return (np.repeat(rows, len(SPLIT_ROTATIONS)),
+                        np.stack([piece[0] for piece in pieces], axis=1).ravel(),
+                        np.stack([piece[1] for piece in pieces], axis=1).ravel(),
+                        np.stack([piece[2] for piece in pieces], axis=1).ravel(),
+                        np.stack([piece[3] for piece in pieces], axis=1).ravel(),
+                        np.repeat(new_code, len(SPLIT_ROTATIONS)))
+
+    def _move_asteroids(self):
+        """
+        Moves and wraps every asteroid, as Simulation.move_asteroids.
+        """
+        self._ax += self._avx
+        self._ay += self._avy
+        x = self._ax
+        y = self._ay
+        x[x < -DEAD_ZONE] += WRAP_WIDTH
+        x[x > GAME_WIDTH + DEAD_ZONE] -= WRAP_WIDTH
+        y[y < -DEAD_ZONE] += WRAP_HEIGHT
+        y[y > GAME_HEIGHT + DEAD_ZONE] -= WRAP_HEIGHT
+
+    # HELPER METHODS
+    def _reset(self, rows):
+        """
+        Starts the waves of the given rows over.
+
+        Parameter rows: the rows to reset
+        Precondition: rows is an int array of distinct rows
+        """
+        ship = self._ship0[self._waves[rows]]
+        self._ticks[rows] = 0
+        self._spawned[rows] = 0
+        self._sx[rows] = ship[:, 0]
+        self._sy[rows] = ship[:, 1]
+        self._angle[rows] = ship[:, 2]
+        self._svx[rows] = 0.0
+        self._svy[rows] = 0.0
+        for k in rows.tolist():
+            self._fx[k], self._fy[k] = heading(float(self._angle[k]) % 360)
+        self._alive[rows] = True
+        self._firerate[rows] = 0
+        for array in (self._ax, self._ay, self._avx, self._avy, self._ar,
+                      self._acode, self._aused, self._bx, self._by, self._bpx,
+                      self._bpy, self._bvx, self._bvy, self._born, self._bused):
+            array[rows] = 0
+        self._spawn_asteroids()
+
+    def _insert(self, rows, x, y, vx, vy, codes):
+        """
+        Puts new asteroids into free slots, in order, lowest slot first.
+
+        Parameter rows: the row of each new asteroid (rows may repeat)
+        Precondition: rows is an int array; each row has enough free slots
+
+        Parameter x, y, vx, vy: the center and velocity of each new asteroid
+        Precondition: each is a float array as long as rows
+
+        Parameter codes: the size code of each new asteroid
+        Precondition: codes is an int array as long as rows
+        """
+        order = np.argsort(rows, kind='stable')
+        rows = rows[order]
+        targets, start, counts = np.unique(rows, return_index=True,
+                                           return_counts=True)
+        rank = np.arange(len(rows)) - np.repeat(start, counts)
+        free = np.argsort(self._aused[targets], axis=1, kind='stable')
+        slots = free[np.repeat(np.arange(len(targets)), counts), rank]
+        codes = codes[order]
+        self._ax[rows, slots] = x[order]
+        self._ay[rows, slots] = y[order]
+        self._avx[rows, slots] = vx[order]
+        self._avy[rows, slots] = vy[order]
+        self._ar[rows, slots] = RADIUS_ARRAY[codes]
+        self._acode[rows, slots] = codes
+        self._aused[rows, slots] = True
+
+    def _clear_asteroids(self, mask):
+        """
+        Zeroes the asteroid slots in mask.
+
+        Parameter mask: the slots to zero
+        Precondition: mask is a bool array of shape (_count, _capacity)
+        """
+        for array in (self._ax, self._ay, self._avx, self._avy, self._ar,
+                      self._acode):
+            array[mask] = 0
+
+    def _clear_bullets(self, mask):
+        """
+        Zeroes the bullet slots in mask.
+
+        Parameter mask: the slots to zero
+        Precondition: mask is a bool array of shape (_count, BATCH_BULLETS)
+        """
+        for array in (self._bx, self._by, self._bpx, self._bpy, self._bvx,
+                      self._bvy):
+            array[mask] = 0
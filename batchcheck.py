@@ -0,0 +1,226 @@
+"""
+Equivalence check and throughput of the batched waves in Planetoids
+
+WaveBatch (in batch.py) claims to play every wave exactly like a Simulation
+given the same keys. This script checks that claim and measures how fast a
+batch runs:
+
+    check       plays a small batch and one Simulation per wave with the same
+                random keys, and compares the ship, asteroids, bullets, reward
+                and outcome of every wave after every tick (these must be
+                exactly equal)
+    speed       steps a large batch with random keys and reports env-steps per
+                second (waves times ticks)
+
+Run it with
+
+    python batchcheck.py --waves 16 --ticks 3000 --batch 1024
+
+It exits with status 1 if any check fails.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from batch import *
+from bench import *
+import argparse
+import math
+import sys
+import time
+import numpy as np
+
+# The number of waves compared by default
+CHECK_WAVES = 16
+# The number of ticks compared by default
+CHECK_TICKS = 3000
+# The number of waves in the batch timed by default
+SPEED_BATCH = 1024
+# The number of ticks timed by default
+SPEED_TICKS = 200
+# The number of asteroids in each synthetic wave
+CHECK_ASTEROIDS = 8
+# The number of ticks each random action is held
+CHECK_HOLD = 20
+# The distance from the ship inside which the synthetic waves have no asteroids
+CHECK_CLEARANCE = 200
+
+
+def check_wave(seed):
+    """
+    Returns a synthetic wave with no asteroids near the ship, as a CompiledWave.
+
+    The waves of bench.make_wave put asteroids anywhere, so many would end on
+    their first tick.
+
+    Parameter seed: the seed for the wave
+    Precondition: seed is an int
+    """
+    data = make_wave(CHECK_ASTEROIDS * 2, seed)
+    x, y = data['ship']['position']
+    data['asteroids'] = [asteroid for asteroid in data['asteroids']
+                         if math.hypot(asteroid['position'][0] - x,
+                                       asteroid['position'][1] - y) > CHECK_CLEARANCE]
+    data['asteroids'] = data['asteroids'][:CHECK_ASTEROIDS]
+    return CompiledWave.from_dict(data)
+
+
+def random_actions(rand, count):
+    """
+    Returns an array of count random actions.
+
+    Fire is held more often than not, so waves end (won or lost) often.
+
+    Parameter rand: the random number generator to use
+    Precondition: rand is a numpy Generator
+
+    Parameter count: the number of actions
+    Precondition: count is an int > 0
+    """
+    actions = rand.integers(0, 8, count)
+    return actions | np.where(rand.random(count) < 0.8, ACTION_FIRE, 0)
+
+
+def simulation_state(wave):
+    """
+    Returns the ship, asteroids and bullets of a Simulation as sorted arrays.
+
+    Parameter wave: the wave
+    Precondition: wave is a Simulation with a ship
+    """
+    ship = wave.get_ship()
+    vx, vy = ship.get_velocity()
+    rocks = wave.get_asteroids()
+    shots = wave.get_bullets()
+    asteroids = np.stack([rocks.x, rocks.y, rocks.vx, rocks.vy,
+                          rocks.size.astype(float)], axis=-1)
+    bullets = np.stack([shots.x, shots.y, shots.vx, shots.vy], axis=-1)
+    return (np.array([ship.x, ship.y, ship.angle, vx, vy]),
+            asteroids[np.lexsort(asteroids.T[::-1])],
+            bullets[np.lexsort(bullets.T[::-1])])
+
+
+def batch_state(observation, k):
+    """
+    Returns the ship, asteroids and bullets of wave k of a batch as sorted arrays.
+
+    Parameter observation: the observation of the batch
+    Precondition: observation is a dict returned by WaveBatch.step
+
+    Parameter k: the wave
+    Precondition: k is an int in range of the batch
+    """
+    asteroids = observation['asteroids'][k][observation['asteroid_mask'][k]]
+    bullets = observation['bullets'][k][observation['bullet_mask'][k]]
+    return (observation['ship'][k],
+            asteroids[np.lexsort(asteroids.T[::-1])],
+            bullets[np.lexsort(bullets.T[::-1])])
+
+
+def check(waves, ticks, seed=0):
+    """
+    Returns a tuple (mismatches, episodes) from comparing a batch with Simulations.
+
+    mismatches is the number of ticks at which some wave differed, and episodes
+    the number of waves that ended (and were started over) during the check.
+
+    Parameter waves: the number of waves in the batch
+    Precondition: waves is an int > 0
+
+    Parameter ticks: the number of ticks to compare
+    Precondition: ticks is an int > 0
+
+    Parameter seed: the seed for the waves and the keys
+    Precondition: seed is an int
+    """
+    data = [check_wave(seed + k) for k in range(waves)]
+    batch = WaveBatch(data, waves)
+    batch.reset()
+    games = [Simulation(wave) for wave in data]
+    rand = np.random.default_rng(seed)
+    mismatches = 0
+    episodes = 0
+    actions = None
+    for tick in range(ticks):
+        if tick % CHECK_HOLD == 0:
+            actions = random_actions(rand, waves)
+        observation, reward, done, info = batch.step(actions)
+        wrong = False
+        for k in range(waves):
+            game = games[k]
+            destroyed = game.get_destroyed()
+            game.step(ScriptedInput(ACTION_KEYS[bit] for bit in range(len(ACTION_KEYS))
+                                    if actions[k] & (1 << bit)))
+            if reward[k] != game.get_destroyed() - destroyed:
+                wrong = True
+            if done[k]:
+                episodes += 1
+                if info['won'][k] != game.is_won() or info['lost'][k] != game.is_lost():
+                    wrong = True
+                game = games[k] = Simulation(data[k])
+            elif game.is_won() or game.is_lost():
+                wrong = True
+                game = games[k] = Simulation(data[k])
+            for mine, theirs in zip(batch_state(observation, k), simulation_state(game)):
+                if mine.shape != theirs.shape or (mine != theirs).any():
+                    wrong = True
+        if wrong:
+            mismatches += 1
+    return (mismatches, episodes)
+
+
+def speed(count, ticks, seed=0):
+    """
+    Returns the env-steps per second of a batch of count waves.
+
+    Parameter count: the number of waves in the batch
+    Precondition: count is an int > 0
+
+    Parameter ticks: the number of ticks to time
+    Precondition: ticks is an int > 0
+
+    Parameter seed: the seed for the wave and the keys
+    Precondition: seed is an int
+    """
+    batch = WaveBatch(check_wave(seed), count)
+    batch.reset()
+    rand = np.random.default_rng(seed)
+    actions = [random_actions(rand, count) for _ in range(ticks // CHECK_HOLD + 1)]
+    start = time.perf_counter()
+    for tick in range(ticks):
+        batch.step(actions[tick // CHECK_HOLD])
+    return count * ticks / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    """
+    Runs the checks from the command line and returns the exit status.
+
+    Parameter argv: the command line arguments (None for sys.argv)
+    Precondition: argv is a list of strings or None
+    """
+    parser = argparse.ArgumentParser(description='Check the Planetoids wave batch')
+    parser.add_argument('--waves', type=int, default=CHECK_WAVES,
+                        help='the number of waves to compare with Simulation')
+    parser.add_argument('--ticks', type=int, default=CHECK_TICKS,
+                        help='the number of ticks to compare')
+    parser.add_argument('--batch', type=int, nargs='+', default=[SPEED_BATCH],
+                        help='the numbers of waves in the batches to time')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed for the waves and the keys')
+    args = parser.parse_args(argv)
+
+    status = 0
+    mismatches, episodes = check(args.waves, args.ticks, args.seed)
+    print('check: %d mismatched ticks in %d (%d waves ended)'
+          % (mismatches, args.ticks, episodes))
+    if mismatches:
+        status = 1
+    for count in args.batch:
+        print('speed: %d waves, %.0f env-steps/second'
+              % (count, speed(count, SPEED_TICKS, args.seed)))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
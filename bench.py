@@ -0,0 +1,389 @@
+"""
+Frame-step benchmark for Planetoids
+
+This script measures how fast a wave can be simulated as the number of
+asteroids grows. For each wave size it generates a synthetic wave (in the same
+format as the wave JSON files read by Wave), plays it headlessly with a scripted
+fire pattern, and times each phase of a frame separately:
+
+    movement    starting the tick, turning, firing, and moving the ship, bullets
+                and asteroids
+    collision   Simulation.process_collisions
+    culling     Simulation.bullets_to_use
+    status      Simulation.check_game_status
+
+It reports steps/second and the p50/p99 frame time of every phase, and writes
+the results as JSON so that runs from different commits can be compared. Run it
+with
+
+    python bench.py --sizes 10 100 1000 10000 --output results.json
+    python bench.py --baseline results.json
+
+With --bounce the waves make the asteroids bounce off each other, which is
+charged to the movement phase.
+
+The second form fails (exit status 1) if any wave got slower than the baseline
+by more than the --tolerance. With --check, each wave is first played both with
+the timed phases and with Simulation.step, and the benchmark fails if their
+states ever differ.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from simulation import *
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+# The wave sizes to benchmark by default
+BENCH_SIZES = (10, 100, 1000, 10000)
+# The number of frames to time for each wave size
+BENCH_STEPS = 300
+# The number of untimed frames to play first
+BENCH_WARMUP = 30
+# The phases of a frame, in the order they are reported
+BENCH_PHASES = ('movement', 'collision', 'culling', 'status')
+# The allowed slowdown (as a fraction) before a run counts as a regression
+BENCH_TOLERANCE = 0.10
+
+
+def make_wave(count, seed=0, bounce=False):
+    """
+    Returns a synthetic wave with count asteroids, in the wave JSON format.
+
+    The ship starts in the middle of the screen facing up. The asteroids have
+    random sizes, positions (anywhere on screen) and directions.
+
+    Parameter count: the number of asteroids
+    Precondition: count is an int >= 0
+
+    Parameter seed: the seed for the random number generator
+    Precondition: seed is an int
+
+    Parameter bounce: whether the asteroids bounce off each other
+    Precondition: bounce is a bool
+    """
+    rand = random.Random(seed)
+    sizes = [SMALL_ASTEROID, MEDIUM_ASTEROID, LARGE_ASTEROID]
+    asteroids = []
+    for _ in range(count):
+        asteroids.append({
+            'size': rand.choice(sizes),
+            'position': [rand.uniform(0, GAME_WIDTH), rand.uniform(0, GAME_HEIGHT)],
+            'direction': [rand.uniform(-1, 1), rand.uniform(-1, 1)]})
+    data = {'ship': {'position': [GAME_WIDTH/2, GAME_HEIGHT/2], 'angle': 90},
+            'asteroids': asteroids}
+    if bounce:
+        data['bounce'] = True
+    return data
+
+
+def fire_pattern(frame):
+    """
+    Returns the set of keys held down in the given frame of the benchmark.
+
+    The ship always holds the spacebar (so it fires every BULLET_RATE frames),
+    and alternates between a second of turning left and a second of turning right
+    while thrusting.
+
+    Parameter frame: the frame number
+    Precondition: frame is an int >= 0
+    """
+    if (frame // 60) % 2 == 0:
+        return ('spacebar', 'left', 'up')
+    return ('spacebar', 'right', 'up')
+
+
+def percentile(values, fraction):
+    """
+    Returns the nearest-rank percentile of a list of numbers.
+
+    Parameter values: the numbers
+    Precondition: values is a non-empty list of numbers
+
+    Parameter fraction: the percentile as a fraction (0.5 is the median)
+    Precondition: fraction is a number in [0, 1]
+    """
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def keep_playing(wave, data, count):
+    """
+    Returns a tuple (wave, restarted) with a wave that still has something to do.
+
+    The ship is reset if it was destroyed, and the wave is started over (and
+    restarted is 1) if every asteroid is destroyed, so that every frame runs all
+    of the phases.
+
+    Parameter wave: the wave being played
+    Precondition: wave is a Simulation made from data
+
+    Parameter data: the wave data
+    Precondition: data is a CompiledWave
+
+    Parameter count: the number of asteroids in the wave data
+    Precondition: count is an int >= 0
+    """
+    if wave.is_lost():
+        wave.reset_ship()
+    elif count and wave.is_won():
+        return (Simulation(data), 1)
+    return (wave, 0)
+
+
+def timed_step(wave, input):
+    """
+    Advances the wave by one tick like Simulation.step, and returns the times.
+
+    The result is a tuple of time.perf_counter values: the start, then the end of
+    the bullet movement, the culling, the ship movement, the collisions, the
+    asteroid movement and the status check.
+
+    Parameter wave: the wave to advance
+    Precondition: wave is a Simulation with a ship
+
+    Parameter input: the keys held down
+    Precondition: input has a method is_key_down (e.g. ScriptedInput)
+    """
+    clock = time.perf_counter
+    # The same phases in the same order as Simulation.step
+    start = clock()
+    wave.begin_tick()
+    wave.handle_turning(input)
+    wave.handle_firing(input)
+    wave.move_bullets()
+    fired = clock()
+    wave.bullets_to_use()
+    culled = clock()
+    wave.move_ship()
+    moved = clock()
+    wave.process_collisions()
+    collided = clock()
+    wave.move_asteroids()
+    drifted = clock()
+    wave.check_game_status()
+    end = clock()
+    return (start, fired, culled, moved, collided, drifted, end)
+
+
+def check_size(count, steps=BENCH_STEPS, seed=0, bounce=False):
+    """
+    Returns the first frame where the benchmark and Simulation.step disagree.
+
+    The same wave is played twice with the same keys, once with timed_step and
+    once with Simulation.step, and their checksums are compared after every
+    frame. The result is None if they never differ.
+
+    Parameter count: the number of asteroids
+    Precondition: count is an int >= 0
+
+    Parameter steps: the number of frames to compare
+    Precondition: steps is an int > 0
+
+    Parameter seed: the seed for the synthetic wave
+    Precondition: seed is an int
+
+    Parameter bounce: whether the asteroids bounce off each other
+    Precondition: bounce is a bool
+    """
+    data = CompiledWave.from_dict(make_wave(count, seed, bounce))
+    timed = Simulation(data)
+    stepped = Simulation(data)
+    input = ScriptedInput()
+    for frame in range(steps):
+        timed, _ = keep_playing(timed, data, count)
+        stepped, _ = keep_playing(stepped, data, count)
+        input.set_keys(fire_pattern(frame))
+        timed_step(timed, input)
+        stepped.step(input)
+        if timed.checksum() != stepped.checksum():
+            return frame
+    return None
+
+
+def run_size(count, steps=BENCH_STEPS, warmup=BENCH_WARMUP, seed=0, bounce=False):
+    """
+    Returns a dict with the timings for a wave of count asteroids.
+
+    The ship is reset whenever it is destroyed (outside of the timed region),
+    and the wave is restarted if every asteroid is destroyed, so that every
+    timed frame runs all of the phases.
+
+    Parameter count: the number of asteroids
+    Precondition: count is an int >= 0
+
+    Parameter steps: the number of frames to time
+    Precondition: steps is an int > 0
+
+    Parameter warmup: the number of untimed frames to play first
+    Precondition: warmup is an int >= 0
+
+    Parameter seed: the seed for the synthetic wave
+    Precondition: seed is an int
+
+    Parameter bounce: whether the asteroids bounce off each other
+    Precondition: bounce is a bool
+    """
+    data = CompiledWave.from_dict(make_wave(count, seed, bounce))
+    wave = Simulation(data)
+    input = ScriptedInput()
+    times = {phase: [] for phase in BENCH_PHASES}
+    frames = []
+    restarts = 0
+    for frame in range(warmup + steps):
+        wave, restarted = keep_playing(wave, data, count)
+        restarts += restarted
+        input.set_keys(fire_pattern(frame))
+        start, fired, culled, moved, collided, drifted, end = timed_step(wave, input)
+        if frame >= warmup:
+            times['movement'].append((fired - start) + (moved - culled) +
+                                     (drifted - collided))
+            times['culling'].append(culled - fired)
+            times['collision'].append(collided - moved)
+            times['status'].append(end - drifted)
+            frames.append(end - start)
+
+    total = sum(frames)
+    result = {'asteroids': count, 'bounce': bounce, 'steps': steps,
+              'restarts': restarts,
+              'steps_per_second': steps / total if total else float('inf'),
+              'frame_p50_ms': percentile(frames, 0.5) * 1000,
+              'frame_p99_ms': percentile(frames, 0.99) * 1000,
+              'phases': {}}
+    for phase in BENCH_PHASES:
+        result['phases'][phase] = {
+            'p50_ms': percentile(times[phase], 0.5) * 1000,
+            'p99_ms': percentile(times[phase], 0.99) * 1000,
+            'total_ms': sum(times[phase]) * 1000}
+    return result
+
+
+def git_revision():
+    """Returns the current git commit of this folder, or None if unknown."""
+    try:
+        folder = os.path.dirname(os.path.abspath(__file__))
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=folder,
+                                capture_output=True, text=True, timeout=10)
+        return output.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(results, baseline, tolerance=BENCH_TOLERANCE):
+    """
+    Returns a list of messages describing regressions against a baseline.
+
+    A wave size regresses if its steps/second dropped by more than tolerance.
+    Sizes missing from either run are ignored, and runs with bouncing asteroids
+    are only compared with runs with bouncing asteroids.
+
+    Parameter results: the current results
+    Precondition: results is a dict written by this script
+
+    Parameter baseline: the results to compare against
+    Precondition: baseline is a dict written by this script
+
+    Parameter tolerance: the allowed slowdown as a fraction
+    Precondition: tolerance is a number >= 0
+    """
+    old = {(run['asteroids'], run.get('bounce', False)): run
+           for run in baseline['runs']}
+    messages = []
+    for run in results['runs']:
+        before = old.get((run['asteroids'], run.get('bounce', False)))
+        if before is None:
+            continue
+        ratio = run['steps_per_second'] / before['steps_per_second']
+        if ratio < 1 - tolerance:
+            messages.append('%d asteroids: %.1f steps/s (was %.1f, %.0f%% slower)'
+                            % (run['asteroids'], run['steps_per_second'],
+                               before['steps_per_second'], (1 - ratio) * 100))
+    return messages
+
+
+def report(run):
+    """
+    Prints a one-line summary of a run and a line per phase.
+
+    Parameter run: the timings for a single wave size
+    Precondition: run is a dict returned by run_size
+    """
+    print('%6d asteroids: %9.1f steps/s   frame p50 %7.3f ms   p99 %7.3f ms'
+          % (run['asteroids'], run['steps_per_second'], run['frame_p50_ms'],
+             run['frame_p99_ms']))
+    for phase in BENCH_PHASES:
+        stats = run['phases'][phase]
+        print('        %-10s p50 %7.3f ms   p99 %7.3f ms'
+              % (phase, stats['p50_ms'], stats['p99_ms']))
+
+
+def main(argv=None):
+    """
+    Runs the benchmark from the command line and returns the exit status.
+
+    Parameter argv: the command line arguments (None for sys.argv)
+    Precondition: argv is a list of strings or None
+    """
+    parser = argparse.ArgumentParser(description='Benchmark Planetoids frame steps')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(BENCH_SIZES),
+                        help='the numbers of asteroids to benchmark')
+    parser.add_argument('--steps', type=int, default=BENCH_STEPS,
+                        help='the number of frames to time per size')
+    parser.add_argument('--warmup', type=int, default=BENCH_WARMUP,
+                        help='the number of untimed frames per size')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed for the synthetic waves')
+    parser.add_argument('--output', help='the JSON file to write the results to')
+    parser.add_argument('--baseline', help='a results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=BENCH_TOLERANCE,
+                        help='the allowed slowdown against the baseline')
+    parser.add_argument('--bounce', action='store_true',
+                        help='make the asteroids bounce off each other')
+    parser.add_argument('--check', action='store_true',
+                        help='first check that the timed frames match Simulation.step')
+    parser.add_argument('--write-waves', metavar='FOLDER',
+                        help='also save the synthetic waves as JSON files here')
+    args = parser.parse_args(argv)
+
+    results = {'revision': git_revision(), 'python': platform.python_version(),
+               'machine': platform.machine(), 'time': time.time(),
+               'steps': args.steps, 'seed': args.seed, 'runs': []}
+    for count in args.sizes:
+        if args.write_waves:
+            os.makedirs(args.write_waves, exist_ok=True)
+            path = os.path.join(args.write_waves, 'bench%d.json' % count)
+            with open(path, 'w') as file:
+                json.dump(make_wave(count, args.seed, args.bounce), file)
+        if args.check:
+            frame = check_size(count, args.warmup + args.steps, args.seed, args.bounce)
+            if frame is not None:
+                print('MISMATCH %d asteroids: the benchmark left Simulation.step '
+                      'at frame %d' % (count, frame))
+                return 1
+        run = run_size(count, args.steps, args.warmup, args.seed, args.bounce)
+        report(run)
+        results['runs'].append(run)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            messages = compare(results, json.load(file), args.tolerance)
+        for message in messages:
+            print('REGRESSION ' + message)
+        if messages:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
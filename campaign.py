@@ -0,0 +1,93 @@
+"""
+Campaigns for Planetoids
+
+This module contains the campaign, a sequence of waves played one after the
+other. A campaign is either a folder of wave files, played in the order of
+their names, or a manifest: a text file with the name of one wave file on each
+line (relative to the manifest). Blank lines and lines starting with # are
+skipped.
+
+The campaign is read as a stream. Only the name of the next wave is ever read
+ahead, so a campaign can be as long as you like; each wave is then loaded
+(by the WaveLoader) only when it is about to be played.
+
+This module does not access any other module of the game except consts.py.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+import os
+
+# The file extensions of the wave files in a campaign folder
+CAMPAIGN_EXTENSIONS = ('.json', '.wave')
+
+
+class Campaign(object):
+    """
+    A class that hands out the wave files of a campaign in order.
+    """
+    # Attribute _names: the wave files not handed out yet
+    # Invariant: _names is an iterator of strings
+    #
+    # Attribute _count: the number of waves handed out so far
+    # Invariant: _count is an int >= 0
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_count(self):
+        """Returns the number of waves handed out so far."""
+        return self._count
+
+    # INITIALIZER
+    def __init__(self, path):
+        """
+        Initializes a campaign from a folder of waves or a manifest.
+
+        Parameter path: the campaign folder or manifest file
+        Precondition: path is a string naming a folder or a text file
+        """
+        if os.path.isdir(path):
+            self._names = _read_folder(path)
+        else:
+            self._names = _read_manifest(path)
+        self._count = 0
+
+    # ADDITIONAL METHODS
+    def next_wave(self):
+        """
+        Returns the file name of the next wave, or None if the campaign is over.
+        """
+        name = next(self._names, None)
+        if name is not None:
+            self._count += 1
+        return name
+
+
+# HELPER FUNCTIONS
+def _read_folder(folder):
+    """
+    Yields the wave files in a folder, in the order of their names.
+
+    Parameter folder: the campaign folder
+    Precondition: folder is a string naming a folder
+    """
+    names = sorted(entry.name for entry in os.scandir(folder)
+                   if entry.is_file() and
+                   os.path.splitext(entry.name)[1].lower() in CAMPAIGN_EXTENSIONS)
+    for name in names:
+        yield os.path.join(folder, name)
+
+
+def _read_manifest(path):
+    """
+    Yields the wave files listed in a manifest, one line at a time.
+
+    Parameter path: the manifest file
+    Precondition: path is a string naming a text file
+    """
+    folder = os.path.dirname(path)
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield os.path.join(folder, line)
@@ -0,0 +1,177 @@
+"""
+Property check for the collision kernel in Planetoids
+
+Simulation._collides used to take the square root of the distance between two
+centers. The kernel in collisions.py (collides, touches and the batched hits)
+only compares squared distances, and rejects far pairs on either axis first.
+This script checks, on random inputs, that the kernel is a drop-in replacement:
+
+    reference   collides agrees with the square root test, both for random
+                float centers and for integer centers (which often land
+                exactly on the boundary)
+    symmetric   swapping the two circles never changes the answer
+    kinds       touches agrees with collides on the radii of the two kinds
+    batched     hits returns exactly the touching pairs, in order, for random
+                groups (including empty ones) of mixed kinds
+
+Run it with
+
+    python collidecheck.py --samples 100000
+
+It exits with status 1 if any check fails.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from collisions import *
+import argparse
+import math
+import random
+import sys
+
+# The number of random cases of each check by default
+CHECK_SAMPLES = 10000
+# The largest group size in the batched check
+CHECK_GROUP = 40
+# The collision kinds
+CHECK_KINDS = (SMALL_CODE, MEDIUM_CODE, LARGE_CODE, BULLET_KIND, SHIP_KIND)
+
+
+def reference(x1, y1, r1, x2, y2, r2):
+    """
+    Returns True if distance is less than sum of radius from their centers.
+
+    This is how Simulation._collides computed it before the kernel.
+
+    Parameter x1, y1, r1: the center and radius of the first circle
+    Precondition: all are numbers, with r1 >= 0
+
+    Parameter x2, y2, r2: the center and radius of the second circle
+    Precondition: all are numbers, with r2 >= 0
+    """
+    distance = math.sqrt((x1 - x2)**2 + (y1 - y2)**2)
+    return distance < r1 + r2
+
+
+def random_pair(rand, integer):
+    """
+    Returns a random tuple (x1, y1, kind1, x2, y2, kind2).
+
+    The second center is within a couple of radius sums of the first, so that
+    about half of the pairs touch.
+
+    Parameter rand: the random number generator to use
+    Precondition: rand is a random.Random
+
+    Parameter integer: whether the centers are whole numbers
+    Precondition: integer is a bool
+    """
+    kind1 = rand.choice(CHECK_KINDS)
+    kind2 = rand.choice(CHECK_KINDS)
+    reach = 2 * CONTACT[kind1][kind2]
+    if integer:
+        x1 = rand.randint(0, GAME_WIDTH)
+        y1 = rand.randint(0, GAME_HEIGHT)
+        x2 = x1 + rand.randint(-reach, reach)
+        y2 = y1 + rand.randint(-reach, reach)
+    else:
+        x1 = rand.uniform(-DEAD_ZONE, GAME_WIDTH + DEAD_ZONE)
+        y1 = rand.uniform(-DEAD_ZONE, GAME_HEIGHT + DEAD_ZONE)
+        x2 = x1 + rand.uniform(-reach, reach)
+        y2 = y1 + rand.uniform(-reach, reach)
+    return (x1, y1, kind1, x2, y2, kind2)
+
+
+def check_pairs(samples, seed=0):
+    """
+    Returns the number of random pairs where the kernel disagrees.
+
+    Each pair counts once, however many of the reference, symmetric and kinds
+    properties it breaks.
+
+    Parameter samples: the number of random pairs
+    Precondition: samples is an int > 0
+
+    Parameter seed: the seed for the random pairs
+    Precondition: seed is an int
+    """
+    rand = random.Random(seed)
+    errors = 0
+    for k in range(samples):
+        x1, y1, kind1, x2, y2, kind2 = random_pair(rand, k % 2 == 0)
+        r1 = KIND_RADII[kind1]
+        r2 = KIND_RADII[kind2]
+        expected = reference(x1, y1, r1, x2, y2, r2)
+        results = (collides(x1, y1, r1, x2, y2, r2),
+                   collides(x2, y2, r2, x1, y1, r1),
+                   touches(x1, y1, kind1, x2, y2, kind2),
+                   touches(x2, y2, kind2, x1, y1, kind1))
+        if any(result != expected for result in results):
+            errors += 1
+    return errors
+
+
+def check_batches(samples, seed=0):
+    """
+    Returns the number of random group pairs where hits disagrees with touches.
+
+    Parameter samples: the number of random group pairs
+    Precondition: samples is an int > 0
+
+    Parameter seed: the seed for the random groups
+    Precondition: seed is an int
+    """
+    rand = random.Random(seed)
+    errors = 0
+    for _ in range(samples):
+        groups = []
+        for _ in range(2):
+            count = rand.randint(0, CHECK_GROUP)
+            groups.append(([rand.uniform(0, 4 * LARGE_RADIUS) for _ in range(count)],
+                           [rand.uniform(0, 4 * LARGE_RADIUS) for _ in range(count)],
+                           [rand.choice(CHECK_KINDS) for _ in range(count)]))
+        (x1, y1, k1), (x2, y2, k2) = groups
+        expected = [(i, j) for i in range(len(x1)) for j in range(len(x2))
+                    if touches(x1[i], y1[i], k1[i], x2[j], y2[j], k2[j])]
+        i, j = hits(x1, y1, k1, x2, y2, k2)
+        if list(zip(i.tolist(), j.tolist())) != expected:
+            errors += 1
+        # A single kind for a whole group must work the same as an array of it
+        i, j = hits(x1, y1, BULLET_KIND, x2, y2, k2)
+        expected = [(i, j) for i in range(len(x1)) for j in range(len(x2))
+                    if touches(x1[i], y1[i], BULLET_KIND, x2[j], y2[j], k2[j])]
+        if list(zip(i.tolist(), j.tolist())) != expected:
+            errors += 1
+    return errors
+
+
+def main(argv=None):
+    """
+    Runs the checks from the command line and returns the exit status.
+
+    Parameter argv: the command line arguments (None for sys.argv)
+    Precondition: argv is a list of strings or None
+    """
+    parser = argparse.ArgumentParser(description='Check the Planetoids collision kernel')
+    parser.add_argument('--samples', type=int, default=CHECK_SAMPLES,
+                        help='the number of random cases of each check')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed for the random cases')
+    args = parser.parse_args(argv)
+
+    status = 0
+    errors = check_pairs(args.samples, args.seed)
+    print('pairs:   %d mismatches in %d' % (errors, args.samples))
+    if errors:
+        status = 1
+    batches = max(1, args.samples // 100)
+    errors = check_batches(batches, args.seed)
+    print('batches: %d mismatches in %d' % (errors, batches))
+    if errors:
+        status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
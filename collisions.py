@@ -0,0 +1,461 @@
+"""
+Collision helpers for Planetoids
+
+This module contains the broadphase used by Wave to find the pairs of objects
+that could possibly be touching. Testing every asteroid against every bullet is
+quadratic, so instead we bucket objects into a uniform grid and only run the
+exact (narrowphase) test on objects in neighboring cells.
+
+Fast objects can pass through a small target between two ticks, so the exact
+test for bullets is swept: time_of_impact finds the first moment in the tick at
+which two moving circles touch, rather than only looking where they end up.
+
+The exact test itself never takes a square root. It rejects pairs that are too
+far apart along either axis first, and otherwise compares the squared distance
+with the squared sum of the radii. The sums for every pair of object kinds (the
+three asteroid sizes, a bullet and the ship) are computed once, here.
+
+Waves can also make the asteroids bounce off each other. Every asteroid can
+touch every other one, so those pairs are found with SweepAndPrune instead: the
+asteroids are kept sorted by their left edge, and only the ones whose extents
+overlap along x are tested. They barely move in a tick, so the order from the
+last tick is almost right and sorting it again is close to linear.
+
+Like models.py, this module is only allowed to access consts.py.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+import math
+import numpy as np
+
+# The collision kinds of a bullet and of the ship (asteroids use their size code)
+BULLET_KIND = 3
+SHIP_KIND   = 4
+# The radius of each collision kind, indexed by kind
+KIND_RADII = ASTEROID_RADII + (BULLET_RADIUS, SHIP_RADIUS)
+# The sum of the radii, and its square, for every pair of kinds
+CONTACT = tuple(tuple(r1 + r2 for r2 in KIND_RADII) for r1 in KIND_RADII)
+CONTACT_SQUARED = tuple(tuple(r * r for r in row) for row in CONTACT)
+# The same tables as arrays, for the batched test
+CONTACT_ARRAY = np.array(CONTACT, dtype=float)
+CONTACT_SQUARED_ARRAY = CONTACT_ARRAY * CONTACT_ARRAY
+
+
+def collides(x1, y1, r1, x2, y2, r2):
+    """
+    Returns True if the circles are closer than the sum of their radii.
+
+    This is the same test as comparing the distance between the centers with
+    r1 + r2, but it rejects on either axis first and never takes a square root.
+
+    Parameter x1, y1: the center of the first circle
+    Precondition: x1 and y1 are numbers (int or float)
+
+    Parameter r1: the radius of the first circle
+    Precondition: r1 is a number >= 0
+
+    Parameter x2, y2: the center of the second circle
+    Precondition: x2 and y2 are numbers (int or float)
+
+    Parameter r2: the radius of the second circle
+    Precondition: r2 is a number >= 0
+    """
+    reach = r1 + r2
+    dx = x1 - x2
+    if dx >= reach or dx <= -reach:
+        return False
+    dy = y1 - y2
+    if dy >= reach or dy <= -reach:
+        return False
+    return dx * dx + dy * dy < reach * reach
+
+
+def touches(x1, y1, kind1, x2, y2, kind2):
+    """
+    Returns True if two objects of the given collision kinds are touching.
+
+    This is collides with the radius sum looked up in CONTACT and CONTACT_SQUARED.
+
+    Parameter x1, y1: the center of the first object
+    Precondition: x1 and y1 are numbers (int or float)
+
+    Parameter kind1: the collision kind of the first object
+    Precondition: kind1 is a size code, BULLET_KIND or SHIP_KIND
+
+    Parameter x2, y2: the center of the second object
+    Precondition: x2 and y2 are numbers (int or float)
+
+    Parameter kind2: the collision kind of the second object
+    Precondition: kind2 is a size code, BULLET_KIND or SHIP_KIND
+    """
+    reach = CONTACT[kind1][kind2]
+    dx = x1 - x2
+    if dx >= reach or dx <= -reach:
+        return False
+    dy = y1 - y2
+    if dy >= reach or dy <= -reach:
+        return False
+    return dx * dx + dy * dy < CONTACT_SQUARED[kind1][kind2]
+
+
+def hits(x1, y1, kind1, x2, y2, kind2):
+    """
+    Returns a tuple (i, j) of index arrays with every touching pair of two groups.
+
+    Object i[k] of the first group touches object j[k] of the second, and no
+    other pairs touch. The pairs are sorted by i, then by j. Every pair is
+    tested, so use this on groups that the broadphase has already narrowed down.
+
+    Parameter x1, y1: the centers of the first group
+    Precondition: x1 and y1 are 1-d arrays (or lists) of the same length
+
+    Parameter kind1: the collision kinds of the first group
+    Precondition: kind1 is a kind, or an int array of kinds as long as x1
+
+    Parameter x2, y2: the centers of the second group
+    Precondition: x2 and y2 are 1-d arrays (or lists) of the same length
+
+    Parameter kind2: the collision kinds of the second group
+    Precondition: kind2 is a kind, or an int array of kinds as long as x2
+    """
+    x1 = np.asarray(x1, dtype=float)
+    y1 = np.asarray(y1, dtype=float)
+    x2 = np.asarray(x2, dtype=float)
+    y2 = np.asarray(y2, dtype=float)
+    k1 = np.broadcast_to(np.asarray(kind1, dtype=np.intp), x1.shape)
+    k2 = np.broadcast_to(np.asarray(kind2, dtype=np.intp), x2.shape)
+    dx = x1[:, None] - x2[None, :]
+    reach = CONTACT_ARRAY[k1[:, None], k2[None, :]]
+    i, j = np.nonzero(np.abs(dx) < reach)
+    dx = dx[i, j]
+    dy = y1[i] - y2[j]
+    near = np.abs(dy) < reach[i, j]
+    i, j, dx, dy = i[near], j[near], dx[near], dy[near]
+    inside = dx * dx + dy * dy < CONTACT_SQUARED_ARRAY[k1[i], k2[j]]
+    return (i[inside], j[inside])
+
+
+def time_of_impact(x, y, dx, dy, radius):
+    """
+    Returns the first time in [0, 1) at which two moving circles touch, or None.
+
+    Both circles move in a straight line over the tick. The test is done in the
+    frame of the second circle: (x, y) is the center of the first circle minus
+    the center of the second at the start of the tick, and (dx, dy) is how far
+    the first moved minus how far the second moved. The circles touch when that
+    point comes within radius (the sum of their radii) of the origin.
+
+    Circles that already overlap at the start return 0. Like the plain distance
+    test, circles that only graze (distance exactly equal to radius) do not touch.
+
+    Parameter x, y: the offset between the centers at the start of the tick
+    Precondition: x and y are numbers (int or float)
+
+    Parameter dx, dy: the relative motion over the tick
+    Precondition: dx and dy are numbers (int or float)
+
+    Parameter radius: the sum of the radii of the two circles
+    Precondition: radius is a number >= 0
+    """
+    c = x * x + y * y - radius * radius
+    if c < 0:
+        return 0.0
+    b = x * dx + y * dy
+    if b >= 0:
+        return None
+    a = dx * dx + dy * dy
+    disc = b * b - a * c
+    if disc <= 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    return t if t < 1 else None
+
+
+class SpatialHash(object):
+    """
+    A uniform grid that buckets objects by the cell containing their center.
+
+    The grid is stored sparsely as a dictionary, so only occupied cells cost
+    anything. Cells are measured from the outer edge of the DEAD_ZONE, but the
+    grid is unbounded: objects that have drifted past the wrap edge (and have not
+    been wrapped yet) simply land in a negative or extra cell. This matches the
+    narrowphase test in Wave, which compares raw positions and never wraps.
+
+    Two objects can only touch if their centers are closer than the sum of their
+    radii. As long as the cell size is at least that large, any touching pair is
+    in the same cell or in one of the eight cells around it.
+    """
+    # Attribute _size: the width and height of a single cell
+    # Invariant: _size is a number > 0
+    #
+    # Attribute _cells: the objects in each occupied cell
+    # Invariant: _cells is a dict mapping (column, row) tuples to non-empty lists
+
+    def __init__(self, size=CELL_SIZE):
+        """
+        Initializes an empty grid with the given cell size.
+
+        Parameter size: the width and height of a cell
+        Precondition: size is a number >= the largest radius sum of two objects
+        """
+        self._size = size
+        self._cells = {}
+
+    def clear(self):
+        """Removes every object from the grid."""
+        self._cells.clear()
+
+    def insert(self, item, x, y):
+        """
+        Adds item to the cell containing the point (x, y).
+
+        Parameter item: the object to store
+        Precondition: item is any value (typically a model or an index)
+
+        Parameter x: the x-coordinate of the item's center
+        Precondition: x is a number (int or float)
+
+        Parameter y: the y-coordinate of the item's center
+        Precondition: y is a number (int or float)
+        """
+        key = self._cell(x, y)
+        bucket = self._cells.get(key)
+        if bucket is None:
+            self._cells[key] = [item]
+        else:
+            bucket.append(item)
+
+    def nearby(self, x, y):
+        """
+        Returns a list of the items in the cell containing (x, y) and its neighbors.
+
+        Every item that could touch an object centered at (x, y) is in this list,
+        but not every item in the list touches it. Use an exact test to check.
+
+        Parameter x: the x-coordinate of the query point
+        Precondition: x is a number (int or float)
+
+        Parameter y: the y-coordinate of the query point
+        Precondition: y is a number (int or float)
+        """
+        col, row = self._cell(x, y)
+        cells = self._cells
+        result = []
+        for c in (col - 1, col, col + 1):
+            for r in (row - 1, row, row + 1):
+                bucket = cells.get((c, r))
+                if bucket:
+                    result.extend(bucket)
+        return result
+
+    def along(self, x0, y0, x1, y1):
+        """
+        Returns a list of the items near any point of the segment (x0, y0)-(x1, y1).
+
+        This is nearby for an object that moves over the tick: it covers every
+        cell the segment's bounding box touches, and a ring of cells around it.
+        A segment that stays in one cell gives exactly the items of nearby.
+
+        Parameter x0, y0: the start of the segment
+        Precondition: x0 and y0 are numbers (int or float)
+
+        Parameter x1, y1: the end of the segment
+        Precondition: x1 and y1 are numbers (int or float)
+        """
+        col0, row0 = self._cell(min(x0, x1), min(y0, y1))
+        col1, row1 = self._cell(max(x0, x1), max(y0, y1))
+        cells = self._cells
+        result = []
+        for c in range(col0 - 1, col1 + 2):
+            for r in range(row0 - 1, row1 + 2):
+                bucket = cells.get((c, r))
+                if bucket:
+                    result.extend(bucket)
+        return result
+
+    def _cell(self, x, y):
+        """
+        Returns the (column, row) of the cell containing (x, y).
+
+        Parameter x: the x-coordinate of the point
+        Precondition: x is a number (int or float)
+
+        Parameter y: the y-coordinate of the point
+        Precondition: y is a number (int or float)
+        """
+        return (int((x + DEAD_ZONE) // self._size),
+                int((y + DEAD_ZONE) // self._size))
+
+
+class SweepAndPrune(object):
+    """
+    A sort-and-sweep broadphase along x that finds every touching pair of circles.
+
+    The wrapping area is cut into horizontal bands at least as tall as the
+    largest radius sum, and the rows are kept sorted by band, then by left edge
+    (x - radius), from one call of pairs to the next. A row can then only touch
+    the rows of its own band and the next one that start before its right edge.
+    Sorting an almost sorted order again with a stable sort (a timsort) is close
+    to linear, so the cost follows the number of rows and touching pairs rather
+    than all pairs. Rows that are removed must be reported with remove, so that
+    the order still names the right rows; rows added at the end are merged in by
+    the next call.
+
+    The circles live on the wrapping area of the game, so two circles can also
+    touch across the left/right seam or the top/bottom seam. The bands wrap from
+    the last one to the first, and the rows near the left edge are swept a second
+    time as ghosts, one wrapping width to the right. Distances are always
+    measured the short way around.
+    """
+    # Attribute _order: the rows sorted by band and left edge at the last call
+    # Invariant: _order is an int array, a permutation of range(len(_order))
+    #
+    # Attribute _reach: the largest radius sum of two rows
+    # Invariant: _reach is a number > 0
+    #
+    # Attribute _bands: the number of bands
+    # Invariant: _bands is 1 or an int >= 3 (so no band is two bands away)
+    #
+    # Attribute _height: the height of a band
+    # Invariant: _height is a float >= _reach (unless _bands is 1)
+
+    def __init__(self, reach=CELL_SIZE):
+        """
+        Initializes a broadphase with no rows.
+
+        Parameter reach: the largest radius sum of two rows
+        Precondition: reach is a number > 0
+        """
+        self._order = np.zeros(0, dtype=np.intp)
+        self._reach = reach
+        self._bands = int(WRAP_HEIGHT // reach)
+        if self._bands < 3:
+            self._bands = 1
+        self._height = WRAP_HEIGHT / self._bands
+
+    def clear(self):
+        """Forgets the order of the rows (the next call sorts from scratch)."""
+        self._order = np.zeros(0, dtype=np.intp)
+
+    def remove(self, indices, count):
+        """
+        Drops the given rows from the order, and renumbers the rest.
+
+        The rows after a removed row move up, as in Bodies.remove. Rows added
+        since the last call of pairs (up to count) are put at the end of the
+        order first, as pairs does.
+
+        Parameter indices: the rows removed
+        Precondition: indices is a collection of row indices less than count
+
+        Parameter count: the number of rows the indices refer to
+        Precondition: count is an int >= 0
+        """
+        order = self._order
+        if len(order) > count:
+            self.clear()
+            return
+        if len(order) < count:
+            order = np.concatenate([order, np.arange(len(order), count)])
+        mask = np.ones(count, dtype=bool)
+        mask[list(indices)] = False
+        renumber = np.cumsum(mask) - 1
+        order = order[mask[order]]
+        self._order = renumber[order]
+
+    def pairs(self, x, y, radius):
+        """
+        Returns a tuple (i, j) of index arrays with every touching pair of rows.
+
+        Each pair appears once, with i[k] < j[k], and the pairs are sorted by i,
+        then by j, so the result does not depend on the order kept inside.
+
+        Parameter x, y: the centers of the rows
+        Precondition: x and y are float arrays of the same length n, with every
+        center inside the wrapping area
+
+        Parameter radius: the radius of each row
+        Precondition: radius is a float array of length n, all > 0 and at most
+        half the reach
+        """
+        n = len(x)
+        order = self._order
+        if len(order) > n:
+            order = np.arange(n)
+        elif len(order) < n:
+            order = np.concatenate([order, np.arange(len(order), n)])
+
+        # Sort keys: band times a span wider than any left edge, plus left edge
+        span = 4 * WRAP_WIDTH
+        band = np.minimum(((y + DEAD_ZONE) // self._height).astype(np.intp),
+                          self._bands - 1)
+        base = band * span + WRAP_WIDTH
+        key = base + (x - radius)
+
+        # Rows near the left edge are swept again one width to the right
+        ghosts = np.nonzero(x < -DEAD_ZONE + self._reach)[0]
+        rows = np.concatenate([order, ghosts])
+        keys = np.concatenate([key[order], key[ghosts] + WRAP_WIDTH])
+        sort = np.argsort(keys, kind='stable')
+        rows = rows[sort]
+        keys = keys[sort]
+        ghost = sort >= n
+        self._order = rows[~ghost]
+
+        # Every entry meets the entries of its band that start before its
+        # right edge, and those of the next band that start less than a reach
+        # before its left edge
+        right = keys + 2 * radius[rows]
+        first = np.arange(len(rows))
+        starts = [first + 1]
+        ends = [np.searchsorted(keys, right, side='left')]
+        if self._bands > 1:
+            shift = (np.where(band[rows] == self._bands - 1, 1 - self._bands, 1)
+                     * span)
+            starts.append(np.searchsorted(keys, keys + shift - self._reach,
+                                          side='right'))
+            ends.append(np.searchsorted(keys, right + shift, side='left'))
+        i = []
+        j = []
+        for start, end in zip(starts, ends):
+            a, b = _expand(start, end)
+            keep = ~(ghost[a] & ghost[b])
+            i.append(rows[a[keep]])
+            j.append(rows[b[keep]])
+        i = np.concatenate(i)
+        j = np.concatenate(j)
+
+        dx = x[i] - x[j]
+        dy = y[i] - y[j]
+        dx -= WRAP_WIDTH * np.round(dx / WRAP_WIDTH)
+        dy -= WRAP_HEIGHT * np.round(dy / WRAP_HEIGHT)
+        contact = radius[i] + radius[j]
+        touching = (dx * dx + dy * dy < contact * contact) & (i != j)
+        i = i[touching]
+        j = j[touching]
+        low = np.minimum(i, j)
+        high = np.maximum(i, j)
+        sort = np.lexsort((high, low))
+        return (low[sort], high[sort])
+
+
+def _expand(starts, ends):
+    """
+    Returns a tuple (a, b) of index arrays with b running over each range.
+
+    For every k, the pairs (k, starts[k]), ..., (k, ends[k] - 1) are included,
+    in order. Empty ranges add nothing.
+
+    Parameter starts: the start of each range
+    Precondition: starts is an int array
+
+    Parameter ends: the end (exclusive) of each range
+    Precondition: ends is an int array as long as starts
+    """
+    counts = np.maximum(ends - starts, 0)
+    total = int(counts.sum())
+    a = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return (a, np.repeat(starts, counts) + offsets)
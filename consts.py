@@ -9,7 +9,6 @@ all modules to access them.
 John Anim, ja857; Brendan Shek, bs863
 12/09/24
 """
-import introcs
 import sys
 
 ### WINDOW CONSTANTS (all coordinates are in pixels) ###
@@ -20,6 +19,9 @@ GAME_WIDTH  = 800
 GAME_HEIGHT = 700
 # The offscreen dead zone for "wrapping"
 DEAD_ZONE = 64
+# The width and height of the wrapping area (the screen plus both dead zones)
+WRAP_WIDTH  = GAME_WIDTH + 2 * DEAD_ZONE
+WRAP_HEIGHT = GAME_HEIGHT + 2 * DEAD_ZONE
 
 ### SHIP CONSTANTS ###
 
@@ -73,6 +75,16 @@ SMALL_RADIUS = 16
 # The speed of a small planetoid
 SMALL_SPEED  = 3
 
+# The size code of each planetoid size (used by the array backend in physics.py)
+SMALL_CODE  = 0
+MEDIUM_CODE = 1
+LARGE_CODE  = 2
+
+# The size names, radii, and speeds of the planetoids, indexed by size code
+ASTEROID_SIZES  = (SMALL_ASTEROID, MEDIUM_ASTEROID, LARGE_ASTEROID)
+ASTEROID_RADII  = (SMALL_RADIUS, MEDIUM_RADIUS, LARGE_RADIUS)
+ASTEROID_SPEEDS = (SMALL_SPEED, MEDIUM_SPEED, LARGE_SPEED)
+
 ### BULLET CONSTANTS ###
 
 # The radius of a bullet (width/2 and height/2)
@@ -80,11 +92,16 @@ SMALL_SPEED  = 3
 BULLET_RADIUS = 6
 # The speed of a bolt
 BULLET_SPEED  = 10
-# The number frames that must pass until the player can fire again
+# The number ticks that must pass until the player can fire again
 BULLET_RATE   = 30
 # The color of a bullet
 BULLET_COLOR   = 'red'
 
+### COLLISION CONSTANTS ###
+
+# The width and height of a broadphase grid cell (no colliding pair is farther apart)
+CELL_SIZE = 2 * LARGE_RADIUS
+
 ### GAME CONSTANTS ###
 
 # state before the game has started
@@ -116,10 +133,42 @@ MESSAGE_SIZE = 60
 # The y-offset for the message (the value to add to the center y value)
 MESSAGE_OFFSET = -70
 
+### RENDERING CONSTANTS ###
+
+# Whether to draw asteroids and bullets in batches (one mesh per image) instead
+# of one GObject each
+BATCH_SPRITES = True
+
+### SIMULATION CONSTANTS ###
+
+# The number of simulation ticks per second (all speeds are in pixels per tick)
+TICK_RATE = 60
+# The most ticks to simulate in one frame (the rest of a slow frame is dropped)
+MAX_TICKS = 5
+
+### PROFILER CONSTANTS ###
+
+# The number of frames kept by the frame profiler
+PROFILE_FRAMES = 600
+# The number of frames between refreshes of the profiler overlay
+PROFILE_REFRESH = 30
+# The font size for the profiler overlay
+PROFILE_SIZE = 14
+# Whether the frame profiler is on (set with the --profile flag)
+PROFILE = False
+# The file the profile is written to when the player presses 'd'
+PROFILE_FILE = 'profile.jsonl'
+
 ### JSON FILES ###
 
 # The default wave
 DEFAULT_WAVE  = 'wave1.json'
+# The campaign folder or manifest (set with the --campaign flag), or None
+CAMPAIGN = None
+# The file each wave's replay is written to (set with --record), or None
+RECORD_FILE = None
+# The file the game is saved to (and loaded from) while paused
+SAVE_FILE = 'planetoids.save'
 
 ### USE COMMAND LINE ARGUMENTS TO CHANGE DEFAULT LEVEL FILE
 """
@@ -131,9 +180,20 @@ arguments are everything after the word python. So if you start the game typing
 Python puts ['planetoids', 'default.json'] into sys.argv. Below, we take
 advantage of this fact to change the constant DEFAULT_LEVEL. This is the level
 file to be used when you start the game.
+
+Arguments that start with -- are flags for optional features and are never
+taken as the level file. The flag --profile turns on the frame profiler, and
+--profile=FILE also changes the file the profile is written to. The flag
+--campaign=PATH plays the waves of a campaign (a folder or a manifest) instead of
+the single level file. The flag --record=FILE writes a replay of the wave to
+FILE when it ends (play it back with replay.py). The flag --importtime times
+every import and prints the times when the title is on screen and when the game
+is loaded (it is read by startup.py, in __main__.py).
 """
+FLAGS = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+ARGUMENTS = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
 try:
-    file = sys.argv[1]
+    file = ARGUMENTS[0]
     if file[-5:].lower() == '.json':
         DEFAULT_WAVE = file
     else:
@@ -141,4 +201,15 @@ try:
 except:
     pass # Use original value
 
+for flag in FLAGS:
+    if flag == '--profile':
+        PROFILE = True
+    elif flag.startswith('--profile='):
+        PROFILE = True
+        PROFILE_FILE = flag[len('--profile='):]
+    elif flag.startswith('--campaign='):
+        CAMPAIGN = flag[len('--campaign='):]
+    elif flag.startswith('--record='):
+        RECORD_FILE = flag[len('--record='):]
+
 ### ADD MORE CONSTANTS (PROPERLY COMMENTED) AS NECESSARY ###
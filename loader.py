@@ -0,0 +1,155 @@
+"""
+Background wave loading for Planetoids
+
+This module contains a loader that reads waves on a worker thread. Loading a
+wave means finding its file, compiling or mapping it through the wave cache,
+and reading its arrays from disk. Done on the game thread, all of that happens
+inside a single frame of STATE_LOADING, and the frame gets longer as the wave
+gets bigger. With a loader the next wave is requested early (while the title is
+up, or while the current wave is played), and STATE_LOADING only has to pick up
+the finished result.
+
+The loader only builds CompiledWave objects. Everything that touches Kivy (the
+Ship and the message) is still created on the game thread, when the Wave is.
+
+This module does not access any other module of the game except consts.py,
+physics.py and waves.py.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from waves import *
+from concurrent.futures import ThreadPoolExecutor
+
+# The number of waves that can be loading at the same time
+LOADER_WORKERS = 1
+
+
+class WaveLoader(object):
+    """
+    A class that loads waves on a background thread.
+
+    Each wave file name is loaded at most once per request: request starts the
+    load, is_ready tells if it is done, and take returns the result (waiting for
+    it if necessary) and forgets the request.
+    """
+    # Attribute _cache: the cache the waves are loaded through
+    # Invariant: _cache is a WaveCache
+    #
+    # Attribute _fallback: the function that loads a wave with no file found
+    # Invariant: _fallback is a callable taking a file name, or None
+    #
+    # Attribute _executor: the worker threads (created on the first request)
+    # Invariant: _executor is a ThreadPoolExecutor, or None
+    #
+    # Attribute _pending: the requested waves
+    # Invariant: _pending is a dict mapping file names to Future objects
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def set_fallback(self, fallback):
+        """
+        Sets the function that loads a wave that find_wave cannot find.
+
+        Parameter fallback: the function (such as GameApp.load_json)
+        Precondition: fallback is a callable taking a file name, or None
+        """
+        self._fallback = fallback
+
+    # INITIALIZER
+    def __init__(self, cache=WAVE_CACHE, fallback=None):
+        """
+        Initializes a loader with no requests.
+
+        Parameter cache: the cache to load the waves through
+        Precondition: cache is a WaveCache
+
+        Parameter fallback: the function that loads a wave with no file found
+        Precondition: fallback is a callable taking a file name, or None
+        """
+        self._cache = cache
+        self._fallback = fallback
+        self._executor = None
+        self._pending = {}
+
+    # ADDITIONAL METHODS
+    def request(self, name):
+        """
+        Starts loading the wave with the given file name, if not already started.
+
+        Parameter name: the wave file name
+        Precondition: name is a string
+        """
+        if name in self._pending:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(LOADER_WORKERS,
+                                                thread_name_prefix='wave-loader')
+        self._pending[name] = self._executor.submit(self._load, name)
+
+    def is_requested(self, name):
+        """
+        Returns True if the wave was requested and not taken yet.
+
+        Parameter name: the wave file name
+        Precondition: name is a string
+        """
+        return name in self._pending
+
+    def is_ready(self, name):
+        """
+        Returns True if the wave was requested and has finished loading.
+
+        A wave that failed to load is also ready (take raises the error).
+
+        Parameter name: the wave file name
+        Precondition: name is a string
+        """
+        future = self._pending.get(name)
+        return future is not None and future.done()
+
+    def take(self, name):
+        """
+        Returns the loaded wave with the given file name.
+
+        If the wave is still loading, this waits for it. If it was never
+        requested, it is loaded now on this thread. Any error raised while
+        loading is raised here.
+
+        Parameter name: the wave file name
+        Precondition: name is a string
+        """
+        future = self._pending.pop(name, None)
+        if future is None:
+            return self._load(name)
+        return future.result()
+
+    def shutdown(self):
+        """Forgets every request and stops the worker threads."""
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    # HELPER METHODS
+    def _load(self, name):
+        """
+        Returns the CompiledWave (or wave dict) with the given file name.
+
+        Parameter name: the wave file name
+        Precondition: name is a string
+        """
+        path = find_wave(name)
+        if path is None:
+            if self._fallback is None:
+                raise IOError('wave file %s not found' % repr(name))
+            return self._fallback(name)
+        wave = self._cache.load(path)
+        wave.prefetch()
+        return wave
+
+
+# The wave loader shared by the whole game
+WAVE_LOADER = WaveLoader()
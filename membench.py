@@ -0,0 +1,250 @@
+"""
+Memory benchmark for Planetoids
+
+This script measures how much memory each bullet and asteroid costs in each of
+the ways the game can hold them:
+
+    model       the Bullet and Asteroid models (GEllipse and GImage subclasses
+                with a Vector2 velocity), from models.py
+    slots       the BulletBody and AsteroidBody classes (__slots__ only), from
+                simulation.py
+    arrays      one row of a Bodies object (the array backend), from physics.py,
+                added the way Simulation adds its bullets and asteroids
+
+Before measuring, it checks that the slotted bodies behave like the rest: their
+getters must agree with the models (if game2d is there), and moving them for
+--ticks ticks must give the same positions as moving Bodies rows.
+
+For each kind it creates --count objects and reports the bytes allocated per
+object, as measured by tracemalloc. The models need game2d (and Kivy); without
+them that row is skipped. Run it with
+
+    python membench.py --count 10000 --output memory.json
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from simulation import *
+import argparse
+import gc
+import introcs
+import json
+import random
+import sys
+import tracemalloc
+
+# The number of objects of each kind to create by default
+MEMBENCH_COUNT = 10000
+# The ways of holding the objects, in the order they are reported
+MEMBENCH_KINDS = ('model', 'slots', 'arrays')
+# The number of ticks the bodies are moved by the check
+MEMBENCH_TICKS = 600
+
+
+def measure(build):
+    """
+    Returns the pair (objects, bytes) for the objects made by build.
+
+    The bytes are the memory still allocated (per tracemalloc) after build
+    returns, while its result is kept alive.
+
+    Parameter build: the function that creates the objects
+    Precondition: build is a callable with no arguments returning a list
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (objects, after - before)
+
+
+def build(kind, entity, count, seed=0):
+    """
+    Returns a function that creates count objects of the given kind.
+
+    Parameter kind: how the objects are held
+    Precondition: kind is one of MEMBENCH_KINDS
+
+    Parameter entity: what the objects are
+    Precondition: entity is 'bullet' or 'asteroid'
+
+    Parameter count: the number of objects
+    Precondition: count is an int > 0
+
+    Parameter seed: the seed for the random positions and directions
+    Precondition: seed is an int
+    """
+    points, sizes = sample(count, seed)
+
+    def make_models():
+        import models
+        if entity == 'bullet':
+            return [models.Bullet([x, y], introcs.Vector2(dx, dy))
+                    for x, y, dx, dy in points]
+        return [models.Asteroid(size, [x, y], [dx, dy])
+                for size, (x, y, dx, dy) in zip(sizes, points)]
+
+    def make_slots():
+        if entity == 'bullet':
+            return [BulletBody((x, y), introcs.Vector2(dx, dy))
+                    for x, y, dx, dy in points]
+        return [AsteroidBody(size, (x, y), (dx, dy))
+                for size, (x, y, dx, dy) in zip(sizes, points)]
+
+    def make_arrays():
+        return [make_bodies(entity, points, sizes)]
+
+    return {'model': make_models, 'slots': make_slots, 'arrays': make_arrays}[kind]
+
+
+def sample(count, seed=0):
+    """
+    Returns a tuple (points, sizes) of random objects.
+
+    points is a list of (x, y, dx, dy) tuples (a position on screen and a
+    direction), and sizes a list of asteroid sizes.
+
+    Parameter count: the number of objects
+    Precondition: count is an int > 0
+
+    Parameter seed: the seed for the random positions and directions
+    Precondition: seed is an int
+    """
+    rand = random.Random(seed)
+    points = [(rand.uniform(0, GAME_WIDTH), rand.uniform(0, GAME_HEIGHT),
+               rand.uniform(-1, 1), rand.uniform(-1, 1)) for _ in range(count)]
+    sizes = [rand.choice(ASTEROID_SIZES) for _ in range(count)]
+    return (points, sizes)
+
+
+def make_bodies(entity, points, sizes):
+    """
+    Returns a Bodies object with a row for each object, added like Simulation does.
+
+    Parameter entity: what the objects are
+    Precondition: entity is 'bullet' or 'asteroid'
+
+    Parameter points: the (x, y, dx, dy) of each object
+    Precondition: points is a list returned by sample
+
+    Parameter sizes: the size of each object (only used for asteroids)
+    Precondition: sizes is a list returned by sample
+    """
+    bodies = Bodies()
+    if entity == 'bullet':
+        for x, y, dx, dy in points:
+            bodies.add(x, y, dx, dy, BULLET_RADIUS)
+        return bodies
+    for size, (x, y, dx, dy) in zip(sizes, points):
+        code = size_code(size)
+        vx, vy = asteroid_velocity((dx, dy), code)
+        bodies.add(x, y, vx, vy, ASTEROID_RADII[code], code)
+    return bodies
+
+
+def check(count, ticks=MEMBENCH_TICKS, seed=0):
+    """
+    Returns a list of messages describing where the slotted bodies differ.
+
+    The getters are compared with the models (skipped without game2d), and the
+    positions with Bodies rows after every tick. Bullets are moved and culled,
+    and asteroids are moved and wrapped, like in Simulation.
+
+    Parameter count: the number of objects of each kind
+    Precondition: count is an int > 0
+
+    Parameter ticks: the number of ticks to move the objects
+    Precondition: ticks is an int >= 0
+
+    Parameter seed: the seed for the random positions and directions
+    Precondition: seed is an int
+    """
+    points, sizes = sample(count, seed)
+    bullets = build('slots', 'bullet', count, seed)()
+    asteroids = build('slots', 'asteroid', count, seed)()
+    messages = []
+    try:
+        models = build('model', 'asteroid', count, seed)()
+    except ImportError:
+        models = []
+    for model, body in zip(models, asteroids):
+        if (model.get_velocity() != body.get_velocity() or
+                model.get_size() != body.get_size() or
+                model.get_radius() != body.get_radius()):
+            messages.append('asteroid getters differ from the model')
+            break
+
+    shots = make_bodies('bullet', points, sizes)
+    rocks = make_bodies('asteroid', points, sizes)
+    for tick in range(ticks):
+        shots.integrate()
+        shots.keep(shots.inside())
+        for bullet in bullets:
+            bullet.move()
+        bullets = [bullet for bullet in bullets if bullet.inside()]
+        rocks.integrate()
+        rocks.wrap()
+        for asteroid in asteroids:
+            asteroid.move()
+            asteroid.wrap()
+        if ([(bullet.x, bullet.y) for bullet in bullets] !=
+                list(zip(shots.x.tolist(), shots.y.tolist()))):
+            messages.append('bullets differ from Bodies at tick %d' % tick)
+            break
+        if ([(asteroid.x, asteroid.y) for asteroid in asteroids] !=
+                list(zip(rocks.x.tolist(), rocks.y.tolist()))):
+            messages.append('asteroids differ from Bodies at tick %d' % tick)
+            break
+    return messages
+
+
+def main(argv=None):
+    """
+    Runs the benchmark from the command line and returns the exit status.
+
+    Parameter argv: the command line arguments (None for sys.argv)
+    Precondition: argv is a list of strings or None
+    """
+    parser = argparse.ArgumentParser(description='Measure Planetoids memory per object')
+    parser.add_argument('--count', type=int, default=MEMBENCH_COUNT,
+                        help='the number of objects of each kind')
+    parser.add_argument('--ticks', type=int, default=MEMBENCH_TICKS,
+                        help='the number of ticks the check moves the bodies')
+    parser.add_argument('--output', help='the JSON file to write the results to')
+    args = parser.parse_args(argv)
+
+    messages = check(min(args.count, 1000), args.ticks)
+    for message in messages:
+        print('MISMATCH ' + message)
+    if messages:
+        return 1
+
+    results = {'count': args.count, 'bytes_per_object': {}}
+    for entity in ('bullet', 'asteroid'):
+        row = {}
+        for kind in MEMBENCH_KINDS:
+            try:
+                objects, size = measure(build(kind, entity, args.count))
+            except Exception as error:
+                print('%-8s %-6s unavailable (%s)' % (entity, kind, error))
+                continue
+            row[kind] = size / args.count
+            del objects
+            print('%-8s %-6s %9.1f bytes/object' % (entity, kind, row[kind]))
+        if 'model' in row:
+            for kind in ('slots', 'arrays'):
+                print('%-8s %-6s %9.1fx smaller than the model'
+                      % (entity, kind, row['model'] / row[kind]))
+        results['bytes_per_object'][entity] = row
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
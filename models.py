@@ -22,6 +22,7 @@ John Anim, ja857; Brendan Shek, bs863
 from consts import *
 from game2d import *
 from introcs import *
+import introcs
 import math
 
 # PRIMARY RULE: Models are not allowed to access anything in any module other than
@@ -48,10 +49,9 @@ class Bullet(GEllipse):
     GEllipse as a helper. This init will need a parameter to set the direction
     of the velocity.
 
-    You also want to create a method to update the bolt. You update the bolt by
-    adding the velocity to the position. While it is okay to add a method to
-    detect collisions in this class, you may find it easier to process
-    collisions in wave.py.
+    Bullets do not move themselves. Their positions and velocities are stored
+    in the array backend (a Bodies object in physics.py) that Wave moves and
+    culls in bulk, and a Bullet is only a view used to draw one row of it.
     """
     # LIST ANY ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
     # Attribute _velocity: represents the speed and direction of a bullet
@@ -99,14 +99,24 @@ class Bullet(GEllipse):
                         fillcolor = BULLET_COLOR)
         self._velocity = velocity
 
-    # ADDITIONAL METHODS (MOVEMENT, COLLISIONS, ETC)
-    def update(self):
+    # ADDITIONAL METHODS
+    def reset(self, position, velocity):
         """
-        Updates the bullet's position by applying velocity to the position.
-        The position does not wrap around screen edges.
+        Reuses this bullet for a new shot, as if it was just created.
+
+        This is used by ObjectPool, so that a new shot does not create a new
+        GEllipse. It takes the same arguments as the initializer.
+
+        Parameter position: contains the x and y coordinates
+        of the bullet's center
+        Precondition: position is a list.
+
+        Parameter velocity: The velocity of the bullet, represented as a vector.
+        Precondition: velocity is a Vector2 object.
         """
-        self.x += self._velocity.x
-        self.y += self._velocity.y
+        self.x = position[0]
+        self.y = position[1]
+        self._velocity = velocity
 
 
 class Ship(GImage):
@@ -127,10 +137,9 @@ class Ship(GImage):
     angle. This information is provided by the wave JSON file. Ships should
     start with a shield enabled.
 
-    Finally, you want a method to update the ship. When you update the ship, you
-    apply the velocity to the position. While it is okay to add a method to
-    detect collisions in this class, you may find it easier to process collisions
-    in wave.py.
+    The ship is moved and turned by the game rules in simulation.py, which use a
+    ShipBody that does not need game2d. Wave copies the position and angle of the
+    ShipBody into this object right before drawing it.
     """
     # LIST ANY ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
     # Attribute _facing: the current angle of the ship
@@ -189,57 +198,6 @@ class Ship(GImage):
         self._facing = introcs.Vector2(math.cos(math.radians(self.angle)),
                                         math.sin(math.radians(self.angle)))
 
-    # ADDITIONAL METHODS (MOVEMENT, COLLISIONS, ETC)
-    def turn(self, turn_angle):
-        """
-        Calculates the change in angle of the ship's facing direction based
-        on user input.
-
-        Parameter turn_angle: The degree to which the ship turns, expressed as
-        an angle.
-
-        Precondition: turn_angle must be an int or float.
-        """
-        self.angle = (self.angle + turn_angle) % 360
-        self._facing = introcs.Vector2(math.cos(math.radians(self.angle)),
-                                       math.sin(math.radians(self.angle)))
-
-    def shipImpulse(self):
-        """Changes the speed (thrust) of the ship based on user input."""
-        impulse = self._facing * SHIP_IMPULSE
-        self._velocity += impulse
-        if self._velocity.length() > SHIP_MAX_SPEED:
-            self._velocity = self._velocity.normalize() * SHIP_MAX_SPEED
-
-    def move(self):
-        """Changes the position of the ship based on velocity."""
-        self.x += self._velocity.x
-        self.y += self._velocity.y
-
-    def wrap(self):
-        """Wraps the asteroid around the screen edges."""
-        # Horizontal wrapping:
-        if self.left < -DEAD_ZONE:
-            self.x += GAME_WIDTH + 2 * DEAD_ZONE
-        elif self.right > GAME_WIDTH + DEAD_ZONE:
-            self.x -= GAME_WIDTH + 2 * DEAD_ZONE
-        # Vertical wrapping:
-        if self.top < -DEAD_ZONE:
-            self.y += GAME_HEIGHT + 2 * DEAD_ZONE
-        elif self.bottom > GAME_HEIGHT + DEAD_ZONE:
-            self.y -= GAME_HEIGHT + 2 * DEAD_ZONE
-
-    def update(self, dt):
-        """
-        Updates the ship's position by applying velocity.
-        The position wraps around screen edges to ensure continuous movement.
-
-        Parameter dt: The time in seconds since last update
-        Precondition: dt is a number (int or float)
-        """
-        self.x += self._velocity.x * dt
-        self.y += self._velocity.y * dt
-
 
 class Asteroid(GImage):
     """
@@ -260,10 +218,9 @@ class Asteroid(GImage):
     size and starting velocity. Note that the SPEED of an asteroid is defined in
     const.py, so the only thing that differs is the velocity direction.
 
-    You also want to create a method to update the asteroid. You update the
-    asteroid by adding the velocity to the position. While it is okay to add a
-    method to detect collisions in this class, you may find it easier to process
-    collisions in wave.py.
+    Asteroids do not move themselves. Their positions and velocities are stored
+    in the array backend (a Bodies object in physics.py) that Wave moves and
+    wraps in bulk, and an Asteroid is only a view used to draw one row of it.
     """
     # LIST ANY ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
     # Attribute x: position on x-axis
@@ -320,26 +277,62 @@ class Asteroid(GImage):
         """
         self._size = size
         self._velocity = self._velocity_vector(direction,size)
+        image = self._image(size)
         if size == 'small':
-            image = SMALL_IMAGE
             width = SMALL_RADIUS * 2
             height = SMALL_RADIUS * 2
         elif size == 'medium':
-            image = MEDIUM_IMAGE
             width = MEDIUM_RADIUS * 2
             height = MEDIUM_RADIUS * 2
         else:
-            image = LARGE_IMAGE
             width = LARGE_RADIUS * 2
             height = LARGE_RADIUS * 2
         super().__init__(x=position[0], y=position[1],width=width,
                          height=height, source=image)
 
-    # ADDITIONAL METHODS (MOVEMENT, COLLISIONS, ETC)
-    def move(self):
-        """Changes asteroid's position based on its velocity."""
-        self.x += self._velocity.x
-        self.y += self._velocity.y
+    # ADDITIONAL METHODS
+    def reset(self, size, position, direction):
+        """
+        Reuses this asteroid for a new one, as if it was just created.
+
+        This is used by ObjectPool, so that breaking an asteroid does not create
+        new GImages. It takes the same arguments as the initializer. The image
+        is only replaced if the size changes (pools are kept per size, so it
+        normally does not).
+
+        Parameter size:The size of the asteroid('small', 'medium', or 'large').
+        Precondtion: size is a string
+
+        Parameter position: contains the x and y coordinates of
+        the asteroid's center
+        Precondition: position is a list.
+
+        Parameter direction: A one-dimensional list with two integer values,
+        representing the x- and y- direction of the ship, respectively.
+        Precondition: direction is a one-dimensional list with two int values.
+        """
+        if size != self._size:
+            self._size = size
+            self.source = self._image(size)
+            self.width = 2 * self.get_radius()
+            self.height = 2 * self.get_radius()
+        self._velocity = self._velocity_vector(direction,size)
+        self.x = position[0]
+        self.y = position[1]
+
+    # HELPER METHODS
+    def _image(self, size):
+        """
+        Returns the image file for an asteroid of the given size.
+
+        Parameter size: A string that represents the size of the asteroid.
+        Precondition: size is a string
+        """
+        if size == 'small':
+            return SMALL_IMAGE
+        elif size == 'medium':
+            return MEDIUM_IMAGE
+        return LARGE_IMAGE
 
     def _velocity_vector(self,direction,size):
         """
@@ -367,29 +360,4 @@ class Asteroid(GImage):
                        direction[1]/direction_magnitude]
         return Vector2(unit_vector[0]*speed, unit_vector[1]*speed)
 
-    def wrap(self):
-        """
-        Wraps the asteroid around the screen edges.
-        """
-        if self.x < -DEAD_ZONE:
-            self.x += GAME_WIDTH + 2 * DEAD_ZONE
-        elif self.x > GAME_WIDTH + DEAD_ZONE:
-            self.x -= GAME_WIDTH + 2 * DEAD_ZONE
-        if self.y < -DEAD_ZONE:
-            self.y += GAME_HEIGHT + 2 * DEAD_ZONE
-        elif self.y > GAME_HEIGHT + DEAD_ZONE:
-            self.y -= GAME_HEIGHT + 2 * DEAD_ZONE
-
-    def update(self, dt):
-        """
-        Updates the asteroid's position by applying velocity.
-        The position wraps around screen edges to ensure continuous movement.
-
-        Parameter dt: The time elapsed since the last update.
-
-        Precondition: dt is a non-zero float.
-        """
-        self.x += self._velocity.x * dt
-        self.y += self._velocity.y * dt
-
 # IF YOU NEED ADDITIONAL MODEL CLASSES, THEY GO HERE
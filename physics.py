@@ -0,0 +1,558 @@
+"""
+Array physics backend for Planetoids
+
+This module contains the structure-of-arrays storage that Wave uses for the
+asteroids and the bullets. Rather than asking every model object to move and
+wrap itself (which goes through Vector2 and the GObject property setters for
+each object), the positions, velocities, radii and size codes of a group of
+objects live in NumPy arrays. Moving, wrapping and culling the whole group is
+then a handful of array operations per frame.
+
+The model objects in models.py are only views for drawing. Each row of a Bodies
+object can carry one; Wave copies the positions into the views right before
+they are drawn. Only objects that overlap the visible screen are drawn at all
+(see on_screen and screen_copies); the dead zone around it is never seen.
+
+Like models.py, this module is only allowed to access consts.py.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+import math
+import numpy as np
+
+# The facing vector (cos, sin) of every whole-degree angle, indexed by degree.
+# Ships turn by SHIP_TURN_RATE degrees, so a ship that starts at a whole angle
+# only ever needs these.
+HEADINGS = tuple((math.cos(math.radians(angle)), math.sin(math.radians(angle)))
+                 for angle in range(360))
+# The rotations (cos, sin) from the direction of a hit to the direction of each
+# of the three pieces of a broken planetoid: straight on, and 120 degrees to
+# either side
+SPLIT_ROTATIONS = ((1.0, 0.0),
+                   (math.cos(2 * math.pi / 3), math.sin(2 * math.pi / 3)),
+                   (math.cos(-2 * math.pi / 3), math.sin(-2 * math.pi / 3)))
+
+
+def size_code(size):
+    """
+    Returns the size code for the given planetoid size name.
+
+    Unknown names are treated as large, just like the Asteroid initializer.
+
+    Parameter size: the size of the planetoid
+    Precondition: size is a string
+    """
+    if size == SMALL_ASTEROID:
+        return SMALL_CODE
+    elif size == MEDIUM_ASTEROID:
+        return MEDIUM_CODE
+    return LARGE_CODE
+
+
+def heading(angle):
+    """
+    Returns the facing vector (cos, sin) of an angle in degrees.
+
+    Whole-degree angles are looked up in HEADINGS, and give exactly the same
+    vector as computing it. Other angles are computed.
+
+    Parameter angle: the angle in degrees
+    Precondition: angle is a number in the range [0, 360)
+    """
+    whole = int(angle)
+    if whole == angle:
+        return HEADINGS[whole]
+    radians = math.radians(angle)
+    return (math.cos(radians), math.sin(radians))
+
+
+def asteroid_velocity(direction, code):
+    """
+    Returns the (vx, vy) velocity of a planetoid moving in the given direction.
+
+    The direction is normalized and scaled by the speed for the size code. A
+    zero direction gives a planetoid that does not move.
+
+    Parameter direction: the direction of movement
+    Precondition: direction is a sequence of two numbers
+
+    Parameter code: the planetoid size code
+    Precondition: code is one of SMALL_CODE, MEDIUM_CODE or LARGE_CODE
+    """
+    dx = direction[0]
+    dy = direction[1]
+    magnitude = math.sqrt(dx*dx + dy*dy)
+    if magnitude == 0:
+        return (0.0, 0.0)
+    speed = ASTEROID_SPEEDS[code]
+    return (dx/magnitude*speed, dy/magnitude*speed)
+
+
+def asteroid_velocities(directions, codes):
+    """
+    Returns a tuple (vx, vy) of arrays with the velocities of many planetoids.
+
+    This is asteroid_velocity applied to every row at once.
+
+    Parameter directions: the direction of each planetoid
+    Precondition: directions is a float array of shape (n, 2)
+
+    Parameter codes: the size code of each planetoid
+    Precondition: codes is an int array of length n
+    """
+    dx = directions[:, 0]
+    dy = directions[:, 1]
+    magnitude = np.sqrt(dx*dx + dy*dy)
+    moving = magnitude != 0
+    safe = np.where(moving, magnitude, 1.0)
+    speed = np.take(np.array(ASTEROID_SPEEDS, dtype=float), codes)
+    vx = np.where(moving, dx/safe*speed, 0.0)
+    vy = np.where(moving, dy/safe*speed, 0.0)
+    return (vx, vy)
+
+
+def on_screen(x, y, radius):
+    """
+    Returns True if a circle overlaps the visible screen (not just the dead zone).
+
+    This works on arrays as well, giving a bool array.
+
+    Parameter x, y: the center of the circle
+    Precondition: x and y are numbers, or float arrays of the same shape
+
+    Parameter radius: the radius of the circle
+    Precondition: radius is a number > 0, or a float array like x
+    """
+    return ((x + radius > 0) & (x - radius < GAME_WIDTH) &
+            (y + radius > 0) & (y - radius < GAME_HEIGHT))
+
+
+def screen_copies(x, y, radius):
+    """
+    Returns a tuple (rows, x, y) of arrays with every copy of the circles to draw.
+
+    A circle is drawn where it is if it overlaps the visible screen, and not at
+    all if it is entirely in the dead zone. A circle that straddles a wrap edge
+    is also drawn shifted by WRAP_WIDTH and/or WRAP_HEIGHT, wherever that ghost
+    copy overlaps the screen, so it can be seen coming in on the other side
+    before its center wraps. rows[k] is the circle that copy k is of. The
+    copies at the real positions come first, in the order of the circles.
+
+    Parameter x, y: the centers of the circles
+    Precondition: x and y are float arrays of the same length
+
+    Parameter radius: the radius of the circles
+    Precondition: radius is a number > 0, or a float array as long as x
+    """
+    columns = ((0, (x + radius > 0) & (x - radius < GAME_WIDTH)),
+               (WRAP_WIDTH, x + WRAP_WIDTH - radius < GAME_WIDTH),
+               (-WRAP_WIDTH, x - WRAP_WIDTH + radius > 0))
+    lines = ((0, (y + radius > 0) & (y - radius < GAME_HEIGHT)),
+             (WRAP_HEIGHT, y + WRAP_HEIGHT - radius < GAME_HEIGHT),
+             (-WRAP_HEIGHT, y - WRAP_HEIGHT + radius > 0))
+    rows = []
+    xs = []
+    ys = []
+    for dx, fits_x in columns:
+        if not fits_x.any():
+            continue
+        for dy, fits_y in lines:
+            chosen = np.nonzero(fits_x & fits_y)[0]
+            if len(chosen):
+                rows.append(chosen)
+                xs.append(x[chosen] + dx)
+                ys.append(y[chosen] + dy)
+    if not rows:
+        empty = np.zeros(0)
+        return (np.zeros(0, dtype=np.intp), empty, empty)
+    if len(rows) == 1:
+        return (rows[0], xs[0], ys[0])
+    return (np.concatenate(rows), np.concatenate(xs), np.concatenate(ys))
+
+
+class Bodies(object):
+    """
+    A group of moving circles stored as parallel NumPy arrays.
+
+    Row i of the group is the object with center (x[i], y[i]), velocity
+    (vx[i], vy[i]), radius radius[i] and size code size[i] (the size code is
+    only meaningful for planetoids). Each row may also have a view: the model
+    object that draws it.
+
+    Each row also remembers its position at the last call to save, so that a
+    view can be drawn part of the way between two simulation ticks.
+
+    Rows are packed at the front of the arrays. The arrays grow by doubling, and
+    removing rows compacts the survivors in order, so row indices are only valid
+    until the next call to remove or keep.
+    """
+    # Attribute _count: the number of rows in use
+    # Invariant: _count is an int >= 0 and <= the length of the arrays
+    #
+    # Attribute _x, _y: the center of each row
+    # Invariant: _x and _y are float arrays of the same length
+    #
+    # Attribute _px, _py: the center of each row at the last save
+    # Invariant: _px and _py are float arrays of the same length as _x
+    #
+    # Attribute _vx, _vy: the velocity of each row (pixels per tick)
+    # Invariant: _vx and _vy are float arrays of the same length as _x
+    #
+    # Attribute _radius: the radius of each row
+    # Invariant: _radius is a float array of the same length as _x
+    #
+    # Attribute _size: the size code of each row
+    # Invariant: _size is an int8 array of the same length as _x
+    #
+    # Attribute _views: the model object drawing each row in use
+    # Invariant: _views is a list of length _count (entries may be None)
+
+    # GETTERS (THESE ARE VIEWS, NOT COPIES, OF THE ROWS IN USE)
+    @property
+    def x(self):
+        """The x-coordinates of the rows in use (a writable array view)."""
+        return self._x[:self._count]
+
+    @property
+    def y(self):
+        """The y-coordinates of the rows in use (a writable array view)."""
+        return self._y[:self._count]
+
+    @property
+    def vx(self):
+        """The x-velocities of the rows in use (a writable array view)."""
+        return self._vx[:self._count]
+
+    @property
+    def vy(self):
+        """The y-velocities of the rows in use (a writable array view)."""
+        return self._vy[:self._count]
+
+    @property
+    def radius(self):
+        """The radii of the rows in use (a writable array view)."""
+        return self._radius[:self._count]
+
+    @property
+    def size(self):
+        """The size codes of the rows in use (a writable array view)."""
+        return self._size[:self._count]
+
+    def set_views(self, views):
+        """
+        Sets the model objects drawing the rows.
+
+        Parameter views: the view of each row (entries may be None)
+        Precondition: views is a list of length len(self)
+        """
+        self._views = views
+
+    def get_views(self):
+        """Returns the list of model objects drawing the rows in use."""
+        return self._views
+
+    def __len__(self):
+        """Returns the number of rows in use."""
+        return self._count
+
+    # INITIALIZER
+    def __init__(self, capacity=64):
+        """
+        Initializes an empty group with room for capacity rows.
+
+        Parameter capacity: the initial number of rows to allocate
+        Precondition: capacity is an int > 0
+        """
+        self._count = 0
+        self._x = np.zeros(capacity)
+        self._y = np.zeros(capacity)
+        self._px = np.zeros(capacity)
+        self._py = np.zeros(capacity)
+        self._vx = np.zeros(capacity)
+        self._vy = np.zeros(capacity)
+        self._radius = np.zeros(capacity)
+        self._size = np.zeros(capacity, dtype=np.int8)
+        self._views = []
+
+    # ADDING AND REMOVING ROWS
+    def add(self, x, y, vx, vy, radius, size=0, view=None):
+        """
+        Appends a row and returns its index.
+
+        Parameter x: the x-coordinate of the center
+        Precondition: x is a number (int or float)
+
+        Parameter y: the y-coordinate of the center
+        Precondition: y is a number (int or float)
+
+        Parameter vx: the x-velocity
+        Precondition: vx is a number (int or float)
+
+        Parameter vy: the y-velocity
+        Precondition: vy is a number (int or float)
+
+        Parameter radius: the radius of the object
+        Precondition: radius is a number >= 0
+
+        Parameter size: the size code of the object
+        Precondition: size is an int in the range of int8
+
+        Parameter view: the model object drawing this row
+        Precondition: view is a GObject or None
+        """
+        i = self._count
+        if i == len(self._x):
+            self._grow(2 * i)
+        self._x[i] = x
+        self._y[i] = y
+        self._px[i] = x
+        self._py[i] = y
+        self._vx[i] = vx
+        self._vy[i] = vy
+        self._radius[i] = radius
+        self._size[i] = size
+        self._views.append(view)
+        self._count = i + 1
+        return i
+
+    def extend(self, x, y, vx, vy, radius, size, views=None):
+        """
+        Appends many rows at once.
+
+        Parameter x, y: the centers of the new rows
+        Precondition: x and y are float arrays of length n
+
+        Parameter vx, vy: the velocities of the new rows
+        Precondition: vx and vy are float arrays of length n
+
+        Parameter radius: the radii of the new rows
+        Precondition: radius is a number or a float array of length n
+
+        Parameter size: the size codes of the new rows
+        Precondition: size is an int or an int array of length n
+
+        Parameter views: the model objects drawing the new rows (None for none)
+        Precondition: views is a list of length n, or None
+        """
+        n = self._count
+        count = len(x)
+        if n + count > len(self._x):
+            self._grow(max(2 * len(self._x), n + count))
+        end = n + count
+        self._x[n:end] = x
+        self._y[n:end] = y
+        self._px[n:end] = x
+        self._py[n:end] = y
+        self._vx[n:end] = vx
+        self._vy[n:end] = vy
+        self._radius[n:end] = radius
+        self._size[n:end] = size
+        if views is None:
+            self._views.extend([None] * count)
+        else:
+            self._views.extend(views)
+        self._count = end
+
+    def remove(self, indices):
+        """
+        Removes the given rows and returns the list of their views.
+
+        Parameter indices: the rows to remove
+        Precondition: indices is a collection of valid row indices
+        """
+        mask = np.ones(self._count, dtype=bool)
+        mask[list(indices)] = False
+        return self.keep(mask)
+
+    def keep(self, mask):
+        """
+        Keeps only the rows where mask is True and returns the views of the rest.
+
+        The surviving rows stay in the same order.
+
+        Parameter mask: which rows to keep
+        Precondition: mask is a bool array of length len(self)
+        """
+        n = self._count
+        flags = mask.tolist()
+        removed = [view for view, flag in zip(self._views, flags) if not flag]
+        if not removed:
+            return removed
+        count = n - len(removed)
+        for array in self._arrays():
+            array[:count] = array[:n][mask]
+        self._views = [view for view, flag in zip(self._views, flags) if flag]
+        self._count = count
+        return removed
+
+    def clear(self):
+        """Removes every row and returns the list of their views."""
+        removed = self._views
+        self._views = []
+        self._count = 0
+        return removed
+
+    def dump(self):
+        """
+        Returns the rows in use as bytes (every array in turn, without views).
+        """
+        n = self._count
+        return b''.join([array[:n].tobytes() for array in self._arrays()])
+
+    def load(self, buffer, offset, count):
+        """
+        Replaces every row with count rows written by dump, and returns the
+        offset just past them.
+
+        The views of the old rows are dropped (clear them first to keep them),
+        and the new rows have no views.
+
+        Parameter buffer: the data written by dump
+        Precondition: buffer supports the buffer protocol (bytes, mmap, ...)
+
+        Parameter offset: the position of the rows in buffer
+        Precondition: offset is an int >= 0
+
+        Parameter count: the number of rows
+        Precondition: count is an int >= 0
+        """
+        if count > len(self._x):
+            self._count = 0
+            self._grow(max(2 * len(self._x), count))
+        for array in self._arrays():
+            array[:count] = np.frombuffer(buffer, dtype=array.dtype, count=count,
+                                          offset=offset)
+            offset += count * array.itemsize
+        self._views = [None] * count
+        self._count = count
+        return offset
+
+    # BATCHED MOVEMENT
+    def integrate(self, scale=1):
+        """
+        Adds scale times the velocity to the position of every row.
+
+        Parameter scale: the number of ticks to advance
+        Precondition: scale is a number (int or float)
+        """
+        n = self._count
+        if n:
+            self._x[:n] += self._vx[:n] * scale
+            self._y[:n] += self._vy[:n] * scale
+
+    def wrap(self):
+        """
+        Wraps every center that has left the dead zone to the opposite side.
+
+        This is the same rule as Asteroid.wrap, applied to all rows at once.
+        """
+        n = self._count
+        if n:
+            x = self._x[:n]
+            y = self._y[:n]
+            x[x < -DEAD_ZONE] += WRAP_WIDTH
+            x[x > GAME_WIDTH + DEAD_ZONE] -= WRAP_WIDTH
+            y[y < -DEAD_ZONE] += WRAP_HEIGHT
+            y[y > GAME_HEIGHT + DEAD_ZONE] -= WRAP_HEIGHT
+
+    def inside(self):
+        """
+        Returns a bool array marking the rows whose center is inside the dead zone.
+
+        This is the bounds test of Wave.bullets_to_use.
+        """
+        x = self.x
+        y = self.y
+        return ((-DEAD_ZONE < x) & (x < GAME_WIDTH + DEAD_ZONE) &
+                (-DEAD_ZONE < y) & (y < GAME_HEIGHT + DEAD_ZONE))
+
+    def save(self):
+        """Remembers the current position of every row (call before a tick)."""
+        n = self._count
+        self._px[:n] = self._x[:n]
+        self._py[:n] = self._y[:n]
+
+    def displacement(self):
+        """
+        Returns a tuple (dx, dy) of arrays with how far each row moved since the save.
+
+        A row that wrapped since the save did not really jump across the screen,
+        so its displacement is taken the short way around the wrapping area.
+        """
+        n = self._count
+        dx = self._x[:n] - self._px[:n]
+        dy = self._y[:n] - self._py[:n]
+        dx -= WRAP_WIDTH * np.round(dx / WRAP_WIDTH)
+        dy -= WRAP_HEIGHT * np.round(dy / WRAP_HEIGHT)
+        return (dx, dy)
+
+    def positions(self, alpha=1):
+        """
+        Returns a tuple (x, y) of arrays with the positions to draw the rows at.
+
+        The position is alpha of the way from the saved position to the current
+        one. A row that wrapped since the save is drawn at its current position,
+        rather than sliding across the whole screen.
+
+        Parameter alpha: how far past the saved position to draw
+        Precondition: alpha is a number in [0, 1]
+        """
+        n = self._count
+        x = self._x[:n]
+        y = self._y[:n]
+        if alpha < 1:
+            px = self._px[:n]
+            py = self._py[:n]
+            dx = x - px
+            dy = y - py
+            dx[np.abs(dx) > WRAP_WIDTH/2] = 0
+            dy[np.abs(dy) > WRAP_HEIGHT/2] = 0
+            x = x - dx * (1 - alpha)
+            y = y - dy * (1 - alpha)
+        return (x, y)
+
+    def sync(self, alpha=1):
+        """
+        Copies the position of every row on screen into its view, and returns
+        the list of those views.
+
+        The positions are interpolated as in the method positions. Rows that
+        are entirely in the dead zone (see on_screen) are skipped, as they do
+        not need to be drawn. Rows without a view are skipped as well.
+
+        Parameter alpha: how far past the saved position to draw
+        Precondition: alpha is a number in [0, 1]
+        """
+        x, y = self.positions(alpha)
+        rows = np.nonzero(on_screen(x, y, self.radius))[0]
+        views = self._views
+        shown = []
+        for k, vx, vy in zip(rows.tolist(), x[rows].tolist(), y[rows].tolist()):
+            view = views[k]
+            if view is not None:
+                view.x = vx
+                view.y = vy
+                shown.append(view)
+        return shown
+
+    # HELPER METHODS
+    def _arrays(self):
+        """Returns a tuple of all of the per-row arrays."""
+        return (self._x, self._y, self._px, self._py, self._vx, self._vy,
+                self._radius, self._size)
+
+    def _grow(self, capacity):
+        """
+        Reallocates the arrays to hold capacity rows, keeping the rows in use.
+
+        Parameter capacity: the new number of rows
+        Precondition: capacity is an int >= len(self)
+        """
+        n = self._count
+        for name in ('_x', '_y', '_px', '_py', '_vx', '_vy', '_radius', '_size'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:n] = old[:n]
+            setattr(self, name, new)
@@ -0,0 +1,90 @@
+"""
+Object pools for Planetoids
+
+This module contains a free-list pool for the model objects that are created
+and thrown away all the time: bullets (one per shot) and asteroids (three per
+break). Building one of these runs the whole GObject setup, including loading
+its image. A pool keeps the objects that are no longer on screen and resets
+them in place the next time one is needed.
+
+This module does not access any other module of the game.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+
+
+class ObjectPool(object):
+    """
+    A class that recycles objects instead of creating new ones.
+
+    The objects in a pool must have a method reset that takes the same arguments
+    as the factory that creates them. acquire(*args) is then the same as
+    factory(*args), except that it reuses a released object when it can.
+    """
+    # Attribute _factory: the function that creates a new object
+    # Invariant: _factory is a callable
+    #
+    # Attribute _free: the released objects, ready to be reused
+    # Invariant: _free is a list of objects made by _factory
+    #
+    # Attribute _created: the number of objects made by the factory
+    # Invariant: _created is an int >= 0
+    #
+    # Attribute _reused: the number of times a released object was reused
+    # Invariant: _reused is an int >= 0
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_free(self):
+        """Returns the number of objects waiting to be reused."""
+        return len(self._free)
+
+    def get_created(self):
+        """Returns the number of objects the factory has made."""
+        return self._created
+
+    def get_reused(self):
+        """Returns the number of times an object was reused."""
+        return self._reused
+
+    # INITIALIZER
+    def __init__(self, factory):
+        """
+        Initializes an empty pool.
+
+        Parameter factory: the function that creates a new object
+        Precondition: factory is a callable whose results have a method reset
+        taking the same arguments
+        """
+        self._factory = factory
+        self._free = []
+        self._created = 0
+        self._reused = 0
+
+    # ADDITIONAL METHODS
+    def acquire(self, *args):
+        """
+        Returns an object set up with the given arguments.
+
+        Parameter args: the arguments for the factory (or reset)
+        Precondition: args are valid arguments for the factory
+        """
+        if self._free:
+            obj = self._free.pop()
+            obj.reset(*args)
+            self._reused += 1
+            return obj
+        self._created += 1
+        return self._factory(*args)
+
+    def release(self, objs):
+        """
+        Returns objects to the pool so they can be reused.
+
+        Entries that are None (rows without a view) are ignored. The caller
+        must not use the objects after releasing them.
+
+        Parameter objs: the objects to release
+        Precondition: objs is a list of objects from this pool (or None)
+        """
+        self._free.extend(obj for obj in objs if obj is not None)
@@ -0,0 +1,199 @@
+"""
+Frame profiler for Planetoids
+
+This module contains an opt-in profiler that records where the time of each
+frame goes. Wave (through Simulation) and Planetoids call mark after each phase
+of a frame, and the profiler charges the time since the previous mark to that
+phase. It also records the number of asteroids and bullets and the net number of
+memory blocks allocated in each frame.
+
+Only the last PROFILE_FRAMES frames are kept, in a ring buffer, so a profiler
+can stay on for a whole game. When no profiler is set, the game only pays for a
+check against None once per frame.
+
+This module does not access any other module of the game except consts.py.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+import json
+import sys
+import time
+
+# The phases of a frame, in the order they happen
+PROFILE_PHASES = ('turning', 'bullets', 'ship', 'collisions', 'asteroids',
+                  'status', 'draw')
+
+
+class FrameProfiler(object):
+    """
+    A class that records per-phase frame times in a fixed-size ring buffer.
+
+    A frame is recorded by calling begin_frame, then mark(phase) at the end of
+    each phase, then end_frame. Times charged to the same phase twice in one
+    frame are added together.
+    """
+    # Attribute _capacity: the number of frames kept
+    # Invariant: _capacity is an int > 0
+    #
+    # Attribute _frames: the number of frames recorded so far
+    # Invariant: _frames is an int >= 0
+    #
+    # Attribute _times: the seconds spent in each phase, for each slot
+    # Invariant: _times is a dict mapping each of PROFILE_PHASES to a list of
+    #            _capacity floats
+    #
+    # Attribute _totals: the total seconds of each frame, for each slot
+    # Invariant: _totals is a list of _capacity floats
+    #
+    # Attribute _asteroids, _bullets: the object counts of each slot
+    # Invariant: _asteroids and _bullets are lists of _capacity ints
+    #
+    # Attribute _allocations: the net blocks allocated in each slot
+    # Invariant: _allocations is a list of _capacity ints
+    #
+    # Attribute _slot: the slot of the frame being recorded
+    # Invariant: _slot is an int in 0.._capacity-1
+    #
+    # Attribute _start, _last: the clock at the start of the frame and last mark
+    # Invariant: _start and _last are floats
+    #
+    # Attribute _blocks: the allocated blocks at the start of the frame
+    # Invariant: _blocks is an int >= 0
+    #
+    # Attribute _recording: whether begin_frame was called since the last end_frame
+    # Invariant: _recording is a bool
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_frames(self):
+        """Returns the number of frames recorded so far (including dropped ones)."""
+        return self._frames
+
+    def get_capacity(self):
+        """Returns the number of frames kept in the ring buffer."""
+        return self._capacity
+
+    # INITIALIZER
+    def __init__(self, capacity=PROFILE_FRAMES):
+        """
+        Initializes an empty profiler that keeps the last capacity frames.
+
+        Parameter capacity: the number of frames to keep
+        Precondition: capacity is an int > 0
+        """
+        self._capacity = capacity
+        self._frames = 0
+        self._times = {phase: [0.0] * capacity for phase in PROFILE_PHASES}
+        self._totals = [0.0] * capacity
+        self._asteroids = [0] * capacity
+        self._bullets = [0] * capacity
+        self._allocations = [0] * capacity
+        self._slot = 0
+        self._start = 0.0
+        self._last = 0.0
+        self._blocks = 0
+        self._recording = False
+
+    # RECORDING
+    def begin_frame(self):
+        """Starts recording a new frame, overwriting the oldest one if full."""
+        slot = self._frames % self._capacity
+        self._slot = slot
+        for phase in PROFILE_PHASES:
+            self._times[phase][slot] = 0.0
+        self._asteroids[slot] = 0
+        self._bullets[slot] = 0
+        self._blocks = sys.getallocatedblocks()
+        self._recording = True
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """
+        Charges the time since the previous mark (or begin_frame) to phase.
+
+        Parameter phase: the phase that just ended
+        Precondition: phase is one of PROFILE_PHASES
+        """
+        now = time.perf_counter()
+        self._times[phase][self._slot] += now - self._last
+        self._last = now
+
+    def skip(self):
+        """Restarts the clock without charging the time to any phase."""
+        self._last = time.perf_counter()
+
+    def count(self, asteroids, bullets):
+        """
+        Records the number of objects in the current frame.
+
+        Parameter asteroids: the number of asteroids
+        Precondition: asteroids is an int >= 0
+
+        Parameter bullets: the number of bullets
+        Precondition: bullets is an int >= 0
+        """
+        self._asteroids[self._slot] = asteroids
+        self._bullets[self._slot] = bullets
+
+    def end_frame(self):
+        """Finishes recording the current frame (if one was started)."""
+        if not self._recording:
+            return
+        self._recording = False
+        slot = self._slot
+        self._totals[slot] = time.perf_counter() - self._start
+        self._allocations[slot] = sys.getallocatedblocks() - self._blocks
+        self._frames += 1
+
+    # REPORTING
+    def records(self):
+        """
+        Returns the recorded frames, oldest first, as a list of dicts.
+
+        Each dict has the frame number, the total time and the time of each phase
+        in milliseconds, the object counts and the net allocated blocks.
+        """
+        kept = min(self._frames, self._capacity)
+        first = self._frames - kept
+        result = []
+        for frame in range(first, self._frames):
+            slot = frame % self._capacity
+            record = {'frame': frame, 'total_ms': self._totals[slot] * 1000}
+            for phase in PROFILE_PHASES:
+                record[phase + '_ms'] = self._times[phase][slot] * 1000
+            record['asteroids'] = self._asteroids[slot]
+            record['bullets'] = self._bullets[slot]
+            record['allocations'] = self._allocations[slot]
+            result.append(record)
+        return result
+
+    def summary(self):
+        """
+        Returns a short multi-line text with the average cost of each phase.
+
+        This is the text of the on-screen overlay.
+        """
+        kept = min(self._frames, self._capacity)
+        if kept == 0:
+            return 'no frames'
+        lines = ['frame %.2f ms' % (sum(self._totals[:kept]) * 1000 / kept)]
+        for phase in PROFILE_PHASES:
+            average = sum(self._times[phase][:kept]) * 1000 / kept
+            lines.append('%s %.2f ms' % (phase, average))
+        slot = (self._frames - 1) % self._capacity
+        lines.append('%d asteroids %d bullets' % (self._asteroids[slot],
+                                                  self._bullets[slot]))
+        lines.append('%d blocks/frame' % (sum(self._allocations[:kept]) // kept))
+        return '\n'.join(lines)
+
+    def dump(self, filename):
+        """
+        Writes the recorded frames to a file, one JSON object per line.
+
+        Parameter filename: the file to write
+        Precondition: filename is a string naming a writable file
+        """
+        with open(filename, 'w') as file:
+            for record in self.records():
+                file.write(json.dumps(record) + '\n')
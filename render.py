@@ -0,0 +1,197 @@
+"""
+Batched rendering for Planetoids
+
+This module draws many objects of the same kind with a single Kivy Mesh. Drawing
+every asteroid as its own GImage costs a set of canvas instructions per object,
+so with thousands of asteroids drawing takes longer than the simulation. Here
+all of the asteroids of one size share one textured mesh, and all of the bullets
+share one colored mesh. The vertices of a mesh are rebuilt from the position
+arrays of a Bodies object with a few NumPy operations per frame. Objects that
+are entirely off screen (in the dead zone) get no vertices at all.
+
+A mesh is drawn like any GObject, by handing its instructions to GView.draw.
+
+This is a rendering module: it needs Kivy, and only wave.py uses it.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from physics import *
+from kivy.graphics import Color, InstructionGroup, Mesh
+from kivy.utils import colormap
+import math
+import numpy as np
+
+# The largest vertex index a Mesh can hold (Kivy uses 16-bit indices)
+MESH_VERTICES = 65536
+# The number of triangles used to draw a bullet
+BULLET_SEGMENTS = 12
+
+
+class SpriteBatch(object):
+    """
+    A class that draws any number of circles with one shared look.
+
+    Each circle is a polygon of vertices around its center (a textured square
+    for images, or a triangle fan for plain colors). If there are more vertices
+    than one Mesh can hold, the circles are split over several meshes, but they
+    are still drawn with a single instruction group.
+    """
+    # Attribute _group: the instructions drawn to the view
+    # Invariant: _group is a Kivy InstructionGroup holding a Color and _meshes
+    #
+    # Attribute _meshes: the meshes, each with at most _per_mesh circles
+    # Invariant: _meshes is a list of Kivy Mesh objects
+    #
+    # Attribute _texture: the texture of every circle
+    # Invariant: _texture is a Kivy texture, or None for a plain color
+    #
+    # Attribute _shape: the vertex offsets and texture coordinates of a circle
+    #            with radius 1, centered at the origin
+    # Invariant: _shape is a float32 array of shape (k, 4)
+    #
+    # Attribute _triangles: the vertex indices of one circle
+    # Invariant: _triangles is an int array of indices into _shape
+    #
+    # Attribute _per_mesh: the most circles that fit in one mesh
+    # Invariant: _per_mesh is an int > 0
+    #
+    # Attribute _indices: the index list of a full mesh (shared by all meshes)
+    # Invariant: _indices is a list of ints
+
+    def __init__(self, texture=None, color=(1, 1, 1, 1)):
+        """
+        Initializes an empty batch.
+
+        With a texture every circle is drawn as a square with the texture on it
+        (like a GImage). Without one it is drawn as a filled circle of the color.
+
+        Parameter texture: the texture to draw, or None
+        Precondition: texture is a Kivy texture or None
+
+        Parameter color: the color to draw with (multiplied with the texture)
+        Precondition: color is an (r, g, b, a) tuple of floats in [0, 1]
+        """
+        self._texture = texture
+        if texture is not None:
+            uv = texture.tex_coords
+            corners = [(-1, -1), (1, -1), (1, 1), (-1, 1)]
+            self._shape = np.array([(corners[k][0], corners[k][1],
+                                     uv[2*k], uv[2*k+1]) for k in range(4)],
+                                   dtype=np.float32)
+            self._triangles = np.array([0, 1, 2, 2, 3, 0])
+        else:
+            ring = [(0.0, 0.0, 0.0, 0.0)]
+            for k in range(BULLET_SEGMENTS):
+                angle = 2 * math.pi * k / BULLET_SEGMENTS
+                ring.append((math.cos(angle), math.sin(angle), 0.0, 0.0))
+            self._shape = np.array(ring, dtype=np.float32)
+            self._triangles = np.array([(0, k + 1, (k + 1) % BULLET_SEGMENTS + 1)
+                                        for k in range(BULLET_SEGMENTS)]).ravel()
+        size = len(self._shape)
+        self._per_mesh = MESH_VERTICES // size
+        offsets = np.arange(self._per_mesh)[:, None] * size
+        self._indices = (offsets + self._triangles[None, :]).ravel().tolist()
+        self._group = InstructionGroup()
+        self._group.add(Color(*color))
+        self._meshes = []
+
+    def update(self, x, y, radius):
+        """
+        Moves the circles to the given centers, adding or removing meshes.
+
+        Parameter x: the x-coordinates of the centers
+        Precondition: x is a float array
+
+        Parameter y: the y-coordinates of the centers (as many as x)
+        Precondition: y is a float array
+
+        Parameter radius: the radius of every circle
+        Precondition: radius is a number > 0
+        """
+        count = len(x)
+        size = len(self._shape)
+        vertices = np.empty((count, size, 4), dtype=np.float32)
+        vertices[:, :, 0] = x[:, None] + self._shape[None, :, 0] * radius
+        vertices[:, :, 1] = y[:, None] + self._shape[None, :, 1] * radius
+        vertices[:, :, 2] = self._shape[None, :, 2]
+        vertices[:, :, 3] = self._shape[None, :, 3]
+
+        needed = (count + self._per_mesh - 1) // self._per_mesh
+        while len(self._meshes) < needed:
+            mesh = Mesh(mode='triangles', texture=self._texture)
+            self._meshes.append(mesh)
+            self._group.add(mesh)
+        for k, mesh in enumerate(self._meshes):
+            chunk = vertices[k * self._per_mesh:(k + 1) * self._per_mesh]
+            mesh.vertices = chunk.ravel().tolist()
+            mesh.indices = self._indices[:len(chunk) * len(self._triangles)]
+
+    def draw(self, view):
+        """
+        Draws every circle to the view.
+
+        Parameter view: the game view
+        Precondition: view is an instance of GView
+        """
+        view.draw(self._group)
+
+
+class SpriteRenderer(object):
+    """
+    A class that draws all of the asteroids and bullets of a wave in batches.
+
+    There is one batch per asteroid size (one texture each) and one batch for the
+    bullets, so drawing a frame costs four draws no matter how many objects
+    there are.
+    """
+    # Attribute _asteroids: the batch for each asteroid size
+    # Invariant: _asteroids is a list of SpriteBatch indexed by size code
+    #
+    # Attribute _bullets: the batch for the bullets
+    # Invariant: _bullets is a SpriteBatch
+
+    def __init__(self, assets):
+        """
+        Initializes the batches, with textures from the given asset cache.
+
+        Parameter assets: the cache to get the asteroid textures from
+        Precondition: assets is an AssetCache
+        """
+        images = (SMALL_IMAGE, MEDIUM_IMAGE, LARGE_IMAGE)
+        self._asteroids = [SpriteBatch(assets.texture(image)) for image in images]
+        color = colormap.get(BULLET_COLOR, (1, 0, 0, 1))
+        self._bullets = SpriteBatch(color=tuple(color))
+
+    def draw(self, view, asteroids, bullets, alpha=1):
+        """
+        Draws the asteroids and bullets at their (interpolated) positions.
+
+        Only the copies given by screen_copies get vertices: objects hidden in
+        the dead zone are left out, and objects straddling a wrap edge also get
+        a ghost copy on the opposite side.
+
+        Parameter view: the game view
+        Precondition: view is an instance of GView
+
+        Parameter asteroids: the asteroids to draw
+        Precondition: asteroids is a Bodies object
+
+        Parameter bullets: the bullets to draw
+        Precondition: bullets is a Bodies object
+
+        Parameter alpha: how far to draw past the last saved positions
+        Precondition: alpha is a number in [0, 1]
+        """
+        x, y = asteroids.positions(alpha)
+        rows, x, y = screen_copies(x, y, asteroids.radius)
+        codes = asteroids.size[rows]
+        for code, batch in enumerate(self._asteroids):
+            chosen = codes == code
+            batch.update(x[chosen], y[chosen], ASTEROID_RADII[code])
+            batch.draw(view)
+        x, y = bullets.positions(alpha)
+        rows, x, y = screen_copies(x, y, BULLET_RADIUS)
+        self._bullets.update(x, y, BULLET_RADIUS)
+        self._bullets.draw(view)
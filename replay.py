@@ -0,0 +1,470 @@
+"""
+Replays for Planetoids
+
+This module records the input of a wave, tick by tick, and plays it back. The
+rules advance in fixed ticks and use no randomness, so a wave and the keys held
+in every tick are enough to repeat a game exactly.
+
+A replay file is a small header followed by a stream of records:
+
+    magic      4 bytes    b'PLRP'
+    version    uint16     REPLAY_VERSION
+    interval   uint16     ticks between checksums (0 for none)
+    seed       int64      the seed of a synthetic wave (see bench.make_wave)
+    asteroids  uint32     the size of a synthetic wave
+    name       uint16 length, then that many UTF-8 bytes: the wave file, or
+               empty for a synthetic wave
+
+Each record is a varint with the number of ticks since the previous record,
+then a tag byte. Tags 0-15 mean the held keys changed to the given mask (left 1,
+right 2, up 4, spacebar 8). REPLAY_CHECKSUM is followed by the 4-byte checksum
+of the state at the start of that tick, and REPLAY_END ends the stream. Keys are
+only written when they change, so a replay takes a few bytes per second.
+
+The player runs a headless Wave as fast as it can, compares the checksums, and
+keeps a snapshot every REPLAY_SNAPSHOT ticks so that seeking to any tick only
+replays the ticks since the nearest snapshot.
+
+Run a replay with
+
+    python replay.py game.replay --seek 1800
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from wave import *
+from waves import *
+from bench import *
+import argparse
+import bisect
+import struct
+import sys
+import time
+
+# The first bytes of every replay file
+REPLAY_MAGIC = b'PLRP'
+# The version of the replay format
+REPLAY_VERSION = 1
+# The layout of the fixed part of the header
+REPLAY_HEADER = struct.Struct('<4sHHqI')
+# The keys recorded, in the order of their bits in a key mask
+REPLAY_KEYS = ('left', 'right', 'up', 'spacebar')
+# The tag of a checksum record
+REPLAY_CHECKSUM = 0x10
+# The tag of the last record
+REPLAY_END = 0xFF
+# The default number of ticks between checksums
+REPLAY_INTERVAL = 60
+# The number of ticks between the snapshots kept by the player
+REPLAY_SNAPSHOT = 300
+
+
+def key_mask(input):
+    """
+    Returns the keys of REPLAY_KEYS held down in input, as a bit mask.
+
+    Parameter input: the input to read
+    Precondition: input has a method is_key_down (e.g. GInput)
+    """
+    mask = 0
+    for bit, key in enumerate(REPLAY_KEYS):
+        if input.is_key_down(key):
+            mask |= 1 << bit
+    return mask
+
+
+def mask_keys(mask):
+    """
+    Returns the list of keys in a key mask.
+
+    Parameter mask: the key mask
+    Precondition: mask is an int in 0..15
+    """
+    return [key for bit, key in enumerate(REPLAY_KEYS) if mask & (1 << bit)]
+
+
+def random_keys(rand):
+    """
+    Returns a random list of keys of REPLAY_KEYS to hold down.
+
+    Each key is held or not with equal odds.
+
+    Parameter rand: the random number generator to use
+    Precondition: rand is a random.Random
+    """
+    return [key for key in REPLAY_KEYS if rand.random() < 0.5]
+
+
+class ReplayRecorder(object):
+    """
+    A class that records the input of a wave.
+
+    Set it on a wave with set_recorder. The wave then calls record at the start
+    of every tick. Call finish when the game is over to get the replay.
+    """
+    # Attribute _header: the encoded header
+    # Invariant: _header is a bytes object
+    #
+    # Attribute _body: the records so far
+    # Invariant: _body is a bytearray
+    #
+    # Attribute _interval: the number of ticks between checksums (0 for none)
+    # Invariant: _interval is an int >= 0
+    #
+    # Attribute _mask: the key mask last written
+    # Invariant: _mask is an int in 0..15
+    #
+    # Attribute _tick: the tick of the last record
+    # Invariant: _tick is an int >= 0
+
+    def __init__(self, seed=0, asteroids=0, name='', interval=REPLAY_INTERVAL):
+        """
+        Initializes a recorder for a new wave.
+
+        Parameter seed: the seed of a synthetic wave
+        Precondition: seed is an int
+
+        Parameter asteroids: the size of a synthetic wave
+        Precondition: asteroids is an int >= 0
+
+        Parameter name: the wave file played, or '' for a synthetic wave
+        Precondition: name is a string
+
+        Parameter interval: the number of ticks between checksums (0 for none)
+        Precondition: interval is an int in 0..65535
+        """
+        encoded = name.encode('utf-8')
+        self._header = (REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, interval,
+                                           seed, asteroids) +
+                        struct.pack('<H', len(encoded)) + encoded)
+        self._body = bytearray()
+        self._interval = interval
+        self._mask = 0
+        self._tick = 0
+
+    def record(self, wave, input):
+        """
+        Records the input of the tick that wave is about to play.
+
+        Parameter wave: the wave being recorded
+        Precondition: wave is a Simulation
+
+        Parameter input: the input for the tick
+        Precondition: input has a method is_key_down (e.g. GInput)
+        """
+        tick = wave.get_ticks()
+        if self._interval and tick % self._interval == 0:
+            self._write(tick, REPLAY_CHECKSUM)
+            self._body += struct.pack('<I', wave.checksum())
+        mask = key_mask(input)
+        if mask != self._mask:
+            self._write(tick, mask)
+            self._mask = mask
+
+    def finish(self, wave):
+        """
+        Returns the whole replay, ending at the current tick of wave.
+
+        Parameter wave: the wave being recorded
+        Precondition: wave is a Simulation
+        """
+        end = bytearray(self._body)
+        _write_varint(end, wave.get_ticks() - self._tick)
+        end.append(REPLAY_END)
+        return self._header + bytes(end)
+
+    def save(self, wave, filename):
+        """
+        Writes the replay, ending at the current tick of wave, to a file.
+
+        Parameter wave: the wave being recorded
+        Precondition: wave is a Simulation
+
+        Parameter filename: the file to write
+        Precondition: filename is a string naming a writable file
+        """
+        with open(filename, 'wb') as file:
+            file.write(self.finish(wave))
+
+    def _write(self, tick, tag):
+        """
+        Writes the start of a record.
+
+        Parameter tick: the tick of the record
+        Precondition: tick is an int >= the tick of the previous record
+
+        Parameter tag: the tag of the record
+        Precondition: tag is an int in 0..255
+        """
+        assert tick >= self._tick, 'tick %d is before tick %d' % (tick, self._tick)
+        _write_varint(self._body, tick - self._tick)
+        self._body.append(tag)
+        self._tick = tick
+
+
+class Replay(object):
+    """
+    A class holding a decoded replay.
+    """
+    # Attribute seed, asteroids, name: the wave (see ReplayRecorder)
+    # Invariant: seed and asteroids are ints, name is a string
+    #
+    # Attribute interval: the number of ticks between checksums (0 for none)
+    # Invariant: interval is an int >= 0
+    #
+    # Attribute changes: the ticks where the keys changed
+    # Invariant: changes is a sorted list of ints
+    #
+    # Attribute masks: the key mask from each tick in changes on
+    # Invariant: masks is a list of ints, as long as changes
+    #
+    # Attribute checksums: the checksum at the start of each checked tick
+    # Invariant: checksums is a dict mapping ticks to ints
+    #
+    # Attribute length: the number of ticks recorded
+    # Invariant: length is an int >= 0
+
+    def __init__(self, data):
+        """
+        Initializes a replay from the contents of a replay file.
+
+        Parameter data: the contents of a replay file
+        Precondition: data is a bytes object
+        """
+        if len(data) < REPLAY_HEADER.size + 2:
+            raise ValueError('replay is truncated')
+        (magic, version, self.interval, self.seed,
+         self.asteroids) = REPLAY_HEADER.unpack_from(data, 0)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError('not a replay (version %d)' % REPLAY_VERSION)
+        offset = REPLAY_HEADER.size
+        size = struct.unpack_from('<H', data, offset)[0]
+        offset += 2
+        self.name = data[offset:offset+size].decode('utf-8')
+        offset += size
+        self.changes = [0]
+        self.masks = [0]
+        self.checksums = {}
+        tick = 0
+        while True:
+            delta, offset = _read_varint(data, offset)
+            tick += delta
+            tag = data[offset]
+            offset += 1
+            if tag == REPLAY_END:
+                break
+            elif tag == REPLAY_CHECKSUM:
+                self.checksums[tick] = struct.unpack_from('<I', data, offset)[0]
+                offset += 4
+            else:
+                self.changes.append(tick)
+                self.masks.append(tag)
+        self.length = tick
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Returns the replay in a file.
+
+        Parameter filename: the replay file
+        Precondition: filename is a string naming a replay file
+        """
+        with open(filename, 'rb') as file:
+            return cls(file.read())
+
+    def keys(self, tick):
+        """
+        Returns the list of keys held down in the given tick.
+
+        Parameter tick: the tick
+        Precondition: tick is an int >= 0
+        """
+        index = bisect.bisect_right(self.changes, tick) - 1
+        return mask_keys(self.masks[index])
+
+    def make_wave(self):
+        """Returns a new headless Wave for the wave this replay was recorded on."""
+        if self.name:
+            path = find_wave(self.name)
+            if path is None:
+                raise IOError('wave file %s not found' % repr(self.name))
+            return Wave(WAVE_CACHE.load(path), headless=True)
+        return Wave(make_wave(self.asteroids, self.seed), headless=True)
+
+
+class ReplayPlayer(object):
+    """
+    A class that plays a replay back on a headless Wave.
+
+    The player can only move forward by playing ticks, but seek can go to any
+    tick: it starts from the last snapshot at or before that tick.
+    """
+    # Attribute _replay: the replay being played
+    # Invariant: _replay is a Replay
+    #
+    # Attribute _wave: the wave the replay is played on
+    # Invariant: _wave is a headless Wave
+    #
+    # Attribute _input: the input handed to the wave
+    # Invariant: _input is a ScriptedInput
+    #
+    # Attribute _verify: whether to compare the checksums
+    # Invariant: _verify is a bool
+    #
+    # Attribute _snapshots: the snapshots taken so far
+    # Invariant: _snapshots is a dict mapping ticks (multiples of
+    #            REPLAY_SNAPSHOT) to snapshots of _wave at that tick
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_wave(self):
+        """Returns the wave the replay is played on."""
+        return self._wave
+
+    def get_tick(self):
+        """Returns the current tick."""
+        return self._wave.get_ticks()
+
+    # INITIALIZER
+    def __init__(self, replay, verify=True):
+        """
+        Initializes a player at the start of a replay.
+
+        Parameter replay: the replay to play
+        Precondition: replay is a Replay
+
+        Parameter verify: whether to compare the checksums
+        Precondition: verify is a bool
+        """
+        self._replay = replay
+        self._verify = verify
+        self._wave = replay.make_wave()
+        self._input = ScriptedInput()
+        self._snapshots = {}
+        self._snapshot()
+
+    # ADDITIONAL METHODS
+    def step(self):
+        """
+        Plays the next tick of the replay.
+
+        This raises a ValueError if the checksum of the tick (if it has one)
+        does not match, or if the ship is destroyed before the end.
+        """
+        wave = self._wave
+        tick = wave.get_ticks()
+        if wave.is_lost():
+            raise ValueError('replay diverged at tick %d (ship destroyed)' % tick)
+        if self._verify:
+            expected = self._replay.checksums.get(tick)
+            if expected is not None and expected != wave.checksum():
+                raise ValueError('replay diverged at tick %d' % tick)
+        self._input.set_keys(self._replay.keys(tick))
+        wave.step(self._input)
+        if wave.get_ticks() % REPLAY_SNAPSHOT == 0:
+            self._snapshot()
+
+    def run(self, until=None):
+        """
+        Plays ticks until the given tick (or the end of the replay).
+
+        Parameter until: the tick to stop at, or None for the end
+        Precondition: until is an int in 0..length of the replay, or None
+        """
+        if until is None:
+            until = self._replay.length
+        while self._wave.get_ticks() < until:
+            self.step()
+
+    def seek(self, tick):
+        """
+        Moves to the start of the given tick.
+
+        Parameter tick: the tick to move to
+        Precondition: tick is an int in 0..length of the replay
+        """
+        start = (tick // REPLAY_SNAPSHOT) * REPLAY_SNAPSHOT
+        while start not in self._snapshots:
+            start -= REPLAY_SNAPSHOT
+        if not (start <= self._wave.get_ticks() <= tick):
+            self._wave.restore(self._snapshots[start])
+        self.run(tick)
+
+    # HELPER METHODS
+    def _snapshot(self):
+        """Keeps a snapshot of the wave at the current tick."""
+        self._snapshots[self._wave.get_ticks()] = self._wave.snapshot()
+
+
+# HELPER FUNCTIONS
+def _write_varint(buffer, value):
+    """
+    Appends an unsigned LEB128 varint to buffer.
+
+    Parameter buffer: the buffer to append to
+    Precondition: buffer is a bytearray
+
+    Parameter value: the value to write
+    Precondition: value is an int >= 0
+    """
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data, offset):
+    """
+    Returns the pair (value, offset after it) of the varint at offset.
+
+    Parameter data: the data to read from
+    Precondition: data is a bytes object
+
+    Parameter offset: the position of the varint
+    Precondition: offset is an int >= 0
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return (value, offset)
+        shift += 7
+
+
+def main(argv=None):
+    """
+    Plays a replay from the command line and returns the exit status.
+
+    Parameter argv: the command line arguments (None for sys.argv)
+    Precondition: argv is a list of strings or None
+    """
+    parser = argparse.ArgumentParser(description='Play back a Planetoids replay')
+    parser.add_argument('replay', help='the replay file')
+    parser.add_argument('--seek', type=int, help='stop at this tick')
+    parser.add_argument('--no-verify', action='store_true',
+                        help='do not compare the checksums')
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.replay)
+    player = ReplayPlayer(replay, not args.no_verify)
+    start = time.perf_counter()
+    try:
+        player.run(args.seek)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    wave = player.get_wave()
+    print('tick %d of %d in %.3f s (%.0f ticks/s): %d asteroids, %d destroyed%s'
+          % (player.get_tick(), replay.length, elapsed,
+             player.get_tick() / elapsed if elapsed else 0,
+             len(wave.get_asteroids()), wave.get_destroyed(),
+             ', ship destroyed' if wave.is_lost() else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
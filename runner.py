@@ -0,0 +1,149 @@
+"""
+Parallel batch runner for Planetoids
+
+This script plays many headless games of Wave at once, for balancing and for
+regression testing. Each run is a seeded synthetic wave (see bench.make_wave),
+or a wave file, played with either the scripted benchmark pattern or random
+keys from a seeded generator, until the wave is won or lost or a tick limit is
+reached. The runs are spread over a process pool, one run per task, and the
+results are written as they come in, one JSON object per line:
+
+    {"run": 0, "seed": 17, "outcome": "lost", "ticks": 812, "destroyed": 9, ...}
+
+Run it with
+
+    python runner.py --runs 5000 --asteroids 40 --policy random --output runs.jsonl
+
+Every worker process imports the game once and then only receives small job
+tuples, so the runs scale with the number of cores.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from wave import *
+from waves import *
+from bench import *
+from replay import *
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# The number of ticks a run may last before it counts as a timeout
+RUNNER_TICKS = 60 * TICK_RATE
+# The number of asteroids in each synthetic wave
+RUNNER_ASTEROIDS = 20
+# The number of ticks the random policy holds the same keys
+RUNNER_HOLD = 15
+# The input policies
+RUNNER_POLICIES = ('scripted', 'random')
+
+
+def play(job):
+    """
+    Returns a dict with the outcome of a single headless game.
+
+    The outcome is 'won' or 'lost' (from check_game_status, with is_won and
+    is_lost), or 'timeout' if the wave is still going after the tick limit.
+
+    Parameter job: the run number, the seed, the number of asteroids (ignored
+    if there is a wave file), the tick limit, the policy and the wave file
+    Precondition: job is a tuple (int, int, int, int, str, str or None), with
+    the policy one of RUNNER_POLICIES
+    """
+    index, seed, asteroids, limit, policy, path = job
+    start = time.perf_counter()
+    if path is None:
+        data = make_wave(asteroids, seed)
+    else:
+        data = WAVE_CACHE.load(path)
+    wave = Wave(data, headless=True)
+    rand = random.Random(seed)
+    input = ScriptedInput()
+    status = STATE_ACTIVE
+    while status == STATE_ACTIVE and wave.get_ticks() < limit:
+        tick = wave.get_ticks()
+        if policy == 'scripted':
+            input.set_keys(fire_pattern(tick))
+        elif tick % RUNNER_HOLD == 0:
+            input.set_keys(random_keys(rand))
+        wave.step(input)
+        status = wave.check_game_status()
+    if wave.is_lost():
+        outcome = 'lost'
+    elif wave.is_won():
+        outcome = 'won'
+    else:
+        outcome = 'timeout'
+    return {'run': index, 'seed': seed, 'outcome': outcome,
+            'ticks': wave.get_ticks(), 'destroyed': wave.get_destroyed(),
+            'asteroids': len(wave.get_asteroids()) + wave.get_pending(),
+            'seconds': time.perf_counter() - start}
+
+
+def jobs(args):
+    """
+    Yields the job tuples for the runs asked for on the command line.
+
+    Parameter args: the parsed command line
+    Precondition: args is an argparse.Namespace from main
+    """
+    for index in range(args.runs):
+        yield (index, args.seed + index, args.asteroids, args.ticks, args.policy,
+               args.wave)
+
+
+def main(argv=None):
+    """
+    Runs the batch from the command line and returns the exit status.
+
+    Parameter argv: the command line arguments (None for sys.argv)
+    Precondition: argv is a list of strings or None
+    """
+    parser = argparse.ArgumentParser(description='Play many headless Planetoids games')
+    parser.add_argument('--runs', type=int, default=100,
+                        help='the number of games to play')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed of the first game (the others count up)')
+    parser.add_argument('--asteroids', type=int, default=RUNNER_ASTEROIDS,
+                        help='the number of asteroids in each synthetic wave')
+    parser.add_argument('--ticks', type=int, default=RUNNER_TICKS,
+                        help='the tick limit of each game')
+    parser.add_argument('--policy', choices=RUNNER_POLICIES, default='random',
+                        help='how the ship is controlled')
+    parser.add_argument('--wave', help='play this wave file instead of synthetic waves')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='the number of worker processes')
+    parser.add_argument('--chunksize', type=int, default=4,
+                        help='the number of games sent to a worker at a time')
+    parser.add_argument('--output', help='the JSON lines file for the results '
+                        '(default: standard output)')
+    args = parser.parse_args(argv)
+    if args.wave is not None:
+        args.wave = find_wave(args.wave) or args.wave
+
+    file = open(args.output, 'w') if args.output else sys.stdout
+    counts = {'won': 0, 'lost': 0, 'timeout': 0}
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(args.workers) as pool:
+            for result in pool.map(play, jobs(args), chunksize=args.chunksize):
+                counts[result['outcome']] += 1
+                file.write(json.dumps(result) + '\n')
+                file.flush()
+    finally:
+        if file is not sys.stdout:
+            file.close()
+    elapsed = time.perf_counter() - start
+    print('%d runs in %.1f s (%.1f runs/s): %d won, %d lost, %d timeouts'
+          % (args.runs, elapsed, args.runs / elapsed if elapsed else 0,
+             counts['won'], counts['lost'], counts['timeout']), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
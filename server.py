@@ -0,0 +1,996 @@
+"""
+Multiplayer arena server for Planetoids
+
+This script hosts shared-arena matches: several players fly their ships in one
+wave (an Arena, from arena.py). The server is authoritative. It runs every match
+headlessly at TICK_RATE on an asyncio event loop, takes the keys of each player
+from their client, and sends every client the state of their match after each
+tick. Run it with
+
+    python server.py --port 7878 --asteroids 40
+    python server.py --loopback --seconds 5
+    python server.py --load-test --matches 1 2 4 8 16 --players 4
+
+The second form plays a match against a local client over the loopback
+interface and checks that the client sees what the server has. The third form
+fills a server with bot clients and reports how much of each tick the server
+spends on the matches, which says how many matches one core can serve.
+
+Every message is a uint32 length followed by that many bytes, little-endian,
+starting with a type byte:
+
+    MSG_WELCOME   server to client: the player id and the current tick
+    MSG_INPUT     client to server: the tick and the keys held down, as a key
+                  mask (see replay.key_mask; left 1, right 2, up 4, spacebar 8)
+    MSG_STATE     server to client: the tick, every ship, then the asteroids
+                  and bullets that changed and the ids of those removed
+
+The state is quantized (positions to 1/POSITION_SCALE of a pixel, velocities to
+1/VELOCITY_SCALE of a pixel per tick) and delta-compressed. A client predicts
+an object from the last record it got, moving it in a straight line, so the
+server only sends a record again when that prediction would be off by more
+than STATE_TOLERANCE pixels (or the velocity changed). Asteroids that drift on
+their own are sent once. Every client of a match gets the same messages, so
+the delta is computed and encoded once per match per tick.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from arena import *
+from waves import *
+from replay import *
+from bench import *
+import argparse
+import asyncio
+import random
+import struct
+import sys
+import time
+import numpy as np
+
+# The port the server listens on by default
+ARENA_PORT = 7878
+# The number of players in a match
+ARENA_PLAYERS = 4
+# The number of asteroids in each synthetic wave
+ARENA_ASTEROIDS = 40
+# The bytes that may wait to be sent to a client before it is dropped
+ARENA_BACKLOG = 1 << 20
+# The number of ticks the bot clients hold the same keys
+ARENA_HOLD = 15
+
+# The quantization steps per pixel of a position, and per pixel/tick of a velocity
+POSITION_SCALE = 16
+VELOCITY_SCALE = 256
+# The quantization steps per degree of a ship angle
+ANGLE_SCALE = 64
+# The largest error (in pixels) allowed in a client's prediction of an object
+STATE_TOLERANCE = 0.5
+
+# The message types
+MSG_WELCOME = 1
+MSG_INPUT = 2
+MSG_STATE = 3
+# The length prefix of every message
+FRAME = struct.Struct('<I')
+# The layouts of the messages (after the length)
+WELCOME = struct.Struct('<BII')
+INPUT = struct.Struct('<BIB')
+STATE = struct.Struct('<BIBHHHH')
+# The records of a MSG_STATE
+SHIP_RECORD = np.dtype([('player', '<u4'), ('alive', 'u1'), ('x', '<i2'),
+                        ('y', '<i2'), ('angle', '<i2')])
+ASTEROID_RECORD = np.dtype([('id', '<u4'), ('code', 'i1'), ('x', '<i2'),
+                            ('y', '<i2'), ('vx', '<i2'), ('vy', '<i2')])
+BULLET_RECORD = np.dtype([('id', '<u4'), ('x', '<i2'), ('y', '<i2'),
+                          ('vx', '<i2'), ('vy', '<i2')])
+REMOVAL_RECORD = np.dtype('<u4')
+
+
+def quantize(values, scale):
+    """
+    Returns values times scale, rounded and clipped to the range of an int16.
+
+    Parameter values: the values to quantize
+    Precondition: values is a float array
+
+    Parameter scale: the quantization steps per unit
+    Precondition: scale is a number > 0
+    """
+    return np.clip(np.round(values * scale), -32768, 32767).astype(np.int64)
+
+
+class DeltaEncoder(object):
+    """
+    A class that finds the asteroids or bullets a client's prediction gets wrong.
+
+    The encoder keeps the last record sent for every object (the baseline),
+    with the tick it was sent on. Each call of encode compares the state of the
+    current tick with the baseline moved forward in a straight line, exactly as
+    the clients do, and returns the records to send.
+
+    The objects are matched by id. The ids of an Arena are in increasing order,
+    so the baseline stays sorted and matching is a binary search.
+    """
+    # Attribute _ids: the id of every object in the baseline
+    # Invariant: _ids is a sorted int64 array
+    #
+    # Attribute _ticks: the tick each record was sent on
+    # Invariant: _ticks is an int64 array as long as _ids
+    #
+    # Attribute _x, _y, _vx, _vy: the quantized position and velocity sent
+    # Invariant: each is an int64 array as long as _ids
+    #
+    # Attribute _codes: the size code sent (0 for bullets)
+    # Invariant: _codes is an int64 array as long as _ids
+
+    def __init__(self):
+        """Initializes an encoder with an empty baseline."""
+        empty = np.zeros(0, dtype=np.int64)
+        self._ids = empty
+        self._ticks = empty
+        self._x = empty
+        self._y = empty
+        self._vx = empty
+        self._vy = empty
+        self._codes = empty
+
+    def encode(self, tick, ids, bodies):
+        """
+        Returns a tuple (changed, removed) of index and id arrays to send.
+
+        changed are the rows of bodies whose record must be sent again (or for
+        the first time), and removed are the ids of the objects that are gone.
+        The baseline is updated as if they were sent.
+
+        Parameter tick: the tick of the state
+        Precondition: tick is an int > every tick encoded before
+
+        Parameter ids: the id of every row of bodies
+        Precondition: ids is a sorted int64 array as long as bodies
+
+        Parameter bodies: the asteroids or bullets
+        Precondition: bodies is a Bodies object
+        """
+        x = quantize(bodies.x, POSITION_SCALE)
+        y = quantize(bodies.y, POSITION_SCALE)
+        vx = quantize(bodies.vx, VELOCITY_SCALE)
+        vy = quantize(bodies.vy, VELOCITY_SCALE)
+        codes = bodies.size.astype(np.int64)
+
+        old = self._ids
+        index = np.minimum(np.searchsorted(old, ids), max(len(old) - 1, 0))
+        if len(old):
+            found = old[index] == ids
+            age = (tick - self._ticks[index]) * (POSITION_SCALE / VELOCITY_SCALE)
+            limit = STATE_TOLERANCE * POSITION_SCALE
+            good = (found & (self._vx[index] == vx) & (self._vy[index] == vy) &
+                    (self._codes[index] == codes) &
+                    (np.abs(self._x[index] + self._vx[index] * age - x) <= limit) &
+                    (np.abs(self._y[index] + self._vy[index] * age - y) <= limit))
+            removed = old[~np.isin(old, ids, assume_unique=True)]
+        else:
+            good = np.zeros(len(ids), dtype=bool)
+            removed = old
+
+        self._ids = ids
+        if len(old):
+            self._ticks = np.where(good, self._ticks[index], tick)
+            self._x = np.where(good, self._x[index], x)
+            self._y = np.where(good, self._y[index], y)
+            self._vx = vx
+            self._vy = vy
+            self._codes = codes
+        else:
+            self._ticks = np.full(len(ids), tick, dtype=np.int64)
+            self._x = x
+            self._y = y
+            self._vx = vx
+            self._vy = vy
+            self._codes = codes
+        return (np.nonzero(~good)[0], removed)
+
+    def records(self, dtype, rows=None, tick=None):
+        """
+        Returns the baseline records of the given rows, as an array of dtype.
+
+        If tick is given, each record is moved forward to that tick (rounded to
+        the nearest step), for a client that starts from it.
+
+        Parameter dtype: the record layout
+        Precondition: dtype is ASTEROID_RECORD or BULLET_RECORD
+
+        Parameter rows: the rows of the baseline
+        Precondition: rows is an int array of baseline rows, or None for all
+
+        Parameter tick: the tick to move the records to, or None
+        Precondition: tick is None or an int >= every tick in the baseline
+        """
+        if rows is None:
+            rows = np.arange(len(self._ids))
+        x = self._x[rows]
+        y = self._y[rows]
+        if tick is not None:
+            age = (tick - self._ticks[rows]) * (POSITION_SCALE / VELOCITY_SCALE)
+            x = np.round(x + self._vx[rows] * age)
+            y = np.round(y + self._vy[rows] * age)
+        result = np.zeros(len(rows), dtype=dtype)
+        result['id'] = self._ids[rows]
+        result['x'] = x
+        result['y'] = y
+        result['vx'] = self._vx[rows]
+        result['vy'] = self._vy[rows]
+        if 'code' in dtype.names:
+            result['code'] = self._codes[rows]
+        return result
+
+
+class DeltaDecoder(object):
+    """
+    A class that rebuilds the asteroids or bullets from the records a client gets.
+
+    It keeps the last record of every object with the tick it came on, and
+    predicts the positions at any later tick by moving in a straight line.
+    """
+    # Attribute _records: the last record of every object, sorted by id
+    # Invariant: _records is an array of ASTEROID_RECORD or BULLET_RECORD
+    #
+    # Attribute _ticks: the tick each record came on
+    # Invariant: _ticks is an int64 array as long as _records
+
+    def __init__(self, dtype):
+        """
+        Initializes a decoder with no objects.
+
+        Parameter dtype: the record layout
+        Precondition: dtype is ASTEROID_RECORD or BULLET_RECORD
+        """
+        self._records = np.zeros(0, dtype=dtype)
+        self._ticks = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        """Returns the number of objects."""
+        return len(self._records)
+
+    def apply(self, tick, changed, removed):
+        """
+        Replaces the records of changed objects, and drops removed ones.
+
+        Parameter tick: the tick of the message
+        Precondition: tick is an int
+
+        Parameter changed: the records that came in the message
+        Precondition: changed is an array of the record layout
+
+        Parameter removed: the ids of the objects that are gone
+        Precondition: removed is an array of ids
+        """
+        ids = self._records['id']
+        keep = ~(np.isin(ids, removed) | np.isin(ids, changed['id']))
+        records = np.concatenate([self._records[keep], changed])
+        ticks = np.concatenate([self._ticks[keep],
+                                np.full(len(changed), tick, dtype=np.int64)])
+        order = np.argsort(records['id'], kind='stable')
+        self._records = records[order]
+        self._ticks = ticks[order]
+
+    def get_ids(self):
+        """Returns the ids of the objects, in increasing order."""
+        return self._records['id'].astype(np.int64)
+
+    def positions(self, tick):
+        """
+        Returns a tuple (x, y) of arrays with the predicted positions in pixels.
+
+        Parameter tick: the tick to predict
+        Precondition: tick is an int >= every tick applied
+        """
+        records = self._records
+        age = tick - self._ticks
+        x = records['x'] / POSITION_SCALE + records['vx'] * age / VELOCITY_SCALE
+        y = records['y'] / POSITION_SCALE + records['vy'] * age / VELOCITY_SCALE
+        return (x, y)
+
+
+def frame(payload):
+    """
+    Returns payload with its length in front, ready to write.
+
+    Parameter payload: the message
+    Precondition: payload is a bytes object
+    """
+    return FRAME.pack(len(payload)) + payload
+
+
+async def read_message(reader, limit=None):
+    """
+    Returns the next message from reader (without its length), or None at the end.
+
+    The length comes from the other side, so a server reading from clients
+    should give a limit: a longer (or empty) message is not read, and None is
+    returned as if the connection had ended.
+
+    Parameter reader: the stream to read
+    Precondition: reader is an asyncio.StreamReader
+
+    Parameter limit: the longest message accepted, or None for no limit
+    Precondition: limit is None or an int > 0
+    """
+    try:
+        size = FRAME.unpack(await reader.readexactly(FRAME.size))[0]
+        if size == 0 or (limit is not None and size > limit):
+            return None
+        return await reader.readexactly(size)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+
+
+class Match(object):
+    """
+    A class running one arena and sending its state to the clients in it.
+
+    When the wave is won, the match starts it again with the same players.
+    """
+    # Attribute _data: the wave played
+    # Invariant: _data is a CompiledWave
+    #
+    # Attribute _arena: the arena being played
+    # Invariant: _arena is an Arena
+    #
+    # Attribute _capacity: the most players in the match
+    # Invariant: _capacity is an int in 1..ARENA_SLOTS
+    #
+    # Attribute _clients: the stream to each player's client
+    # Invariant: _clients is a dict mapping player ids to asyncio.StreamWriter
+    #
+    # Attribute _asteroids, _bullets: the delta encoders of the objects
+    # Invariant: _asteroids and _bullets are DeltaEncoder objects
+    #
+    # Attribute _tick: the number of ticks played, over every restart
+    # Invariant: _tick is an int >= 0
+    #
+    # Attribute _sent: the number of bytes sent so far
+    # Invariant: _sent is an int >= 0
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_arena(self):
+        """Returns the arena being played."""
+        return self._arena
+
+    def get_tick(self):
+        """Returns the number of ticks played (the arena's count restarts)."""
+        return self._tick
+
+    def get_sent(self):
+        """Returns the number of bytes sent to the clients so far."""
+        return self._sent
+
+    def is_full(self):
+        """Returns True if no more players can join."""
+        return len(self._clients) >= self._capacity
+
+    def is_empty(self):
+        """Returns True if every player has left."""
+        return not self._clients
+
+    # INITIALIZER
+    def __init__(self, data, capacity=ARENA_PLAYERS):
+        """
+        Initializes a match with no players.
+
+        Parameter data: the wave to play
+        Precondition: data is a CompiledWave
+
+        Parameter capacity: the most players in the match
+        Precondition: capacity is an int in 1..ARENA_SLOTS
+        """
+        self._data = data
+        self._arena = Arena(data)
+        self._capacity = capacity
+        self._clients = {}
+        self._asteroids = DeltaEncoder()
+        self._bullets = DeltaEncoder()
+        self._tick = 0
+        self._sent = 0
+
+    def join(self, id, writer):
+        """
+        Adds a player, and sends their client the welcome and the whole state.
+
+        Parameter id: the number of the player
+        Precondition: id is an int >= 0 not in any match
+
+        Parameter writer: the stream to the client
+        Precondition: writer is an asyncio.StreamWriter
+        """
+        used = set(player.slot for player in self._arena.get_players())
+        slot = min(set(range(ARENA_SLOTS)) - used)
+        self._arena.add_player(id, slot)
+        self._clients[id] = writer
+        tick = self._tick
+        message = (frame(WELCOME.pack(MSG_WELCOME, id, tick)) +
+                   frame(self._state(tick,
+                                     self._asteroids.records(ASTEROID_RECORD, tick=tick),
+                                     np.zeros(0, dtype=REMOVAL_RECORD),
+                                     self._bullets.records(BULLET_RECORD, tick=tick),
+                                     np.zeros(0, dtype=REMOVAL_RECORD))))
+        writer.write(message)
+        self._sent += len(message)
+
+    def leave(self, id):
+        """
+        Removes a player.
+
+        Parameter id: the number of the player
+        Precondition: id is an int (nothing happens if it is not in the match)
+        """
+        self._arena.remove_player(id)
+        self._clients.pop(id, None)
+
+    def set_mask(self, id, mask):
+        """
+        Sets the keys a player is holding down, from a key mask.
+
+        Parameter id: the number of the player
+        Precondition: id is an int
+
+        Parameter mask: the keys held down
+        Precondition: mask is an int in 0..15
+        """
+        self._arena.set_keys(id, mask_keys(mask))
+
+    def tick(self):
+        """
+        Plays one tick and sends the changes to every client.
+
+        Clients that have fallen more than ARENA_BACKLOG bytes behind are
+        dropped, so one slow client cannot hold up the server.
+        """
+        arena = self._arena
+        if arena.is_won():
+            self._restart()
+            arena = self._arena
+        arena.step()
+        self._tick += 1
+        tick = self._tick
+        rocks = arena.get_asteroids()
+        shots = arena.get_bullets()
+        changed, removed = self._asteroids.encode(tick, arena.get_ids(rocks), rocks)
+        asteroids = self._asteroids.records(ASTEROID_RECORD, changed)
+        removed_asteroids = removed.astype(REMOVAL_RECORD)
+        changed, removed = self._bullets.encode(tick, arena.get_ids(shots), shots)
+        bullets = self._bullets.records(BULLET_RECORD, changed)
+        removed_bullets = removed.astype(REMOVAL_RECORD)
+        message = frame(self._state(tick, asteroids, removed_asteroids, bullets,
+                                    removed_bullets))
+        for id, writer in list(self._clients.items()):
+            if writer.transport.get_write_buffer_size() > ARENA_BACKLOG:
+                writer.close()
+                self.leave(id)
+                continue
+            writer.write(message)
+            self._sent += len(message)
+
+    def _restart(self):
+        """
+        Starts the wave again with the same players, in the same slots.
+
+        The new asteroids get new ids, so the clients are sent the removal of
+        every old object and the records of the new ones.
+        """
+        old = self._arena
+        self._arena = Arena(self._data, old.get_next_id())
+        for player in old.get_players():
+            self._arena.add_player(player.id, player.slot)
+
+    def _state(self, tick, asteroids, removed_asteroids, bullets, removed_bullets):
+        """
+        Returns a MSG_STATE with every ship and the given records.
+
+        Parameter tick: the tick of the state
+        Precondition: tick is an int >= 0
+
+        Parameter asteroids, bullets: the records to send
+        Precondition: arrays of ASTEROID_RECORD and BULLET_RECORD
+
+        Parameter removed_asteroids, removed_bullets: the ids of removed objects
+        Precondition: arrays of REMOVAL_RECORD
+        """
+        players = self._arena.get_players()
+        ships = np.zeros(len(players), dtype=SHIP_RECORD)
+        for k, player in enumerate(players):
+            ships[k]['player'] = player.id
+            ship = player.ship
+            if ship is not None:
+                ships[k]['alive'] = 1
+                ships[k]['x'] = round(ship.x * POSITION_SCALE)
+                ships[k]['y'] = round(ship.y * POSITION_SCALE)
+                ships[k]['angle'] = round(ship.angle % 360 * ANGLE_SCALE)
+        header = STATE.pack(MSG_STATE, tick, len(ships), len(asteroids),
+                            len(removed_asteroids), len(bullets), len(removed_bullets))
+        return b''.join([header, ships.tobytes(), asteroids.tobytes(),
+                         removed_asteroids.tobytes(), bullets.tobytes(),
+                         removed_bullets.tobytes()])
+
+
+class ArenaServer(object):
+    """
+    A class that accepts clients and runs their matches at a fixed tick.
+
+    A client joins the first match with room, or a new one. All matches are
+    ticked together by run, on the same event loop as the connections.
+    """
+    # Attribute _data: the wave every match plays
+    # Invariant: _data is a CompiledWave
+    #
+    # Attribute _players: the number of players in a match
+    # Invariant: _players is an int in 1..ARENA_SLOTS
+    #
+    # Attribute _matches: the matches being played
+    # Invariant: _matches is a list of Match objects
+    #
+    # Attribute _next_player: the id of the next player to join
+    # Invariant: _next_player is an int >= 0
+    #
+    # Attribute _server: the listening server, once started
+    # Invariant: _server is an asyncio.Server, or None
+    #
+    # Attribute _ticks, _busy, _late: the ticks run, the seconds spent running
+    #            matches, and the number of ticks that ran over their time
+    # Invariant: _ticks and _late are ints >= 0, _busy is a float >= 0
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_matches(self):
+        """Returns the list of matches being played."""
+        return self._matches
+
+    def get_port(self):
+        """Returns the port the server listens on (None if not started)."""
+        if self._server is None:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    def get_stats(self):
+        """
+        Returns a dict with the ticks run, the seconds spent running matches,
+        and the number of ticks that ran over their time.
+        """
+        return {'ticks': self._ticks, 'busy': self._busy, 'late': self._late}
+
+    # INITIALIZER
+    def __init__(self, data, players=ARENA_PLAYERS):
+        """
+        Initializes a server with no matches.
+
+        Parameter data: the wave every match plays
+        Precondition: data is a CompiledWave
+
+        Parameter players: the number of players in a match
+        Precondition: players is an int in 1..ARENA_SLOTS
+        """
+        self._data = data
+        self._players = players
+        self._matches = []
+        self._next_player = 0
+        self._server = None
+        self._ticks = 0
+        self._busy = 0.0
+        self._late = 0
+
+    async def start(self, host='127.0.0.1', port=ARENA_PORT):
+        """
+        Starts listening for clients (port 0 picks any free port).
+
+        Parameter host: the address to listen on
+        Precondition: host is a string
+
+        Parameter port: the port to listen on
+        Precondition: port is an int in 0..65535
+        """
+        self._server = await asyncio.start_server(self._serve, host, port)
+
+    async def stop(self):
+        """Stops listening for clients."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def run(self, seconds=None):
+        """
+        Ticks every match TICK_RATE times a second, for the given time.
+
+        A tick that starts late is still run, but at most MAX_TICKS are run to
+        catch up before the rest are dropped.
+
+        Parameter seconds: how long to run, or None to run forever
+        Precondition: seconds is None or a number > 0
+        """
+        loop = asyncio.get_running_loop()
+        step = 1 / TICK_RATE
+        start = loop.time()
+        deadline = start + step
+        while seconds is None or loop.time() - start < seconds:
+            behind = 0
+            while loop.time() >= deadline and behind < MAX_TICKS:
+                began = time.perf_counter()
+                for match in list(self._matches):
+                    match.tick()
+                self._busy += time.perf_counter() - began
+                self._ticks += 1
+                deadline += step
+                behind += 1
+            if behind > 1:
+                self._late += behind - 1
+            if loop.time() >= deadline:
+                deadline = loop.time() + step
+            await asyncio.sleep(max(0, deadline - loop.time()))
+
+    async def _serve(self, reader, writer):
+        """
+        Plays a client's connection: joins a match, then reads its keys.
+
+        The connection is dropped at the first message that is not a valid
+        input message, and a match is ended when its last player leaves.
+
+        Parameter reader, writer: the streams of the connection
+        Precondition: reader and writer are asyncio streams
+        """
+        match = None
+        for candidate in self._matches:
+            if not candidate.is_full():
+                match = candidate
+                break
+        if match is None:
+            match = Match(self._data, self._players)
+            self._matches.append(match)
+        id = self._next_player
+        self._next_player += 1
+        try:
+            match.join(id, writer)
+            while True:
+                message = await read_message(reader, INPUT.size)
+                if (message is None or len(message) != INPUT.size or
+                        message[0] != MSG_INPUT):
+                    break
+                match.set_mask(id, INPUT.unpack(message)[2])
+        finally:
+            match.leave(id)
+            if match.is_empty() and match in self._matches:
+                self._matches.remove(match)
+            writer.close()
+
+
+class ArenaClient(object):
+    """
+    A class for the client side of a connection to an ArenaServer.
+
+    It keeps the state of the match up to date from the messages it receives,
+    and sends the keys of the player.
+    """
+    # Attribute _reader, _writer: the streams of the connection
+    # Invariant: _reader and _writer are asyncio streams
+    #
+    # Attribute _player: the player id given by the server
+    # Invariant: _player is an int, or None before the welcome
+    #
+    # Attribute _tick: the tick of the last state received
+    # Invariant: _tick is an int >= 0
+    #
+    # Attribute _ships: the last record of every ship
+    # Invariant: _ships is an array of SHIP_RECORD
+    #
+    # Attribute _asteroids, _bullets: the objects of the match
+    # Invariant: _asteroids and _bullets are DeltaDecoder objects
+    #
+    # Attribute _received: the number of bytes received so far
+    # Invariant: _received is an int >= 0
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_player(self):
+        """Returns the player id given by the server (None before the welcome)."""
+        return self._player
+
+    def get_tick(self):
+        """Returns the tick of the last state received."""
+        return self._tick
+
+    def get_ships(self):
+        """Returns the ship records of the last state received."""
+        return self._ships
+
+    def get_asteroids(self):
+        """Returns the DeltaDecoder with the asteroids."""
+        return self._asteroids
+
+    def get_bullets(self):
+        """Returns the DeltaDecoder with the bullets."""
+        return self._bullets
+
+    def get_received(self):
+        """Returns the number of bytes received so far."""
+        return self._received
+
+    # INITIALIZER
+    def __init__(self, reader, writer):
+        """
+        Initializes a client on an open connection (use connect instead).
+
+        Parameter reader, writer: the streams of the connection
+        Precondition: reader and writer are asyncio streams
+        """
+        self._reader = reader
+        self._writer = writer
+        self._player = None
+        self._tick = 0
+        self._ships = np.zeros(0, dtype=SHIP_RECORD)
+        self._asteroids = DeltaDecoder(ASTEROID_RECORD)
+        self._bullets = DeltaDecoder(BULLET_RECORD)
+        self._received = 0
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=ARENA_PORT):
+        """
+        Returns a client connected to the server at host and port.
+
+        Parameter host: the address of the server
+        Precondition: host is a string
+
+        Parameter port: the port of the server
+        Precondition: port is an int in 1..65535
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def receive(self):
+        """
+        Reads and applies the next message. Returns False once disconnected.
+        """
+        message = await read_message(self._reader)
+        if message is None:
+            return False
+        self._received += FRAME.size + len(message)
+        if message[0] == MSG_WELCOME:
+            _, self._player, self._tick = WELCOME.unpack(message)
+        elif message[0] == MSG_STATE:
+            self._apply(message)
+        return True
+
+    def send_keys(self, keys):
+        """
+        Tells the server which keys are held down.
+
+        Parameter keys: the keys held down
+        Precondition: keys is an iterable of REPLAY_KEYS
+        """
+        mask = key_mask(ScriptedInput(keys))
+        self._writer.write(frame(INPUT.pack(MSG_INPUT, self._tick, mask)))
+
+    async def close(self):
+        """Closes the connection."""
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    def _apply(self, message):
+        """
+        Applies a MSG_STATE.
+
+        Parameter message: the message
+        Precondition: message is a MSG_STATE (without its length)
+        """
+        (_, tick, ships, asteroids, removed_asteroids, bullets,
+         removed_bullets) = STATE.unpack_from(message, 0)
+        offset = STATE.size
+        parts = []
+        for dtype, count in ((SHIP_RECORD, ships), (ASTEROID_RECORD, asteroids),
+                             (REMOVAL_RECORD, removed_asteroids),
+                             (BULLET_RECORD, bullets), (REMOVAL_RECORD, removed_bullets)):
+            parts.append(np.frombuffer(message, dtype=dtype, count=count,
+                                       offset=offset))
+            offset += count * dtype.itemsize
+        self._tick = tick
+        self._ships = parts[0]
+        self._asteroids.apply(tick, parts[1], parts[2])
+        self._bullets.apply(tick, parts[3], parts[4])
+
+
+def prediction_error(match, client):
+    """
+    Returns the largest distance (in pixels) between an object and the client's
+    prediction of it, or infinity if the client has the wrong objects.
+
+    Parameter match: the match on the server
+    Precondition: match is a Match
+
+    Parameter client: a client of the match, up to date with its current tick
+    Precondition: client is an ArenaClient
+    """
+    worst = 0.0
+    arena = match.get_arena()
+    tick = match.get_tick()
+    for bodies, decoder in ((arena.get_asteroids(), client.get_asteroids()),
+                            (arena.get_bullets(), client.get_bullets())):
+        ids = arena.get_ids(bodies)
+        if len(ids) != len(decoder) or (ids != decoder.get_ids()).any():
+            return float('inf')
+        if len(ids):
+            x, y = decoder.positions(tick)
+            worst = max(worst, float(np.abs(x - bodies.x).max()),
+                        float(np.abs(y - bodies.y).max()))
+    return worst
+
+
+async def bot(client, seed, stop):
+    """
+    Plays a client with random keys until stop is set or it is disconnected.
+
+    Parameter client: the client to play
+    Precondition: client is a connected ArenaClient
+
+    Parameter seed: the seed for the random keys
+    Precondition: seed is an int
+
+    Parameter stop: the signal to stop
+    Precondition: stop is an asyncio.Event
+    """
+    rand = random.Random(seed)
+    held = None
+    while not stop.is_set() and await client.receive():
+        if held is None or client.get_tick() // ARENA_HOLD != held:
+            held = client.get_tick() // ARENA_HOLD
+            client.send_keys(random_keys(rand))
+
+
+async def loopback(data, seconds):
+    """
+    Plays a match against one local client, and returns a dict describing it.
+
+    After the match, the client's prediction of every object is compared with
+    the server's state.
+
+    Parameter data: the wave to play
+    Precondition: data is a CompiledWave
+
+    Parameter seconds: how long to play
+    Precondition: seconds is a number > 0
+    """
+    server = ArenaServer(data, 1)
+    await server.start(port=0)
+    client = await ArenaClient.connect(port=server.get_port())
+    playing = asyncio.ensure_future(bot(client, 0, asyncio.Event()))
+    await server.run(seconds)
+    match = server.get_matches()[0]
+    arena = match.get_arena()
+    while client.get_tick() < match.get_tick():
+        await asyncio.sleep(0.01)
+    error = prediction_error(match, client)
+    await client.close()
+    await playing
+    await server.stop()
+    ticks = match.get_tick()
+    return {'ticks': ticks, 'error': error, 'bytes': client.get_received(),
+            'bytes_per_tick': client.get_received() / max(1, ticks),
+            'asteroids': len(arena.get_asteroids()),
+            'bullets': len(arena.get_bullets())}
+
+
+async def load_test(data, matches, players, seconds):
+    """
+    Runs a server with matches full matches of bots, and returns a dict of stats.
+
+    The bots run on the same event loop (and core) as the server, so only the
+    time the server spends running matches counts toward its load.
+
+    Parameter data: the wave to play
+    Precondition: data is a CompiledWave
+
+    Parameter matches: the number of matches
+    Precondition: matches is an int > 0
+
+    Parameter players: the number of players in a match
+    Precondition: players is an int in 1..ARENA_SLOTS
+
+    Parameter seconds: how long to play
+    Precondition: seconds is a number > 0
+    """
+    server = ArenaServer(data, players)
+    await server.start(port=0)
+    clients = []
+    for _ in range(matches * players):
+        clients.append(await ArenaClient.connect(port=server.get_port()))
+    while len(server.get_matches()) < matches:
+        await asyncio.sleep(0.01)
+    stop = asyncio.Event()
+    bots = [asyncio.ensure_future(bot(client, seed, stop))
+            for seed, client in enumerate(clients)]
+    await server.run(seconds)
+    sent = sum(match.get_sent() for match in server.get_matches())
+    stop.set()
+    for client in clients:
+        await client.close()
+    await asyncio.gather(*bots, return_exceptions=True)
+    await server.stop()
+    stats = server.get_stats()
+    ticks = max(1, stats['ticks'])
+    per_tick = stats['busy'] / ticks
+    return {'matches': matches, 'players': players, 'ticks': stats['ticks'],
+            'late': stats['late'], 'tick_ms': per_tick * 1000,
+            'match_ms': per_tick * 1000 / matches,
+            'load': per_tick * TICK_RATE,
+            'capacity': int(1 / (TICK_RATE * per_tick / matches)) if per_tick else 0,
+            'client_kbps': sent / (matches * players) / ticks * TICK_RATE / 1000}
+
+
+def main(argv=None):
+    """
+    Runs the server (or the loopback check, or the load test) from the command
+    line and returns the exit status.
+
+    Parameter argv: the command line arguments (None for sys.argv)
+    Precondition: argv is a list of strings or None
+    """
+    parser = argparse.ArgumentParser(description='Host Planetoids arena matches')
+    parser.add_argument('--host', default='127.0.0.1', help='the address to listen on')
+    parser.add_argument('--port', type=int, default=ARENA_PORT,
+                        help='the port to listen on')
+    parser.add_argument('--players', type=int, default=ARENA_PLAYERS,
+                        help='the number of players in a match')
+    parser.add_argument('--asteroids', type=int, default=ARENA_ASTEROIDS,
+                        help='the number of asteroids in a synthetic wave')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed of the synthetic wave')
+    parser.add_argument('--wave', help='play this wave file instead of a synthetic wave')
+    parser.add_argument('--loopback', action='store_true',
+                        help='play one match against a local client and check it')
+    parser.add_argument('--load-test', action='store_true',
+                        help='fill the server with bots and measure the load')
+    parser.add_argument('--matches', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='the numbers of matches for the load test')
+    parser.add_argument('--seconds', type=float, default=5,
+                        help='how long the loopback check or each load test runs')
+    args = parser.parse_args(argv)
+
+    if args.wave is None:
+        data = CompiledWave.from_dict(make_wave(args.asteroids, args.seed))
+    else:
+        path = find_wave(args.wave)
+        if path is None:
+            print('wave file %s not found' % repr(args.wave), file=sys.stderr)
+            return 1
+        data = WAVE_CACHE.load(path)
+
+    if args.loopback:
+        result = asyncio.run(loopback(data, args.seconds))
+        print('%d ticks, %d asteroids, %d bullets: %.1f bytes/tick, '
+              'largest prediction error %.3f px'
+              % (result['ticks'], result['asteroids'], result['bullets'],
+                 result['bytes_per_tick'], result['error']))
+        return 0 if result['error'] <= STATE_TOLERANCE + 1 / POSITION_SCALE else 1
+    if args.load_test:
+        for matches in args.matches:
+            result = asyncio.run(load_test(data, matches, args.players, args.seconds))
+            print('%3d matches x %d players: %7.3f ms/tick (%.3f ms/match, '
+                  '%3.0f%% of a tick), %d late ticks, %.1f kB/s per client, '
+                  'about %d matches per core'
+                  % (matches, args.players, result['tick_ms'], result['match_ms'],
+                     result['load'] * 100, result['late'], result['client_kbps'],
+                     result['capacity']))
+        return 0
+
+    async def serve():
+        server = ArenaServer(data, args.players)
+        await server.start(args.host, args.port)
+        print('listening on %s:%d' % (args.host, server.get_port()))
+        await server.run()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1119 @@
+"""
+Simulation core for Planetoids
+
+This module contains the game rules for a single wave, with no drawing at all.
+It does not import game2d (or Kivy), so a wave can be created and stepped on a
+machine without a window: in tests, in benchmarks, or on a server. The class
+Wave in wave.py extends Simulation with the GObject models that draw it.
+
+The positions of the asteroids and bullets live in the array backend from
+physics.py. The ship is a single object, so it is a plain ShipBody instead.
+
+Like models.py, this module is only allowed to access consts.py (and the other
+model-level modules physics.py, collisions.py and status.py).
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from physics import *
+from collisions import *
+from waves import *
+from status import *
+import introcs
+import math
+import struct
+import zlib
+import numpy as np
+
+# The first bytes of every snapshot
+SNAPSHOT_MAGIC = b'PLSS'
+# The version of the snapshot format
+SNAPSHOT_VERSION = 1
+# The layout of a snapshot header: magic, version, whether there is a ship,
+# ticks, fire rate, asteroids spawned, asteroids destroyed, accumulator, the
+# size of the wave data, the number of asteroids and bullets, and the ship
+SNAPSHOT_HEADER = struct.Struct('<4sHHqqqqdIII9d')
+
+
+class ShipBody(object):
+    """
+    A class representing the state of the player ship, without an image.
+
+    This holds everything the rules need to know about the ship: its position,
+    velocity, angle and facing vector. The ship is turned and thrusted through
+    methods, exactly like the Ship model used to be. The Ship model in models.py
+    is now only used to draw a ShipBody.
+
+    Velocities and facing vectors are returned as (x, y) tuples.
+    """
+    # Attribute x: the x-coordinate of the ship's center
+    # Invariant: x is a number (int or float)
+    #
+    # Attribute y: the y-coordinate of the ship's center
+    # Invariant: y is a number (int or float)
+    #
+    # Attribute angle: the angle of the ship in degrees
+    # Invariant: angle is a number in the range [0, 360)
+    #
+    # Attribute _px, _py: the position of the ship at the last save
+    # Invariant: _px and _py are numbers (int or float)
+    #
+    # Attribute _vx, _vy: the velocity of the ship (pixels per tick)
+    # Invariant: _vx and _vy are floats, and the speed is <= SHIP_MAX_SPEED
+    #
+    # Attribute _fx, _fy: the unit vector the ship is facing
+    # Invariant: _fx and _fy are floats with _fx**2 + _fy**2 == 1
+    __slots__ = ('x', 'y', 'angle', '_px', '_py', '_vx', '_vy', '_fx', '_fy')
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_velocity(self):
+        """Returns the current velocity of the ship as an (x, y) tuple."""
+        return (self._vx, self._vy)
+
+    def get_facing(self):
+        """Returns the current facing vector of the ship as an (x, y) tuple."""
+        return (self._fx, self._fy)
+
+    def get_radius(self):
+        """Returns the radius of the ship."""
+        return SHIP_RADIUS
+
+    def get_state(self):
+        """
+        Returns the whole state of the ship as a tuple of 9 floats.
+
+        The tuple is (x, y, saved x, saved y, angle, velocity x, velocity y,
+        facing x, facing y).
+        """
+        return (self.x, self.y, self._px, self._py, self.angle,
+                self._vx, self._vy, self._fx, self._fy)
+
+    def set_state(self, state):
+        """
+        Sets the whole state of the ship.
+
+        Parameter state: the new state
+        Precondition: state is a tuple returned by get_state
+        """
+        (self.x, self.y, self._px, self._py, self.angle,
+         self._vx, self._vy, self._fx, self._fy) = state
+
+    # INITIALIZER TO CREATE A NEW SHIP
+    def __init__(self, x, y, angle):
+        """
+        Initializes a new ship at rest with the given position and angle.
+
+        Parameter x: The horizontal position of the ship's center.
+        Precondition: x is a number (int or float)
+
+        Parameter y: The vertical position of the ship's center.
+        Precondition: y is a number (int or float)
+
+        Parameter angle: The angle of the ship in degrees, measured
+        counterclockwise from the positive x-axis.
+        Precondition: angle is a number (int or float)
+        """
+        self.x = x
+        self.y = y
+        self._px = x
+        self._py = y
+        self.angle = angle
+        self._vx = 0.0
+        self._vy = 0.0
+        self._fx, self._fy = heading(angle % 360)
+
+    # ADDITIONAL METHODS (MOVEMENT, COLLISIONS, ETC)
+    def turn(self, turn_angle):
+        """
+        Turns the ship by the given angle and updates the facing vector.
+
+        Parameter turn_angle: The degree to which the ship turns, expressed as
+        an angle.
+        Precondition: turn_angle must be an int or float.
+        """
+        self.angle = (self.angle + turn_angle) % 360
+        self._fx, self._fy = heading(self.angle)
+
+    def shipImpulse(self):
+        """Changes the speed (thrust) of the ship based on user input."""
+        vx = self._vx + self._fx * SHIP_IMPULSE
+        vy = self._vy + self._fy * SHIP_IMPULSE
+        speed = math.sqrt(vx*vx + vy*vy)
+        if speed > SHIP_MAX_SPEED:
+            vx = vx / speed * SHIP_MAX_SPEED
+            vy = vy / speed * SHIP_MAX_SPEED
+        self._vx = vx
+        self._vy = vy
+
+    def move(self):
+        """Changes the position of the ship based on velocity."""
+        self.x += self._vx
+        self.y += self._vy
+
+    def wrap(self):
+        """Wraps the ship around the screen edges."""
+        # Horizontal wrapping:
+        if self.x - SHIP_RADIUS < -DEAD_ZONE:
+            self.x += WRAP_WIDTH
+        elif self.x + SHIP_RADIUS > GAME_WIDTH + DEAD_ZONE:
+            self.x -= WRAP_WIDTH
+        # Vertical wrapping:
+        if self.y + SHIP_RADIUS < -DEAD_ZONE:
+            self.y += WRAP_HEIGHT
+        elif self.y - SHIP_RADIUS > GAME_HEIGHT + DEAD_ZONE:
+            self.y -= WRAP_HEIGHT
+
+    def save(self):
+        """Remembers the current position (call before a tick)."""
+        self._px = self.x
+        self._py = self.y
+
+    def lerp(self, alpha):
+        """
+        Returns the (x, y) position alpha of the way from the saved position.
+
+        If the ship wrapped since the save, this is the current position.
+
+        Parameter alpha: how far past the saved position to go
+        Precondition: alpha is a number in [0, 1]
+        """
+        dx = self.x - self._px
+        dy = self.y - self._py
+        if abs(dx) > WRAP_WIDTH/2 or abs(dy) > WRAP_HEIGHT/2:
+            return (self.x, self.y)
+        return (self._px + dx * alpha, self._py + dy * alpha)
+
+
+class BulletBody(object):
+    """
+    A class representing a single bullet, without an image.
+
+    This has the same initializer, getters and reset method as the Bullet model,
+    but keeps only the numbers a bullet needs in __slots__ (no GEllipse and no
+    attribute dict). get_velocity builds the Vector2 when asked, so none is
+    stored. A bullet moves like a row of Bodies, and is culled (not wrapped)
+    once it is no longer inside.
+    """
+    # Attribute x, y: the center of the bullet
+    # Invariant: x and y are numbers (int or float)
+    #
+    # Attribute _vx, _vy: the velocity of the bullet (pixels per tick)
+    # Invariant: _vx and _vy are numbers (int or float)
+    __slots__ = ('x', 'y', '_vx', '_vy')
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_velocity(self):
+        """Returns the velocity vector of the bullet."""
+        return introcs.Vector2(self._vx, self._vy)
+
+    def get_radius(self):
+        """Returns the radius of the bullet."""
+        return BULLET_RADIUS
+
+    # INITIALIZER TO SET THE POSITION AND VELOCITY
+    def __init__(self, position, velocity):
+        """
+        Initializes a new bullet with the given position and velocity.
+
+        Parameter position: contains the x and y coordinates of the center
+        Precondition: position is a sequence of two numbers
+
+        Parameter velocity: the velocity of the bullet
+        Precondition: velocity is a Vector2 object
+        """
+        self.reset(position, velocity)
+
+    # ADDITIONAL METHODS
+    def reset(self, position, velocity):
+        """
+        Reuses this bullet for a new shot, as if it was just created.
+
+        Parameter position: contains the x and y coordinates of the center
+        Precondition: position is a sequence of two numbers
+
+        Parameter velocity: the velocity of the bullet
+        Precondition: velocity is a Vector2 object
+        """
+        self.x = position[0]
+        self.y = position[1]
+        self._vx = velocity.x
+        self._vy = velocity.y
+
+    def move(self):
+        """Adds the velocity of the bullet to its position."""
+        self.x += self._vx
+        self.y += self._vy
+
+    def inside(self):
+        """Returns True if the center is inside the dead zone (see Bodies.inside)."""
+        return (-DEAD_ZONE < self.x < GAME_WIDTH + DEAD_ZONE and
+                -DEAD_ZONE < self.y < GAME_HEIGHT + DEAD_ZONE)
+
+
+class AsteroidBody(object):
+    """
+    A class representing a single asteroid, without an image.
+
+    This has the same initializer, getters and reset method as the Asteroid
+    model, and computes the same velocity, but keeps only the numbers an
+    asteroid needs in __slots__. The size is stored as a size code, which also
+    gives the radius. An asteroid moves and wraps like a row of Bodies.
+    """
+    # Attribute x, y: the center of the asteroid
+    # Invariant: x and y are numbers (int or float)
+    #
+    # Attribute _vx, _vy: the velocity of the asteroid (pixels per tick)
+    # Invariant: _vx and _vy are floats
+    #
+    # Attribute _code: the size code of the asteroid
+    # Invariant: _code is one of SMALL_CODE, MEDIUM_CODE or LARGE_CODE
+    __slots__ = ('x', 'y', '_vx', '_vy', '_code')
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_velocity(self):
+        """Returns the velocity vector of the asteroid."""
+        return introcs.Vector2(self._vx, self._vy)
+
+    def get_size(self):
+        """Returns the size of the asteroid ('small', 'medium' or 'large')."""
+        return ASTEROID_SIZES[self._code]
+
+    def get_radius(self):
+        """Returns the radius of the asteroid based on its size."""
+        return ASTEROID_RADII[self._code]
+
+    # INITIALIZER TO CREATE A NEW ASTEROID
+    def __init__(self, size, position, direction):
+        """
+        Initializes a new asteroid with the given size, position and direction.
+
+        Parameter size: the size of the asteroid
+        Precondition: size is 'small', 'medium' or 'large'
+
+        Parameter position: contains the x and y coordinates of the center
+        Precondition: position is a sequence of two numbers
+
+        Parameter direction: the direction the asteroid moves in
+        Precondition: direction is a sequence of two numbers
+        """
+        self.reset(size, position, direction)
+
+    # ADDITIONAL METHODS
+    def reset(self, size, position, direction):
+        """
+        Reuses this asteroid for a new one, as if it was just created.
+
+        Parameter size: the size of the asteroid
+        Precondition: size is 'small', 'medium' or 'large'
+
+        Parameter position: contains the x and y coordinates of the center
+        Precondition: position is a sequence of two numbers
+
+        Parameter direction: the direction the asteroid moves in
+        Precondition: direction is a sequence of two numbers
+        """
+        self._code = size_code(size)
+        self._vx, self._vy = asteroid_velocity(direction, self._code)
+        self.x = position[0]
+        self.y = position[1]
+
+    def move(self):
+        """Adds the velocity of the asteroid to its position."""
+        self.x += self._vx
+        self.y += self._vy
+
+    def wrap(self):
+        """Wraps the center to the opposite side once it leaves the dead zone."""
+        if self.x < -DEAD_ZONE:
+            self.x += WRAP_WIDTH
+        elif self.x > GAME_WIDTH + DEAD_ZONE:
+            self.x -= WRAP_WIDTH
+        if self.y < -DEAD_ZONE:
+            self.y += WRAP_HEIGHT
+        elif self.y > GAME_HEIGHT + DEAD_ZONE:
+            self.y -= WRAP_HEIGHT
+
+
+class Simulation(object):
+    """
+    This class plays a single wave of Planetoids without drawing anything.
+
+    It has all of the rules of the game: moving the ship, asteroids and bullets,
+    firing, collisions, breaking asteroids and deciding whether the player won or
+    lost. It only needs an input object with the method is_key_down(key), such as
+    a GInput or a ScriptedInput.
+
+    The rules advance in fixed ticks of 1/TICK_RATE seconds (see step), so the
+    game plays the same at any frame rate and a run is reproducible from its
+    inputs. The method update turns the time of a rendered frame into zero or
+    more ticks, and get_alpha says how far the frame is between the last two
+    ticks, for drawing.
+
+    Asteroids with a spawn time in the wave data are not built until their tick
+    comes, so a wave only ever holds the asteroids that are in play.
+
+    Every change to the asteroids or the ship is reported to a StatusTracker
+    (see get_status), which keeps the counts that decide the outcome. Code that
+    needs to react to a change, such as a win/lose message, subscribes to it
+    there instead of checking every tick.
+
+    Subclasses can attach a view (a model object that draws it) to each asteroid
+    and bullet by overriding the hooks _make_asteroid_view and _make_bullet_view,
+    and can recycle the views of removed objects by overriding _free_views.
+    Wave does this. By default there are no views.
+    """
+    # Attribute _data: The data from the wave JSON, for reloading
+    # Invariant: _data is a CompiledWave
+    #
+    # Attribute _ship: The player ship to control
+    # Invariant: _ship is a ShipBody object, or None if the ship was destroyed
+    #
+    # Attribute _asteroids: the asteroids on screen
+    # Invariant: _asteroids is a Bodies object
+    #
+    # Attribute _bullets: the bullets currently on screen
+    # Invariant: _bullets is a Bodies object
+    #
+    # Attribute _firerate: the number of ticks until the player can fire again
+    # Invariant: _firerate is an int >= 0
+    #
+    # Attribute _accumulator: the frame time not yet simulated, in seconds
+    # Invariant: _accumulator is a float >= 0 and < 1/TICK_RATE after update
+    #
+    # Attribute _ticks: the number of ticks simulated so far
+    # Invariant: _ticks is an int >= 0
+    #
+    # Attribute _spawned: the number of asteroids of _data spawned so far
+    # Invariant: _spawned is an int in 0..len(_data); they are the first ones
+    #
+    # Attribute _destroyed: the number of asteroids hit by bullets so far
+    # Invariant: _destroyed is an int >= 0
+    #
+    # Attribute _status: the live asteroid counts and the outcome of the wave
+    # Invariant: _status is a StatusTracker matching _asteroids, _ship, _spawned
+    #
+    # Attribute _grid: the broadphase grid used to find collision candidates
+    # Invariant: _grid is a SpatialHash object, rebuilt by process_collisions
+    #
+    # Attribute _sweep: the broadphase for asteroids bouncing off each other
+    # Invariant: _sweep is a SweepAndPrune, or None if _data.bounce is False
+    #
+    # Attribute _profiler: the profiler recording each phase of update
+    # Invariant: _profiler is a FrameProfiler, or None if profiling is off
+    #
+    # Attribute _recorder: the recorder logging the input of every tick
+    # Invariant: _recorder is a ReplayRecorder, or None if not recording
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_profiler(self):
+        """Returns the frame profiler, or None if profiling is off."""
+        return self._profiler
+
+    def set_profiler(self, profiler):
+        """
+        Sets the frame profiler that update reports its phases to.
+
+        Parameter profiler: the profiler to use, or None to turn profiling off
+        Precondition: profiler is a FrameProfiler or None
+        """
+        self._profiler = profiler
+
+    def get_recorder(self):
+        """Returns the replay recorder, or None if not recording."""
+        return self._recorder
+
+    def set_recorder(self, recorder):
+        """
+        Sets the recorder that step reports the input of every tick to.
+
+        Parameter recorder: the recorder to use, or None to stop recording
+        Precondition: recorder is a ReplayRecorder or None
+        """
+        self._recorder = recorder
+
+    def get_status(self):
+        """Returns the StatusTracker counting the asteroids and lives."""
+        return self._status
+
+    def get_ship(self):
+        """Returns the ship (a ShipBody), or None if it was destroyed."""
+        return self._ship
+
+    def get_asteroids(self):
+        """Returns the Bodies object holding the asteroids."""
+        return self._asteroids
+
+    def get_bullets(self):
+        """Returns the Bodies object holding the bullets."""
+        return self._bullets
+
+    def get_ticks(self):
+        """Returns the number of ticks simulated so far."""
+        return self._ticks
+
+    def get_destroyed(self):
+        """Returns the number of asteroids hit by bullets so far."""
+        return self._destroyed
+
+    def get_pending(self):
+        """Returns the number of asteroids that have not spawned yet."""
+        return len(self._data) - self._spawned
+
+    def get_alpha(self):
+        """
+        Returns how far the current frame is past the last tick, from 0 to 1.
+
+        Views should be drawn this far between the positions before and after
+        the last tick.
+        """
+        return self._accumulator * TICK_RATE
+
+    def is_won(self):
+        """Returns True if every asteroid has spawned and been destroyed."""
+        return self._status.is_won()
+
+    def is_lost(self):
+        """Returns True if the ship has been destroyed."""
+        return self._status.is_lost()
+
+    # INITIALIZER (standard form) TO CREATE SHIP AND ASTEROIDS
+    def __init__(self, save_level):
+        """
+        Initializes a wave from the data of a wave JSON file.
+
+        The data is either the dict from the JSON file, with a 'ship' entry (a
+        dict with a 'position' and an 'angle') and an 'asteroids' entry (a list
+        of dicts with a 'size', 'position' and 'direction'), or the same wave
+        already compiled. A compiled wave is loaded with a few array copies.
+        Only the asteroids that spawn at the start are built here.
+
+        Parameter save_level: the wave data
+        Precondition: save_level is a dict loaded from a wave JSON file, or a
+        CompiledWave
+        """
+        if not isinstance(save_level, CompiledWave):
+            save_level = CompiledWave.from_dict(save_level)
+        self._data = save_level
+        x, y, angle = save_level.ship
+        self._ship = ShipBody(x, y, angle)
+        self._asteroids = Bodies()
+        self._bullets = Bodies()
+        self._firerate = 0
+        self._accumulator = 0.0
+        self._ticks = 0
+        self._spawned = 0
+        self._destroyed = 0
+        self._status = StatusTracker(len(save_level))
+        self._grid = SpatialHash()
+        self._sweep = SweepAndPrune() if save_level.bounce else None
+        self._profiler = None
+        self._recorder = None
+        self.spawn_asteroids()
+
+    # UPDATE METHOD TO MOVE THE SHIP, ASTEROIDS, AND BULLETS
+    def update(self, input, dt):
+        """
+        This method handles the changes that take place when the game is
+        continuing (in the STATE_ACTIVE)
+
+        The frame time dt is added to an accumulator, and the game advances one
+        step for every full tick in it. At most MAX_TICKS steps are taken per
+        frame; if the frame took longer than that, the rest of it is dropped so
+        a slow frame cannot make the next one slower. The input is read once per
+        step.
+
+        Parameter input: detects and performs keyboard and mouse activities
+        based on user input
+        Precondtion: input has a method is_key_down (e.g. GInput)
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float) >= 0
+        """
+        tick = 1 / TICK_RATE
+        self._accumulator += dt
+        steps = 0
+        while self._accumulator >= tick:
+            if steps == MAX_TICKS:
+                self._accumulator = 0.0
+                break
+            self.step(input)
+            self._accumulator -= tick
+            steps += 1
+
+    def step(self, input):
+        """
+        Advances the game by exactly one tick.
+
+        Parameter input: detects and performs keyboard and mouse activities
+        based on user input
+        Precondtion: input has a method is_key_down (e.g. GInput)
+        """
+        if self._ship is None:
+            return
+        if self._recorder is not None:
+            self._recorder.record(self, input)
+        self.begin_tick()
+        if self._profiler is not None:
+            self._profiled_step(input)
+            return
+        self.handle_turning(input)
+        self.handle_firing(input)
+        self.move_bullets()
+        self.bullets_to_use()
+        self.move_ship()
+        self.process_collisions()
+        self.move_asteroids()
+        self.check_game_status()
+
+    def begin_tick(self):
+        """
+        Starts a new tick, before any of the phases of step.
+
+        This counts the tick, saves the positions of the ship, asteroids and
+        bullets (so they can be interpolated and swept over the tick), and adds
+        the asteroids that spawn in it. Anything that runs the phases of step
+        by itself (like bench.py) must call this first.
+        """
+        self._ticks += 1
+        self._ship.save()
+        self._asteroids.save()
+        self._bullets.save()
+        self.spawn_asteroids()
+
+    def _profiled_step(self, input):
+        """
+        Does the same as step, but reports every phase to the profiler.
+
+        This is a separate method so that step pays nothing for profiling
+        when it is off. Firing is charged to the bullets phase.
+
+        Parameter input: detects and performs keyboard and mouse activities
+        based on user input
+        Precondtion: input has a method is_key_down (e.g. GInput)
+        """
+        profiler = self._profiler
+        profiler.skip()
+        self.handle_turning(input)
+        profiler.mark('turning')
+        self.handle_firing(input)
+        self.move_bullets()
+        self.bullets_to_use()
+        profiler.mark('bullets')
+        self.move_ship()
+        profiler.mark('ship')
+        self.process_collisions()
+        profiler.mark('collisions')
+        self.move_asteroids()
+        profiler.mark('asteroids')
+        self.check_game_status()
+        profiler.mark('status')
+        profiler.count(len(self._asteroids), len(self._bullets))
+
+    # RESET METHOD FOR CREATING A NEW LIFE
+    def reset_ship(self):
+        """
+        Replaces the ship with a new one at its starting position and angle.
+
+        The asteroids and bullets are left as they are.
+        """
+        x, y, angle = self._data.ship
+        self._ship = ShipBody(x, y, angle)
+        self._status.set_lives(1)
+
+    # HELPER METHODS FOR PHYSICS AND COLLISION DETECTION
+    def handle_turning(self, input):
+        """"
+        This method handles the movement of the ship using the user input
+
+        Parameter input: detects and performs keyboard and mouse activities
+        based on user input
+        Precondtion: input has a method is_key_down (e.g. GInput)
+        """
+        turn_angle = 0
+        if input.is_key_down('left'):
+            turn_angle += SHIP_TURN_RATE
+        if input.is_key_down('right'):
+            turn_angle -= SHIP_TURN_RATE
+        if turn_angle != 0:
+            self._ship.turn(turn_angle)
+        if input.is_key_down('up'):
+            self._ship.shipImpulse()
+
+    def handle_firing(self, input):
+        """
+        Fires a bullet if the spacebar is down and the ship is ready to fire.
+
+        Parameter input: detects and performs keyboard and mouse activities
+        based on user input
+        Precondtion: input has a method is_key_down (e.g. GInput)
+        """
+        if self._firerate >= BULLET_RATE and input.is_key_down('spacebar'):
+            self.bullet_release()
+            self._firerate = 0
+        else:
+            self._firerate += 1
+
+    def move_bullets(self):
+        """Adds the velocity of every bullet to its position."""
+        self._bullets.integrate()
+
+    def move_ship(self):
+        """Moves the ship by its velocity and wraps it around the screen edges."""
+        self._ship.move()
+        self._ship.wrap()
+
+    def move_asteroids(self):
+        """
+        Moves every asteroid by its velocity and wraps it around the screen edges.
+
+        If the wave makes asteroids bounce, they bounce off each other after moving.
+        """
+        self._asteroids.integrate()
+        self._asteroids.wrap()
+        if self._sweep is not None:
+            self.bounce_asteroids()
+
+    def bounce_asteroids(self):
+        """
+        Makes every pair of touching asteroids bounce off each other.
+
+        The bounce is elastic, with the mass of an asteroid proportional to its
+        area. Only pairs that are moving toward each other bounce, so asteroids
+        that still overlap after a bounce (or the pieces of a broken asteroid,
+        which start out overlapping) simply drift apart. An asteroid touching
+        several others gets the sum of the bounces.
+        """
+        rocks = self._asteroids
+        x = rocks.x
+        y = rocks.y
+        radius = rocks.radius
+        i, j = self._sweep.pairs(x, y, radius)
+        if not len(i):
+            return
+        nx = x[j] - x[i]
+        ny = y[j] - y[i]
+        nx -= WRAP_WIDTH * np.round(nx / WRAP_WIDTH)
+        ny -= WRAP_HEIGHT * np.round(ny / WRAP_HEIGHT)
+        distance = np.sqrt(nx * nx + ny * ny)
+        distance[distance == 0] = np.inf
+        nx /= distance
+        ny /= distance
+        vx = rocks.vx
+        vy = rocks.vy
+        closing = (vx[j] - vx[i]) * nx + (vy[j] - vy[i]) * ny
+        mass_i = radius[i] * radius[i]
+        mass_j = radius[j] * radius[j]
+        impulse = np.where(closing < 0,
+                           -2 * closing / (1 / mass_i + 1 / mass_j), 0)
+        np.add.at(vx, i, -impulse / mass_i * nx)
+        np.add.at(vy, i, -impulse / mass_i * ny)
+        np.add.at(vx, j, impulse / mass_j * nx)
+        np.add.at(vy, j, impulse / mass_j * ny)
+
+    def snapshot(self):
+        """
+        Returns the whole state of the wave as bytes.
+
+        The state is everything that changes during the wave: the ship, the
+        asteroid and bullet arrays, the fire rate and the tick counters. The
+        wave data itself (and any views) are not included, so a snapshot can
+        only be restored into a wave made from the same data.
+        """
+        ship = self._ship
+        if ship is None:
+            state = (0.0,) * 9
+        else:
+            state = ship.get_state()
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                      ship is not None, self._ticks, self._firerate,
+                                      self._spawned, self._destroyed,
+                                      self._accumulator, len(self._data),
+                                      len(self._asteroids), len(self._bullets),
+                                      *state)
+        return header + self._asteroids.dump() + self._bullets.dump()
+
+    def restore(self, buffer):
+        """
+        Puts the wave back in the state of a snapshot.
+
+        The views of the current asteroids and bullets are freed, and new ones
+        are made for the restored ones (if this wave has views).
+
+        Parameter buffer: the snapshot
+        Precondition: buffer is bytes returned by snapshot on a wave made from
+        the same wave data
+        """
+        fields = SNAPSHOT_HEADER.unpack_from(buffer, 0)
+        (magic, version, has_ship, ticks, firerate, spawned, destroyed,
+         accumulator, size, asteroids, bullets) = fields[:11]
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError('not a snapshot (version %d)' % SNAPSHOT_VERSION)
+        if size != len(self._data):
+            raise ValueError('snapshot is of a different wave')
+        if has_ship:
+            if self._ship is None:
+                self._ship = ShipBody(0, 0, 0)
+            self._ship.set_state(fields[11:])
+        else:
+            self._ship = None
+        self._ticks = ticks
+        self._firerate = firerate
+        self._spawned = spawned
+        self._destroyed = destroyed
+        self._accumulator = accumulator
+
+        codes = self._asteroids.size.tolist()
+        self._free_views(self._asteroids.clear(), codes)
+        self._free_views(self._bullets.clear(), None)
+        if self._sweep is not None:
+            self._sweep.clear()
+        offset = self._asteroids.load(buffer, SNAPSHOT_HEADER.size, asteroids)
+        self._bullets.load(buffer, offset, bullets)
+        if self._wants_views():
+            rocks = self._asteroids
+            self._asteroids.set_views(
+                [self._make_asteroid_view(code, (x, y), (vx, vy)) for
+                 code, x, y, vx, vy in zip(rocks.size.tolist(), rocks.x.tolist(),
+                                           rocks.y.tolist(), rocks.vx.tolist(),
+                                           rocks.vy.tolist())])
+            shots = self._bullets
+            self._bullets.set_views(
+                [self._make_bullet_view((x, y), (vx, vy)) for
+                 x, y, vx, vy in zip(shots.x.tolist(), shots.y.tolist(),
+                                     shots.vx.tolist(), shots.vy.tolist())])
+        self._status.reset(self._asteroids.size.tolist(), len(self._data) - spawned,
+                           1 if has_ship else 0)
+
+    def checksum(self):
+        """
+        Returns a CRC-32 of the game state.
+
+        Two waves with the same checksum are (almost certainly) in the same
+        state, so replays use this to notice when a run has diverged.
+        """
+        ship = self._ship
+        if ship is None:
+            crc = zlib.crc32(struct.pack('<qq', self._ticks, self._firerate))
+        else:
+            vx, vy = ship.get_velocity()
+            crc = zlib.crc32(struct.pack('<qq5d', self._ticks, self._firerate,
+                                         ship.x, ship.y, ship.angle, vx, vy))
+        for bodies in (self._asteroids, self._bullets):
+            for array in (bodies.x, bodies.y, bodies.vx, bodies.vy, bodies.size):
+                crc = zlib.crc32(np.ascontiguousarray(array), crc)
+        return crc
+
+    def spawn_asteroids(self):
+        """
+        Adds the asteroids whose spawn tick has come.
+        """
+        data = self._data
+        if self._spawned == len(data):
+            return
+        start = self._spawned
+        end = int(np.searchsorted(data.ticks, self._ticks, side='right'))
+        if end > start:
+            self._spawned = end
+            self._add_asteroids(data.sizes[start:end], data.positions[start:end],
+                                data.directions[start:end])
+
+    def bullets_to_use(self):
+        """
+        This method is a procedure that updates the bullets left to use after
+        some bullets have been fired.
+        """
+        self._free_views(self._bullets.keep(self._bullets.inside()), None)
+
+    def bullet_release(self):
+        """
+        This method is a procedure that handles the release of a bullet
+        """
+        facing_x, facing_y = self._ship.get_facing()
+        position = (self._ship.x + (facing_x * SHIP_RADIUS), self._ship.y +
+                   (facing_y* SHIP_RADIUS))
+        velocity = (facing_x * BULLET_SPEED, facing_y * BULLET_SPEED)
+        view = self._make_bullet_view(position, velocity)
+        self._bullets.add(position[0], position[1], velocity[0], velocity[1],
+                          BULLET_RADIUS, view=view)
+
+    def process_collisions(self):
+        """
+        This method is a procedure that processes all the collisions
+        that happens in the game. Asteroid-Ship collision, bullet-asteroid
+        collision.
+
+        The asteroids are bucketed into a spatial hash first, so each bullet
+        (and the ship) is only tested against the asteroids in nearby cells.
+        Each bullet destroys at most one asteroid, and each asteroid breaks
+        at most once per frame.
+
+        Bullets are tested along their whole path over the tick, so a fast
+        bullet cannot skip over an asteroid between two ticks. The asteroids
+        have not moved yet this tick, so they are swept over their previous
+        move (ending where they are now). A bullet that could hit several
+        asteroids hits the one it reaches first.
+        """
+        if self.is_lost():
+            return
+        rocks = self._asteroids
+        shots = self._bullets
+        ax = rocks.x.tolist()
+        ay = rocks.y.tolist()
+        ar = rocks.radius.tolist()
+        avx = rocks.vx.tolist()
+        avy = rocks.vy.tolist()
+        grid = self._grid
+        grid.clear()
+        for i in range(len(ax)):
+            grid.insert(i, ax[i], ay[i])
+        bullets_to_remove = set()
+        asteroids_to_remove = set()
+        bx = shots.x.tolist()
+        by = shots.y.tolist()
+        bdx, bdy = shots.displacement()
+        bdx = bdx.tolist()
+        bdy = bdy.tolist()
+        for j in range(len(bx)):
+            x0 = bx[j] - bdx[j]
+            y0 = by[j] - bdy[j]
+            hit = None
+            first = 1
+            for i in grid.along(x0, y0, bx[j], by[j]):
+                if i in asteroids_to_remove:
+                    continue
+                t = time_of_impact(x0 - ax[i] + avx[i], y0 - ay[i] + avy[i],
+                                   bdx[j] - avx[i], bdy[j] - avy[i],
+                                   ar[i] + BULLET_RADIUS)
+                if t is not None and t < first:
+                    hit = i
+                    first = t
+            if hit is not None:
+                bullets_to_remove.add(j)
+                asteroids_to_remove.add(hit)
+                self._break_asteroid(hit, (float(shots.vx[j]),
+                                           float(shots.vy[j])))
+        self._destroyed += len(bullets_to_remove)
+        codes = rocks.size.tolist()
+        self._collide_ships(ax, ay, codes, asteroids_to_remove)
+        if bullets_to_remove:
+            self._free_views(shots.remove(bullets_to_remove), None)
+        if asteroids_to_remove:
+            removed = [codes[i] for i in sorted(asteroids_to_remove)]
+            if self._sweep is not None:
+                self._sweep.remove(asteroids_to_remove, len(ax))
+            self._free_views(rocks.remove(asteroids_to_remove), removed)
+            self._status.remove(removed)
+
+    def _collide_ships(self, ax, ay, codes, asteroids_to_remove):
+        """
+        Destroys the ship if it touches an asteroid, and breaks that asteroid.
+
+        This is the second half of process_collisions. The asteroid grid has
+        already been built, and the asteroids hit by bullets are already in
+        asteroids_to_remove (they cannot hit the ship as well).
+
+        Parameter ax, ay: the centers of the asteroids
+        Precondition: ax and ay are lists of floats, indexed by row
+
+        Parameter codes: the size codes of the asteroids
+        Precondition: codes is a list of size codes, indexed by row
+
+        Parameter asteroids_to_remove: the rows of the asteroids to remove
+        Precondition: asteroids_to_remove is a set of rows (added to here)
+        """
+        ship = self._ship
+        for i in self._grid.nearby(ship.x, ship.y):
+            if (i not in asteroids_to_remove and
+                touches(ax[i], ay[i], codes[i], ship.x, ship.y, SHIP_KIND)):
+                asteroids_to_remove.add(i)
+                self._ship = None
+                self._status.set_lives(0)
+                self._break_asteroid(i, ship.get_velocity())
+                break
+
+    def check_game_status(self):
+        """
+        Returns STATE_COMPLETE if the wave is over, and STATE_ACTIVE otherwise.
+
+        The wave is over once the ship is destroyed or every asteroid is gone.
+        Use is_won and is_lost to tell which.
+        """
+        return self._status.get_state()
+
+    def _break_asteroid(self, index, collision_vector):
+        """
+        Adds the smaller asteroids resulting from a collision to the wave.
+
+        This helper function is used to break the asteroid after collision.
+        Large asteroid produces 3 medium asteroids, medium asteroid produces
+        3 small asteroids after collision. Small asteroids produce nothing.
+        The broken asteroid itself is not removed.
+
+        Parameter index: the row of the asteroid that collided with either
+        ship or bullet
+        Precondition: index is a valid row of _asteroids
+
+        Parameter collision_vector: velocity of object colliding with asteroid
+        Precondition: collision_vector is an (x, y) tuple of numbers
+        """
+        rocks = self._asteroids
+        code = int(rocks.size[index])
+        if code == SMALL_CODE:
+            return
+        new_code = code - 1
+        new_radius = ASTEROID_RADII[new_code]
+        speed = ASTEROID_SPEEDS[new_code]
+        x = float(rocks.x[index])
+        y = float(rocks.y[index])
+
+        # The pieces go in the direction of the hit, rotated by SPLIT_ROTATIONS
+        cx, cy = collision_vector
+        magnitude = math.sqrt(cx*cx + cy*cy)
+        if magnitude == 0:
+            ux, uy = 1.0, 0.0
+        else:
+            ux, uy = cx / magnitude, cy / magnitude
+        views = self._wants_views()
+        for cos, sin in SPLIT_ROTATIONS:
+            dx = ux * cos - uy * sin
+            dy = ux * sin + uy * cos
+            new_x = x + new_radius * dx
+            new_y = y + new_radius * dy
+            view = None
+            if views:
+                view = self._make_asteroid_view(new_code, (new_x, new_y), (dx, dy))
+            rocks.add(new_x, new_y, dx * speed, dy * speed, new_radius, new_code,
+                      view)
+        self._status.add([new_code] * len(SPLIT_ROTATIONS))
+
+    def _add_asteroids(self, codes, positions, directions):
+        """
+        Adds many new asteroids (and their views, if any) to the wave at once.
+
+        These are asteroids of the wave data coming into play, so they are
+        reported to the status tracker as spawned.
+
+        Parameter codes: the size code of each asteroid
+        Precondition: codes is an int array of length n
+
+        Parameter positions: the center of each asteroid
+        Precondition: positions is a float array of shape (n, 2)
+
+        Parameter directions: the direction each asteroid moves in
+        Precondition: directions is a float array of shape (n, 2)
+        """
+        codes = np.asarray(codes, dtype=np.int8)
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        directions = np.asarray(directions, dtype=float).reshape(-1, 2)
+        vx, vy = asteroid_velocities(directions, codes)
+        radius = np.take(np.array(ASTEROID_RADII, dtype=float), codes)
+        views = None
+        if self._wants_views():
+            views = [self._make_asteroid_view(code, position, direction)
+                     for code, position, direction in
+                     zip(codes.tolist(), positions.tolist(), directions.tolist())]
+        self._asteroids.extend(positions[:, 0], positions[:, 1], vx, vy,
+                               radius, codes, views)
+        self._status.spawn(codes.tolist())
+
+    # VIEW HOOKS (OVERRIDDEN BY WAVE)
+    def _wants_views(self):
+        """Returns True if the asteroids and bullets need views."""
+        return False
+
+    def _make_asteroid_view(self, code, position, direction):
+        """
+        Returns the object that draws a new asteroid, or None for no view.
+
+        Parameter code: the size code of the asteroid
+        Precondition: code is one of SMALL_CODE, MEDIUM_CODE or LARGE_CODE
+
+        Parameter position: contains the x and y coordinates of the center
+        Precondition: position is a sequence of two numbers
+
+        Parameter direction: the direction the asteroid moves in
+        Precondition: direction is a sequence of two numbers
+        """
+        return None
+
+    def _make_bullet_view(self, position, velocity):
+        """
+        Returns the object that draws a new bullet, or None for no view.
+
+        Parameter position: contains the x and y coordinates of the center
+        Precondition: position is a sequence of two numbers
+
+        Parameter velocity: the velocity of the bullet
+        Precondition: velocity is an (x, y) tuple of numbers
+        """
+        return None
+
+    def _free_views(self, views, codes):
+        """
+        Called with the views of objects that were just removed from the wave.
+
+        The views are no longer drawn, so they can be reused.
+
+        Parameter views: the views of the removed objects (entries may be None)
+        Precondition: views is a list
+
+        Parameter codes: the size code of each removed asteroid, or None if
+        the views are bullets
+        Precondition: codes is None or a list of size codes as long as views
+        """
+        pass
+
+
+class ScriptedInput(object):
+    """
+    A stand-in for GInput that reports a scripted set of keys.
+
+    This lets a Simulation (or a headless Wave) run without a window. The driver
+    calls set_keys once per frame with the keys that are held down in that
+    frame. Like GInput, a key is pressed in a frame if it is down in that frame
+    but was not down in the previous one.
+    """
+    # Attribute _keys: the keys held down in this frame
+    # Invariant: _keys is a frozenset of key names (strings)
+    #
+    # Attribute _previous: the keys held down in the previous frame
+    # Invariant: _previous is a frozenset of key names (strings)
+
+    def __init__(self, keys=()):
+        """
+        Initializes the input with the given keys held down.
+
+        Parameter keys: the keys held down in the first frame
+        Precondition: keys is an iterable of key names (e.g. 'left', 'spacebar')
+        """
+        self._keys = frozenset(keys)
+        self._previous = frozenset()
+
+    def set_keys(self, keys):
+        """
+        Advances to the next frame, with the given keys held down.
+
+        Parameter keys: the keys held down in the new frame
+        Precondition: keys is an iterable of key names
+        """
+        self._previous = self._keys
+        self._keys = frozenset(keys)
+
+    def is_key_down(self, key):
+        """
+        Returns True if the key is held down in this frame.
+
+        Parameter key: the key to check
+        Precondition: key is a string
+        """
+        return key in self._keys
+
+    def is_key_pressed(self, key):
+        """
+        Returns True if the key went down in this frame.
+
+        Parameter key: the key to check
+        Precondition: key is a string
+        """
+        return key in self._keys and not key in self._previous
@@ -0,0 +1,280 @@
+"""
+Cold-start helpers for Planetoids
+
+The title screen only needs consts.py, game2d and the asset cache. Everything
+else (the rules, the models, the renderer, NumPy and the replay and profiling
+tools) is only needed once a wave is played. This module has the two pieces
+that keep those imports off the path to the first frame:
+
+    lazy_import     returns a module object right away, but only runs the
+                    module the first time one of its attributes is used
+    ImportProfiler  times every import, like python -X importtime, so the
+                    cost of starting up can be measured
+
+The profiler is turned on with the flag --importtime. It has to be installed
+before anything else is imported, so __main__.py calls start_profiling first,
+and this module only imports the standard library modules it needs.
+
+This module does not access any other module of the game.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+import importlib.util
+import sys
+import time
+
+# The moment this module was imported, as a time.perf_counter value
+STARTUP_TIME = time.perf_counter()
+# The flag that turns on the import profiler
+IMPORT_FLAG = '--importtime'
+
+
+def lazy_import(name):
+    """
+    Returns the module with the given name, without running it yet.
+
+    The module is put in sys.modules right away, so later imports of it get the
+    same object. It runs the first time any of its attributes is used. If it
+    was already imported, that module is returned as it is.
+
+    Parameter name: the name of the module
+    Precondition: name is a string naming a module that can be imported
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError('no module named %s' % repr(name), name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class TimedLoader(object):
+    """
+    A class that wraps the loader of a module to time it for an ImportProfiler.
+
+    Every other attribute is looked up on the wrapped loader.
+    """
+    # Attribute _loader: the loader that does the work
+    # Invariant: _loader is a loader with the method exec_module
+    #
+    # Attribute _profiler: the profiler the times are reported to
+    # Invariant: _profiler is an ImportProfiler
+    #
+    # Attribute _created: the seconds spent in create_module
+    # Invariant: _created is a float >= 0
+
+    def __init__(self, loader, profiler):
+        """
+        Initializes a loader that times loader.
+
+        Parameter loader: the loader to wrap
+        Precondition: loader is a loader with the method exec_module
+
+        Parameter profiler: the profiler to report to
+        Precondition: profiler is an ImportProfiler
+        """
+        self._loader = loader
+        self._profiler = profiler
+        self._created = 0.0
+
+    def __getattr__(self, name):
+        """
+        Returns the attribute name of the wrapped loader.
+
+        Parameter name: the name of the attribute
+        Precondition: name is a string
+        """
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        """
+        Creates the module (the slow part for extension modules), timing it.
+
+        Parameter spec: the spec of the module
+        Precondition: spec is a ModuleSpec
+        """
+        start = time.perf_counter()
+        try:
+            return self._loader.create_module(spec)
+        finally:
+            self._created = time.perf_counter() - start
+
+    def exec_module(self, module):
+        """
+        Runs the module, timing it (with any modules it imports).
+
+        Parameter module: the module to run
+        Precondition: module is a module created from the spec of this loader
+        """
+        self._profiler.enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.leave(module.__name__, self._created)
+
+
+class ImportProfiler(object):
+    """
+    A class that times every import, like python -X importtime.
+
+    Once installed, it finds each module with the finders after it, and wraps
+    its loader in a TimedLoader. For each module it keeps the time spent in the
+    module itself and the time including the modules it imports, in the order
+    the imports finish. Milestones (such as the first frame) are recorded with
+    mark, and report gives everything recorded since the last report.
+    """
+    # Attribute _installed: whether the profiler is in sys.meta_path
+    # Invariant: _installed is a bool
+    #
+    # Attribute _stack: for each import in progress, its start time and the
+    #           time spent in the imports it started
+    # Invariant: _stack is a list of [float, float] lists
+    #
+    # Attribute _records: each finished import, as (name, self seconds,
+    #           cumulative seconds, depth)
+    # Invariant: _records is a list of tuples
+    #
+    # Attribute _marks: each milestone, as (label, seconds since STARTUP_TIME)
+    # Invariant: _marks is a list of tuples
+    #
+    # Attribute _reported: the records and marks already reported
+    # Invariant: _reported is a list [records, marks] of ints
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def is_installed(self):
+        """Returns True if the profiler is timing imports."""
+        return self._installed
+
+    def get_records(self):
+        """
+        Returns the list of finished imports, as (name, self seconds, cumulative
+        seconds, depth) tuples.
+        """
+        return list(self._records)
+
+    # INITIALIZER
+    def __init__(self):
+        """Initializes a profiler that is not installed."""
+        self._installed = False
+        self._stack = []
+        self._records = []
+        self._marks = []
+        self._reported = [0, 0]
+
+    # ADDITIONAL METHODS
+    def install(self):
+        """Starts timing imports (nothing happens if already installed)."""
+        if not self._installed:
+            sys.meta_path.insert(0, self)
+            self._installed = True
+
+    def uninstall(self):
+        """Stops timing imports. What was recorded is kept."""
+        if self._installed:
+            sys.meta_path.remove(self)
+            self._installed = False
+
+    def find_spec(self, name, path=None, target=None):
+        """
+        Returns the spec of a module from the other finders, with a timed loader.
+
+        This is the meta path finder protocol of importlib.
+
+        Parameter name: the name of the module
+        Precondition: name is a string
+
+        Parameter path: the path of the parent package, or None
+        Precondition: path is a list of strings or None
+
+        Parameter target: the module being reloaded, or None
+        Precondition: target is a module or None
+        """
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if hasattr(spec.loader, 'exec_module'):
+                    spec.loader = TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def enter(self):
+        """Records that an import started."""
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def leave(self, name, created=0.0):
+        """
+        Records that the import started last finished.
+
+        Parameter name: the name of the module
+        Precondition: name is a string
+
+        Parameter created: the seconds spent creating the module beforehand
+        Precondition: created is a float >= 0
+        """
+        start, children = self._stack.pop()
+        total = time.perf_counter() - start + created
+        self._records.append((name, total - children, total, len(self._stack)))
+        if self._stack:
+            self._stack[-1][1] += total
+
+    def mark(self, label):
+        """
+        Records a milestone at the current time.
+
+        Parameter label: what happened
+        Precondition: label is a string
+        """
+        self._marks.append((label, time.perf_counter() - STARTUP_TIME))
+
+    def report(self, slowest=10):
+        """
+        Returns the imports and milestones recorded since the last report, as text.
+
+        The imports are listed like python -X importtime (microseconds, nested
+        imports indented), followed by the slowest top-level imports and the
+        milestones.
+
+        Parameter slowest: the number of slowest imports to list
+        Precondition: slowest is an int >= 0
+        """
+        records = self._records[self._reported[0]:]
+        marks = self._marks[self._reported[1]:]
+        self._reported = [len(self._records), len(self._marks)]
+        lines = ['import time: self [us] | cumulative | imported package']
+        for name, own, total, depth in records:
+            lines.append('import time: %9d | %10d | %s%s'
+                         % (own * 1e6, total * 1e6, '  ' * depth, name))
+        tops = sorted((record for record in records if record[3] == 0),
+                      key=lambda record: -record[2])
+        if tops:
+            lines.append('%d modules in %.1f ms; slowest:'
+                         % (len(records), sum(record[2] for record in tops) * 1e3))
+            for name, own, total, depth in tops[:slowest]:
+                lines.append('  %8.1f ms  %s' % (total * 1e3, name))
+        for label, elapsed in marks:
+            lines.append('%s after %.1f ms' % (label, elapsed * 1e3))
+        return '\n'.join(lines)
+
+
+# The profiler of this run (installed by start_profiling if asked for)
+IMPORT_PROFILER = ImportProfiler()
+
+
+def start_profiling(argv=None):
+    """
+    Installs IMPORT_PROFILER if IMPORT_FLAG is in the command line arguments.
+
+    Parameter argv: the command line arguments (None for sys.argv)
+    Precondition: argv is a list of strings or None
+    """
+    if argv is None:
+        argv = sys.argv
+    if IMPORT_FLAG in argv[1:]:
+        IMPORT_PROFILER.install()
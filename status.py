@@ -0,0 +1,259 @@
+"""
+Game status tracking for Planetoids
+
+This module contains the counters that decide whether a wave is won or lost.
+Rather than counting the asteroids and checking the ship every tick, Simulation
+tells a StatusTracker about each change as it happens (asteroids spawned, broken
+or destroyed, the ship lost or replaced). The tracker keeps the number of live
+asteroids of each size, and announces a change to anyone who subscribed to it.
+In particular, the win/lose message only needs to change when the outcome does.
+
+There is one ship per wave (no extra lives), so the lives counter is 1 while
+the ship is alive and 0 once it is destroyed.
+
+This module does not access any other module of the game except consts.py.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+
+# The event sent when the number of live asteroids of a size changes. The
+# callback is given the size code and the new count.
+EVENT_ASTEROIDS = 'asteroids'
+# The event sent when the ship is destroyed or replaced. The callback is given
+# the new number of lives.
+EVENT_LIVES = 'lives'
+# The event sent when the wave is won or lost (or, after a restore, is no longer
+# over). The callback is given the tracker.
+EVENT_STATUS = 'status'
+# Every event, in the order they are sent for the same change
+STATUS_EVENTS = (EVENT_ASTEROIDS, EVENT_LIVES, EVENT_STATUS)
+
+
+class StatusTracker(object):
+    """
+    A class that counts the live asteroids and lives of a wave as they change.
+
+    The wave is won once every asteroid has spawned and been destroyed while the
+    ship is alive, and lost once the ship is destroyed. Both are kept up to date
+    by the methods that change the counts, so asking is free.
+
+    Callbacks are subscribed to one of STATUS_EVENTS, and are called in the
+    order they subscribed, right after the change.
+    """
+    # Attribute _counts: the number of live asteroids of each size
+    # Invariant: _counts is a list of ints >= 0, indexed by size code
+    #
+    # Attribute _live: the total number of live asteroids
+    # Invariant: _live is an int, the sum of _counts
+    #
+    # Attribute _pending: the number of asteroids that have not spawned yet
+    # Invariant: _pending is an int >= 0
+    #
+    # Attribute _lives: the number of ships left
+    # Invariant: _lives is 0 or 1
+    #
+    # Attribute _won, _lost: the outcome of the wave so far
+    # Invariant: _won and _lost are bools, and not both True
+    #
+    # Attribute _listeners: the callbacks subscribed to each event
+    # Invariant: _listeners is a dict mapping each of STATUS_EVENTS to a list
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_count(self, code=None):
+        """
+        Returns the number of live asteroids of the given size (or of all sizes).
+
+        Parameter code: the size code to count
+        Precondition: code is a size code, or None for all sizes
+        """
+        if code is None:
+            return self._live
+        return self._counts[code]
+
+    def get_pending(self):
+        """Returns the number of asteroids that have not spawned yet."""
+        return self._pending
+
+    def get_lives(self):
+        """Returns the number of ships left (0 or 1)."""
+        return self._lives
+
+    def get_state(self):
+        """Returns STATE_COMPLETE if the wave is won or lost, else STATE_ACTIVE."""
+        if self._won or self._lost:
+            return STATE_COMPLETE
+        return STATE_ACTIVE
+
+    def is_won(self):
+        """Returns True if every asteroid has spawned and been destroyed."""
+        return self._won
+
+    def is_lost(self):
+        """Returns True if the ship has been destroyed."""
+        return self._lost
+
+    # INITIALIZER
+    def __init__(self, pending):
+        """
+        Initializes the counters for a wave with a live ship and no asteroids yet.
+
+        Parameter pending: the number of asteroids in the wave
+        Precondition: pending is an int >= 0
+        """
+        self._listeners = dict((event, []) for event in STATUS_EVENTS)
+        self._counts = [0] * len(ASTEROID_SIZES)
+        self._live = 0
+        self._pending = pending
+        self._lives = 1
+        self._won = False
+        self._lost = False
+        self._update()
+
+    # SUBSCRIPTIONS
+    def subscribe(self, event, callback):
+        """
+        Calls callback every time event happens.
+
+        Parameter event: the event to listen for
+        Precondition: event is one of STATUS_EVENTS
+
+        Parameter callback: the function to call
+        Precondition: callback is a callable taking the arguments of the event
+        """
+        self._listeners[event].append(callback)
+
+    def unsubscribe(self, event, callback):
+        """
+        Stops calling callback when event happens.
+
+        Nothing happens if callback was not subscribed.
+
+        Parameter event: the event to stop listening for
+        Precondition: event is one of STATUS_EVENTS
+
+        Parameter callback: the function to stop calling
+        Precondition: callback is a callable
+        """
+        listeners = self._listeners[event]
+        if callback in listeners:
+            listeners.remove(callback)
+
+    # CHANGES
+    def spawn(self, codes):
+        """
+        Records asteroids of the wave data coming into play.
+
+        Parameter codes: the size code of each new asteroid
+        Precondition: codes is a list of size codes, no longer than get_pending
+        """
+        self._pending -= len(codes)
+        self.add(codes)
+
+    def add(self, codes):
+        """
+        Records new asteroids (such as the pieces of a broken one).
+
+        Parameter codes: the size code of each new asteroid
+        Precondition: codes is a list of size codes
+        """
+        self._change(codes, 1)
+
+    def remove(self, codes):
+        """
+        Records asteroids being destroyed.
+
+        Parameter codes: the size code of each destroyed asteroid
+        Precondition: codes is a list of size codes of live asteroids
+        """
+        self._change(codes, -1)
+
+    def set_lives(self, lives):
+        """
+        Records the ship being destroyed (0) or replaced (1).
+
+        Parameter lives: the number of ships left
+        Precondition: lives is 0 or 1
+        """
+        if lives == self._lives:
+            return
+        self._lives = lives
+        self._send(EVENT_LIVES, lives)
+        self._update()
+
+    def reset(self, codes, pending, lives):
+        """
+        Sets every counter at once, such as after restoring a snapshot.
+
+        An event is sent for every counter that changed.
+
+        Parameter codes: the size code of each live asteroid
+        Precondition: codes is a list of size codes
+
+        Parameter pending: the number of asteroids that have not spawned yet
+        Precondition: pending is an int >= 0
+
+        Parameter lives: the number of ships left
+        Precondition: lives is 0 or 1
+        """
+        counts = [0] * len(self._counts)
+        for code in codes:
+            counts[code] += 1
+        self._pending = pending
+        self._live = len(codes)
+        for code in range(len(counts)):
+            if counts[code] != self._counts[code]:
+                self._counts[code] = counts[code]
+                self._send(EVENT_ASTEROIDS, code, counts[code])
+        if lives != self._lives:
+            self._lives = lives
+            self._send(EVENT_LIVES, lives)
+        self._update()
+
+    # HELPER METHODS
+    def _change(self, codes, step):
+        """
+        Adds step to the count of each size in codes, and sends the events.
+
+        Parameter codes: the size codes that changed
+        Precondition: codes is a list of size codes
+
+        Parameter step: 1 for new asteroids, -1 for destroyed ones
+        Precondition: step is 1 or -1
+        """
+        if not codes:
+            return
+        changed = [False] * len(self._counts)
+        for code in codes:
+            self._counts[code] += step
+            changed[code] = True
+        self._live += step * len(codes)
+        for code in range(len(changed)):
+            if changed[code]:
+                self._send(EVENT_ASTEROIDS, code, self._counts[code])
+        self._update()
+
+    def _update(self):
+        """
+        Recomputes the outcome, and sends EVENT_STATUS if it changed.
+        """
+        lost = self._lives == 0
+        won = not lost and self._live == 0 and self._pending == 0
+        if won != self._won or lost != self._lost:
+            self._won = won
+            self._lost = lost
+            self._send(EVENT_STATUS, self)
+
+    def _send(self, event, *args):
+        """
+        Calls every callback subscribed to event with the given arguments.
+
+        Parameter event: the event that happened
+        Precondition: event is one of STATUS_EVENTS
+
+        Parameter args: the arguments of the event
+        Precondition: args are the arguments described for event
+        """
+        for callback in list(self._listeners[event]):
+            callback(*args)
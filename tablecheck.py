@@ -0,0 +1,127 @@
+"""
+Accuracy check for the trig tables in Planetoids
+
+Ship.turn and Simulation._break_asteroid take their vectors from the tables in
+physics.py (HEADINGS and SPLIT_ROTATIONS) instead of calling the trig functions.
+This script checks those vectors against the direct computations they replace:
+
+    headings    every facing vector a turning ship can reach, against
+                cos/sin of the angle (these must be exactly equal)
+    splits      the directions of the three pieces of a broken asteroid, for
+                random hit vectors, against atan2 and cos/sin of the angle
+                plus or minus 120 degrees (these must agree to --tolerance)
+
+Run it with
+
+    python tablecheck.py --samples 100000
+
+It exits with status 1 if any check fails.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from simulation import *
+import argparse
+import math
+import random
+import sys
+
+# The number of random hit vectors to check by default
+CHECK_SAMPLES = 10000
+# The largest error allowed in a split direction
+CHECK_TOLERANCE = 1e-12
+
+
+def check_headings():
+    """
+    Returns the number of facing vectors that differ from cos/sin of the angle.
+
+    A ship is started at every whole angle and turned all the way around in
+    both directions, checking the facing vector after every turn.
+    """
+    errors = 0
+    for start in range(360):
+        for rate in (SHIP_TURN_RATE, -SHIP_TURN_RATE):
+            ship = ShipBody(0, 0, start)
+            for _ in range(360):
+                ship.turn(rate)
+                radians = math.radians(ship.angle)
+                if ship.get_facing() != (math.cos(radians), math.sin(radians)):
+                    errors += 1
+    return errors
+
+
+def split_reference(vector):
+    """
+    Returns the directions of the three pieces, computed with atan2 and cos/sin.
+
+    This is how _break_asteroid computed them before the tables.
+
+    Parameter vector: the velocity of the hit
+    Precondition: vector is an (x, y) tuple of numbers
+    """
+    angle = math.atan2(vector[1], vector[0])
+    return [(math.cos(angle), math.sin(angle)),
+            (math.cos(angle + 2 * math.pi / 3), math.sin(angle + 2 * math.pi / 3)),
+            (math.cos(angle - 2 * math.pi / 3), math.sin(angle - 2 * math.pi / 3))]
+
+
+def check_splits(samples, seed=0):
+    """
+    Returns the largest difference between the table and reference directions.
+
+    Each sample breaks a large asteroid with a random hit vector and compares
+    the velocities of the pieces with the reference directions times the speed.
+
+    Parameter samples: the number of random hit vectors
+    Precondition: samples is an int > 0
+
+    Parameter seed: the seed for the random hit vectors
+    Precondition: seed is an int
+    """
+    rand = random.Random(seed)
+    wave = Simulation({'ship': {'position': [0, 0], 'angle': 0}, 'asteroids': []})
+    rocks = wave.get_asteroids()
+    speed = ASTEROID_SPEEDS[MEDIUM_CODE]
+    worst = 0.0
+    for _ in range(samples):
+        vector = (rand.uniform(-BULLET_SPEED, BULLET_SPEED),
+                  rand.uniform(-BULLET_SPEED, BULLET_SPEED))
+        rocks.clear()
+        rocks.add(0.0, 0.0, 0.0, 0.0, LARGE_RADIUS, LARGE_CODE)
+        wave._break_asteroid(0, vector)
+        for k, (dx, dy) in enumerate(split_reference(vector)):
+            worst = max(worst, abs(float(rocks.vx[k + 1]) - dx * speed),
+                        abs(float(rocks.vy[k + 1]) - dy * speed))
+    return worst
+
+
+def main(argv=None):
+    """
+    Runs the checks from the command line and returns the exit status.
+
+    Parameter argv: the command line arguments (None for sys.argv)
+    Precondition: argv is a list of strings or None
+    """
+    parser = argparse.ArgumentParser(description='Check the Planetoids trig tables')
+    parser.add_argument('--samples', type=int, default=CHECK_SAMPLES,
+                        help='the number of random hit vectors')
+    parser.add_argument('--tolerance', type=float, default=CHECK_TOLERANCE,
+                        help='the largest error allowed in a split direction')
+    args = parser.parse_args(argv)
+
+    status = 0
+    errors = check_headings()
+    print('headings: %d mismatches' % errors)
+    if errors:
+        status = 1
+    worst = check_splits(args.samples)
+    print('splits:   largest error %.3g (tolerance %.3g)' % (worst, args.tolerance))
+    if worst > args.tolerance:
+        status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
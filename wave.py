@@ -9,6 +9,11 @@ level, you are expected to make a new instance of the class.
 The subcontroller Wave manages the ship, the asteroids, and any bullets on
 screen. These are model objects. Their classes are defined in models.py.
 
+The rules of the game are in the class Simulation (simulation.py), which does
+not need game2d. Wave adds the GObject models that draw a Simulation. A wave
+created with headless=True has no models at all, and can be updated with a
+ScriptedInput on a machine with no window (or no Kivy).
+
 Most of your work on this assignment will be in either this module or models.py.
 Whether a helper method belongs in this module or models.py is often a
 complicated issue. If you do not know, ask on Ed Discussions and we will answer.
@@ -16,9 +21,16 @@ complicated issue. If you do not know, ask on Ed Discussions and we will answer.
 John Anim, ja857; Brendan Shek, bs863
 12/09/24
 """
-from game2d import *
 from consts import *
-from models import *
+from simulation import *
+from assets import *
+from loader import *
+try:
+    from game2d import *
+    from models import *
+    from render import *
+except ImportError:
+    pass # Headless install: only Wave(..., headless=True) is available
 import random
 import datetime
 
@@ -26,16 +38,16 @@ import datetime
 # Level is NOT allowed to access anything in app.py (Subcontrollers are not permitted
 # to access anything in their parent. To see why, take CS 3152)
 
-class Wave(object):
+class Wave(Simulation):
     """
     This class controls a single level or wave of Planetoids.
 
     This subcontroller has a reference to the ship, asteroids, and any bullets
     on screen. It animates all of these by adding the velocity to the position
     at each step. It checks for collisions between bullets and asteroids or
-    asteroids and the ship (asteroids can safely pass through each other). A
-    bullet collision either breaks up or removes a asteroid. A ship collision
-    kills the player.
+    asteroids and the ship (asteroids can safely pass through each other,
+    unless the wave data makes them bounce). A bullet collision either breaks
+    up or removes a asteroid. A ship collision kills the player.
 
     The player wins once all asteroids are destroyed. The player loses if they
     run out of lives. When the wave is complete, you should create a NEW instance
@@ -48,94 +60,129 @@ class Wave(object):
     All attributes of this class are to be hidden. No attribute should be
     accessed without going through a getter/setter first. However, just because
     you have an attribute does not mean that you have to have a getter for it.
+    The update and physics methods are inherited from Simulation.
     For example, the Planetoids app probably never needs to access the attribute
     for the bullets, so there is no need for a getter there. But at a minimum,
     you need getters indicating whether you one or lost the game.
     """
     # LIST ANY ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
     # THE ATTRIBUTES LISTED ARE SUGGESTIONS ONLY AND CAN BE CHANGED AS YOU SEE FIT
-    # Attribute _data: The data from the wave JSON, for reloading
-    # Invariant: _data is a dict loaded from a JSON file
+    # The attributes for the game state are listed in Simulation. In addition:
+    #
+    # Attribute _headless: whether this wave was created without models
+    # Invariant: _headless is a bool
+    #
+    # Attribute _batched: whether asteroids and bullets are drawn in batches
+    # Invariant: _batched is a bool (False if _headless)
     #
-    # Attribute _ship: The player ship to control
-    # Invariant: _ship is a Ship object
+    # Attribute _renderer: the batch renderer, created when first drawn
+    # Invariant: _renderer is a SpriteRenderer, or None if not _batched or not
+    #            drawn yet
     #
-    # Attribute _asteroids: the asteroids on screen
-    # Invariant: _asteroids is a list of Asteroid, possibly empty
+    # Attribute _ship_view: the model drawing the ship
+    # Invariant: _ship_view is a Ship object, or None if _headless
     #
-    # Attribute _bullets: the bullets currently on screen
-    # Invariant: _bullets is a list of Bullet, possibly empty
+    # Attribute _bullet_pool: the recycled Bullet objects (shared by all waves)
+    # Invariant: _bullet_pool is an ObjectPool, or None if _headless
     #
-    # Attribute _lives: the number of lives left
-    # Invariant: _lives is an int >= 0
+    # Attribute _asteroid_pools: the recycled Asteroid objects of each size
+    #            (shared by all waves)
+    # Invariant: _asteroid_pools is a list of ObjectPool indexed by size code,
+    #            or None if _headless
     #
-    # Attribute _firerate: the number of frames until the player can fire again
-    # Invariant: _firerate is an int >= 0
+    # Attribute display_message: the win/lose message
+    # Invariant: display_message is a GLabel, or None if _headless
+    #
+    # Attribute state: STATE_COMPLETE once the wave is won or lost
+    # Invariant: state is STATE_ACTIVE or STATE_COMPLETE
+    #
+    # Attribute _next: the file name of the wave to play after this one
+    # Invariant: _next is a string, or None if no next wave was set
 
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def is_headless(self):
+        """Returns True if this wave has no models to draw."""
+        return self._headless
 
-    # INITIALIZER (standard form) TO CREATE SHIP AND ASTEROIDS
+    def set_next_wave(self, name):
+        """
+        Sets the wave to play after this one, and starts loading it.
+
+        The wave is loaded by WAVE_LOADER on a background thread while this
+        wave is played.
 
-    def __init__(self, save_level):
+        Parameter name: the file name of the next wave
+        Precondition: name is a string
         """
+        self._next = name
+        WAVE_LOADER.request(name)
+        if self.state == STATE_COMPLETE:
+            self._on_status(self._status)
 
-        Parameter save_level: placeholder for the data attribute
-        Precondition: save_level is a variable
+    def is_next_ready(self):
         """
-        self._data = save_level
-        x = self._data['ship']['position'][0]
-        y = self._data['ship']['position'][1]
-        angle = self._data['ship']['angle']
-        self._ship = Ship(x, y, angle)
-        self._asteroids = []
-        for asteroid in save_level['asteroids']:
-            size = asteroid['size']
-            position = asteroid['position']
-            direction = asteroid['direction']
-            self._asteroids.append(Asteroid(size,position,direction))
-        self._bullets = []
-        self._firerate = 0
-        self.display_message = GLabel(text="", font_size=36, color='white')
-        self.display_message.x = GAME_WIDTH / 2
-        self.display_message.y = GAME_HEIGHT / 2
-        self.display_message.visible = False
-        self.display_message.font_name = MESSAGE_FONT
-
-    # UPDATE METHOD TO MOVE THE SHIP, ASTEROIDS, AND BULLETS
-    def update(self, input, dt):
+        Returns True if the next wave has finished loading.
+
+        This is False if no next wave was set.
         """
-        This method handles the changes that take place when the game is
-        continuing (in the STATE_ACTIVE)
+        return self._next is not None and WAVE_LOADER.is_ready(self._next)
 
-        Parameter input: detects and performs keyboard and mouse activities
-        based on user input
-        Precondtion: input is an instance of GInput
+    def get_next_wave(self):
+        """
+        Returns the data of the next wave, to pass to a new Wave.
 
-        Parameter dt: The time in seconds since last update
-        Precondition: dt is a number (int or float)
+        This waits for the wave if it is still loading, so check is_next_ready
+        first to never wait. It returns None if no next wave was set.
         """
-        if not STATE_ACTIVE:
-            return
-        if self._ship is None:
-            return
-        self.handle_turning(input)
-        if self._firerate >= BULLET_RATE and input.is_key_down('spacebar'):
-            self.bullet_release()
-            self._firerate = 0
-        else:
-            self._firerate += 1
-        for bullet in self._bullets:
-            bullet.update()
-        self.bullets_to_use()
-        self._ship.move()
-        self._ship.update(dt)
-        self._ship.wrap()
-        self.process_collisions()
-        for asteroid in self._asteroids:
-            asteroid.update(dt)
-            asteroid.move()
-            asteroid.wrap()
-        self.check_game_status()
+        if self._next is None:
+            return None
+        if not WAVE_LOADER.is_requested(self._next):
+            WAVE_LOADER.request(self._next)
+        return WAVE_LOADER.take(self._next)
+
+    # INITIALIZER (standard form) TO CREATE SHIP AND ASTEROIDS
+
+    def __init__(self, save_level, headless=False, batched=BATCH_SPRITES):
+        """
+        Initializes a wave from the data of a wave JSON file.
+
+        A batched wave draws its asteroids and bullets with a SpriteRenderer,
+        so it has no Asteroid or Bullet models at all (only the Ship).
+
+        Parameter save_level: placeholder for the data attribute
+        Precondition: save_level is a dict loaded from a wave JSON file, or a
+        CompiledWave
+
+        Parameter headless: whether to skip creating the models (and so game2d)
+        Precondition: headless is a bool
+
+        Parameter batched: whether to draw asteroids and bullets in batches
+        Precondition: batched is a bool
+        """
+        self._headless = headless
+        self._batched = batched and not headless
+        self._renderer = None
+        self._next = None
+        self._bullet_pool = None
+        self._asteroid_pools = None
+        if not headless:
+            self._bullet_pool = ASSETS.pool('bullet', Bullet)
+            self._asteroid_pools = [ASSETS.pool(size, Asteroid)
+                                    for size in ASTEROID_SIZES]
+        Simulation.__init__(self, save_level)
+        self.state = STATE_ACTIVE
+        self._ship_view = None
+        self.display_message = None
+        if not headless:
+            ship = self._ship
+            self._ship_view = Ship(ship.x, ship.y, ship.angle)
+            self.display_message = GLabel(text="", font_size=36, color='white')
+            self.display_message.x = GAME_WIDTH / 2
+            self.display_message.y = GAME_HEIGHT / 2
+            self.display_message.visible = False
+            self.display_message.font_name = ASSETS.font(MESSAGE_FONT)
+        self._status.subscribe(EVENT_STATUS, self._on_status)
+        self._on_status(self._status)
 
     # DRAW METHOD TO DRAW THE SHIP, ASTEROIDS, AND BULLETS
     def draw(self, view):
@@ -143,162 +190,137 @@ class Wave(object):
         Draws everything to the screen and makes everything visible to the
         player.
 
+        The positions are copied from the simulation into the models first,
+        interpolated between the last two ticks. A headless wave draws nothing.
+
+        Only objects that overlap the screen are drawn; the dead zone around it
+        is culled. Batched waves also draw ghost copies of the asteroids and
+        bullets straddling a wrap edge (see SpriteRenderer). A model can only
+        be drawn in one place, so unbatched waves and the ship draw no ghosts.
+
         Parameter view: the game view, used in drawing (see examples from class)
         Precondition: view is an instance of GView
         """
+        if self._headless:
+            return
+        alpha = self.get_alpha()
         if self._ship is not None:
-            self._ship.draw(view)
-        for asteroid in self._asteroids:
-            asteroid.draw(view)
-        for bullet in self._bullets:
-            bullet.draw(view)
+            x, y = self._ship.lerp(alpha)
+            if on_screen(x, y, SHIP_RADIUS):
+                self._ship_view.x = x
+                self._ship_view.y = y
+                self._ship_view.angle = self._ship.angle
+                self._ship_view.draw(view)
+        if self._batched:
+            if self._renderer is None:
+                self._renderer = SpriteRenderer(ASSETS)
+            self._renderer.draw(view, self._asteroids, self._bullets, alpha)
+        else:
+            for asteroid in self._asteroids.sync(alpha):
+                asteroid.draw(view)
+            for bullet in self._bullets.sync(alpha):
+                bullet.draw(view)
         if self.display_message.visible:
             self.display_message.draw(view)
     # RESET METHOD FOR CREATING A NEW LIFE
 
-    # HELPER METHODS FOR PHYSICS AND COLLISION DETECTION
-    def handle_turning(self, input):
-        """"
-        This method handles the movement of the ship using the user input
-
-        Parameter input: detects and performs keyboard and mouse activities
-        based on user input
-        Precondtion: input is an instance of GInput
-        """
-        turn_angle = 0
-        if input.is_key_down('left'):
-            turn_angle += SHIP_TURN_RATE
-        if input.is_key_down('right'):
-            turn_angle -= SHIP_TURN_RATE
-        if turn_angle != 0:
-            self._ship.turn(turn_angle)
-        if input.is_key_down('up'):
-            self._ship.shipImpulse()
-
-    def bullets_to_use(self):
+    def dispose(self):
         """
-        This method is a procedure that updates the bullets left to use after
-        some bullets have been fired.
-        """
-        new_bullets = []
-        for bullet in self._bullets:
-            if (-DEAD_ZONE < bullet.x < GAME_WIDTH + DEAD_ZONE
-                and -DEAD_ZONE < bullet.y < GAME_HEIGHT + DEAD_ZONE):
-                new_bullets.append(bullet)
-        self._bullets = new_bullets
-
-    def bullet_release(self):
-        """
-        This method is a procedure that handles the release of a bullet
+        Returns every asteroid and bullet model to the shared pools.
+
+        Call this when the wave is replaced, so the next wave can reuse the
+        models. The wave must not be drawn afterwards.
         """
-        facing_vector = self._ship.get_facing()
-        facing_x = facing_vector.x
-        facing_y = facing_vector.y
-        position = (self._ship.x + (facing_x * SHIP_RADIUS), self._ship.y +
-                   (facing_y* SHIP_RADIUS))
-        velocity = Vector2(facing_x * BULLET_SPEED, facing_y * BULLET_SPEED)
-        generated_bullet = Bullet(position, velocity)
-        self._bullets.append(generated_bullet)
-
-    def process_collisions(self):
+        if self._headless:
+            return
+        codes = self._asteroids.size.tolist()
+        self._free_views(self._asteroids.clear(), codes)
+        self._free_views(self._bullets.clear(), None)
+
+    # HELPER METHODS FOR THE GAME STATUS
+    def _on_status(self, status):
         """
-        This method is a procedure that processes all the collisions
-        that happens in the game. Asteroid-Ship collision, bullet-asteroid
-        collision.
+        Updates state and the win or lose message when the outcome changes.
+
+        This is subscribed to EVENT_STATUS, so the message text is only set
+        when the wave is won or lost (or a restore undoes that), not every frame.
+
+        Parameter status: the status tracker of this wave
+        Precondition: status is a StatusTracker
         """
-        if self._ship is None:
+        self.state = status.get_state()
+        message = self.display_message
+        if message is None:
+            return
+        if self.state == STATE_ACTIVE:
+            message.visible = False
             return
-        bullets_to_remove = []
-        asteroids_to_remove = []
-        new_asteroids = []
-        for asteroid in self._asteroids[:]:
-            for bullet in self._bullets[:]:
-                if self._collides(asteroid, bullet):
-                    bullets_to_remove.append(bullet)
-                    asteroids_to_remove.append(asteroid)
-                    if asteroid.get_size() in ['large', 'medium']:
-                        new_asteroids.extend(self._break_asteroid(asteroid,
-                                             bullet.get_velocity()))
-        for asteroid in self._asteroids[:]:
-            if self._ship is not None and self._collides(asteroid, self._ship):
-                asteroids_to_remove.append(asteroid)
-                ship_velocity = self._ship.get_velocity()
-                self._ship = None
-                if asteroid.get_size() in ['large', 'medium']:
-                    new_asteroids.extend(self._break_asteroid(asteroid,
-                                         ship_velocity))
-        for bullet in bullets_to_remove:
-            if bullet in self._bullets:
-                self._bullets.remove(bullet)
-        for asteroid in asteroids_to_remove:
-            if asteroid in self._asteroids:
-                self._asteroids.remove(asteroid)
-        self._asteroids.extend(new_asteroids)
-
-    def _collides(self, object1, object2):
+        if status.is_lost():
+            message.text = "Game Over! You Lose!"
+        elif self._next is not None:
+            message.text = "Wave cleared! Press 'S' to go on"
+        else:
+            message.text = "Congratulations! You Win!"
+        message.visible = True
+
+    # VIEW HOOKS
+    def _wants_views(self):
+        """Returns True if the asteroids and bullets are drawn by models."""
+        return not (self._headless or self._batched)
+
+    def _make_asteroid_view(self, code, position, direction):
         """
-        Returns True if distance is less than sum of radius from their centers
+        Returns the Asteroid that draws a new asteroid (None if headless or
+        batched).
 
-        This helper function calculates the possibility of collisions
-        by computing the distance between colliding objects and the d
+        Parameter code: the size code of the asteroid
+        Precondition: code is one of SMALL_CODE, MEDIUM_CODE or LARGE_CODE
 
-        Parameter object1: object involved in collision
-        Precondition: object1 is either an object of Asteroid or Bullet or Ship
+        Parameter position: contains the x and y coordinates of the center
+        Precondition: position is a sequence of two numbers
 
-        Paramter object2: object involved in collision
-        Precondition: object2 is either an object of Asteroid or Bullet or Ship
+        Parameter direction: the direction the asteroid moves in
+        Precondition: direction is a sequence of two numbers
         """
-        distance = math.sqrt((object1.x - object2.x)**2 +
-                             (object1.y - object2.y)**2)
-        radius_sum = object1.get_radius() + object2.get_radius()
-        return distance < radius_sum
+        if self._headless or self._batched:
+            return None
+        return self._asteroid_pools[code].acquire(ASTEROID_SIZES[code],
+                                                  position, direction)
 
-    def _break_asteroid(self, asteroid, collision_vector):
+    def _make_bullet_view(self, position, velocity):
         """
-        Returns a list of smaller asteroids resulting from a collision.
-
-        This helper function is used to break the asteroid after collision.
-        Large asteroid produces 3 medium asteroids, medium asteroid produces
-        3 small asteroids after collision
+        Returns the Bullet that draws a new bullet (None if headless or
+        batched).
 
-        Parameter asteroid: asteroid collides with either ship or bullet
-        Precondition: asteroid is an Asteroid object
+        Parameter position: contains the x and y coordinates of the center
+        Precondition: position is a sequence of two numbers
 
-        Parameter collision_vector: velocity component of object colliding with
-        asteroid
-        Precondition: collision_vector is a velocity vector of either ship
-        or bullet
+        Parameter velocity: the velocity of the bullet
+        Precondition: velocity is an (x, y) tuple of numbers
         """
-        new_size = 'medium' if asteroid.get_size() == 'large' else 'small'
-        new_radius = MEDIUM_RADIUS if new_size == 'medium' else SMALL_RADIUS
-
-        angle = math.atan2(collision_vector.y, collision_vector.x)
-        vectors = [
-            (math.cos(angle), math.sin(angle)),
-            (math.cos(angle + 2 * math.pi / 3),
-             math.sin(angle + 2 * math.pi / 3)),
-            (math.cos(angle - 2 * math.pi / 3),
-             math.sin(angle - 2 * math.pi / 3))
-        ]
-        new_asteroids = []
-        for vec in vectors:
-            new_x = asteroid.x + new_radius * vec[0]
-            new_y = asteroid.y + new_radius * vec[1]
-            new_asteroids.append(Asteroid(new_size, (new_x, new_y), vec))
-        return new_asteroids
-
-    def check_game_status(self):
+        if self._headless or self._batched:
+            return None
+        return self._bullet_pool.acquire(position,
+                                         Vector2(velocity[0], velocity[1]))
+
+    def _free_views(self, views, codes):
         """
-        This is a procedure that checks the state of the game
+        Returns the views of removed objects to their pools.
+
+        Parameter views: the views of the removed objects (entries may be None)
+        Precondition: views is a list
+
+        Parameter codes: the size code of each removed asteroid, or None if
+        the views are bullets
+        Precondition: codes is None or a list of size codes as long as views
         """
-        if self._ship is None:
-            self.display_message.text = "Game Over! You Lose!"
-            self.display_message.visible = True
-            self.state = STATE_COMPLETE
-        elif len(self._asteroids) == 0:
-            self.display_message.text = "Congratulations! You Win!"
-            self.display_message.visible = True
-            self.state = STATE_COMPLETE
+        if self._headless:
+            return
+        if codes is None:
+            self._bullet_pool.release(views)
+        else:
+            for view, code in zip(views, codes):
+                self._asteroid_pools[code].release([view])
 
     def display_message(self, message):
         """
@@ -0,0 +1,385 @@
+"""
+Compiled wave files for Planetoids
+
+This module contains a compact binary format for waves, a converter from the
+wave JSON format, and a cache that keeps compiled waves in memory and on disk.
+
+Parsing a wave JSON file builds a dict for every asteroid, which stalls the game
+for large waves. A compiled wave instead stores the asteroids as four packed
+arrays (size codes, positions, directions and spawn ticks) behind a small header:
+
+    magic      4 bytes    b'PLWV'
+    version    uint16     WAVE_VERSION
+    flags      uint16     WAVE_BOUNCE if the asteroids bounce off each other
+    mtime      int64      modification time (ns) of the JSON it came from
+    ship       3 float64  the ship x, y and angle
+    count      uint64     the number of asteroids
+    sizes      count int8, padded to a multiple of 8 bytes
+    positions  count x 2 float64
+    directions count x 2 float64
+    ticks      count int32, padded to a multiple of 8 bytes
+
+Everything is little-endian. The file is memory-mapped when it is loaded, so the
+arrays of a CompiledWave are read-only views of the file and loading copies
+nothing. The compiled files are kept in a __wavecache__ folder next to the JSON
+file and rebuilt whenever the JSON file changes.
+
+An asteroid in the JSON file may have a 'spawn' entry: the number of seconds
+after the start of the wave when it appears (0 if missing). The asteroids of a
+compiled wave are sorted by their spawn tick, so the ones due at any time are a
+prefix of the arrays.
+
+A wave JSON file may also have a top-level 'bounce' entry. If it is true, the
+asteroids of the wave bounce off each other instead of passing through.
+
+This module only accesses consts.py and physics.py.
+
+John Anim, ja857; Brendan Shek, bs863
+10/17/26
+"""
+from consts import *
+from physics import *
+import json
+import mmap
+import os
+import struct
+import threading
+import numpy as np
+
+# The first bytes of every compiled wave file
+WAVE_MAGIC = b'PLWV'
+# The version of the compiled format
+WAVE_VERSION = 3
+# The layout of the header
+WAVE_HEADER = struct.Struct('<4sHHqdddQ')
+# The header flag for a wave whose asteroids bounce off each other
+WAVE_BOUNCE = 1
+# The folder (next to the JSON files) with the compiled waves
+WAVE_CACHE_FOLDER = '__wavecache__'
+# The file extension of a compiled wave
+WAVE_EXTENSION = '.wave'
+# The folders (in the game folder) searched for wave files
+WAVE_FOLDERS = ('', 'Waves', 'JSON', 'Data')
+
+
+class CompiledWave(object):
+    """
+    A class holding a wave as packed arrays.
+
+    Simulation accepts a CompiledWave anywhere it accepts a wave dict. The arrays
+    may be read-only views of a memory-mapped file.
+    """
+    # Attribute ship: the starting ship position and angle
+    # Invariant: ship is a tuple (x, y, angle) of floats
+    #
+    # Attribute sizes: the size code of each asteroid
+    # Invariant: sizes is an int8 array of length n
+    #
+    # Attribute positions: the center of each asteroid
+    # Invariant: positions is a float64 array of shape (n, 2)
+    #
+    # Attribute directions: the direction of each asteroid
+    # Invariant: directions is a float64 array of shape (n, 2)
+    #
+    # Attribute ticks: the tick each asteroid spawns on (0 for the start)
+    # Invariant: ticks is a sorted int32 array of length n
+    #
+    # Attribute mtime: the modification time of the source JSON (ns), or 0
+    # Invariant: mtime is an int
+    #
+    # Attribute bounce: whether the asteroids bounce off each other
+    # Invariant: bounce is a bool
+
+    def __init__(self, ship, sizes, positions, directions, mtime=0, ticks=None,
+                 bounce=False):
+        """
+        Initializes a wave from its arrays.
+
+        Parameter ship: the starting ship position and angle
+        Precondition: ship is a tuple (x, y, angle) of numbers
+
+        Parameter sizes: the size code of each asteroid
+        Precondition: sizes is an int8 array of length n
+
+        Parameter positions: the center of each asteroid
+        Precondition: positions is a float64 array of shape (n, 2)
+
+        Parameter directions: the direction of each asteroid
+        Precondition: directions is a float64 array of shape (n, 2)
+
+        Parameter mtime: the modification time of the source JSON (ns)
+        Precondition: mtime is an int
+
+        Parameter ticks: the tick each asteroid spawns on (None for all at 0)
+        Precondition: ticks is a sorted int32 array of length n, or None
+
+        Parameter bounce: whether the asteroids bounce off each other
+        Precondition: bounce is a bool
+        """
+        if ticks is None:
+            ticks = np.zeros(len(sizes), dtype=np.int32)
+        self.ship = (float(ship[0]), float(ship[1]), float(ship[2]))
+        self.sizes = sizes
+        self.positions = positions
+        self.directions = directions
+        self.ticks = ticks
+        self.mtime = mtime
+        self.bounce = bounce
+
+    def __len__(self):
+        """Returns the number of asteroids."""
+        return len(self.sizes)
+
+    def prefetch(self):
+        """
+        Reads every byte of the arrays once.
+
+        The arrays of a mapped wave are only read from disk when first used.
+        Calling this on a loader thread keeps that read out of the game loop.
+        """
+        for array in (self.sizes, self.positions, self.directions, self.ticks):
+            array.sum()
+
+    @classmethod
+    def from_dict(cls, data, mtime=0):
+        """
+        Returns a CompiledWave with the contents of a wave dict.
+
+        Parameter data: the wave data
+        Precondition: data is a dict in the wave JSON format
+
+        Parameter mtime: the modification time of the source JSON (ns)
+        Precondition: mtime is an int
+        """
+        ship = data['ship']
+        asteroids = data['asteroids']
+        sizes = np.array([size_code(a['size']) for a in asteroids], dtype=np.int8)
+        positions = np.array([a['position'][:2] for a in asteroids],
+                             dtype=np.float64).reshape(-1, 2)
+        directions = np.array([a['direction'][:2] for a in asteroids],
+                              dtype=np.float64).reshape(-1, 2)
+        ticks = np.array([round(a.get('spawn', 0) * TICK_RATE) for a in asteroids],
+                         dtype=np.int32)
+        if ticks.any():
+            order = np.argsort(ticks, kind='stable')
+            sizes = sizes[order]
+            positions = positions[order]
+            directions = directions[order]
+            ticks = ticks[order]
+        return cls((ship['position'][0], ship['position'][1], ship['angle']),
+                   sizes, positions, directions, mtime, ticks,
+                   bool(data.get('bounce', False)))
+
+    def to_bytes(self):
+        """Returns the contents of this wave in the compiled format."""
+        count = len(self.sizes)
+        flags = WAVE_BOUNCE if self.bounce else 0
+        header = WAVE_HEADER.pack(WAVE_MAGIC, WAVE_VERSION, flags, self.mtime,
+                                  self.ship[0], self.ship[1], self.ship[2], count)
+        padding = b'\0' * (-count % 8)
+        return b''.join([header,
+                         np.ascontiguousarray(self.sizes, dtype='<i1').tobytes(),
+                         padding,
+                         np.ascontiguousarray(self.positions, dtype='<f8').tobytes(),
+                         np.ascontiguousarray(self.directions, dtype='<f8').tobytes(),
+                         np.ascontiguousarray(self.ticks, dtype='<i4').tobytes(),
+                         b'\0' * (-4 * count % 8)])
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """
+        Returns a CompiledWave whose arrays are views of buffer (no copies).
+
+        Parameter buffer: the contents of a compiled wave file
+        Precondition: buffer supports the buffer protocol (bytes, mmap, ...)
+        """
+        if len(buffer) < WAVE_HEADER.size:
+            raise ValueError('compiled wave is truncated')
+        (magic, version, flags, mtime, x, y, angle,
+         count) = WAVE_HEADER.unpack_from(buffer, 0)
+        if magic != WAVE_MAGIC or version != WAVE_VERSION:
+            raise ValueError('not a compiled wave (version %d)' % WAVE_VERSION)
+        offset = WAVE_HEADER.size
+        sizes = np.frombuffer(buffer, dtype='<i1', count=count, offset=offset)
+        offset += count + (-count % 8)
+        positions = np.frombuffer(buffer, dtype='<f8', count=2*count,
+                                  offset=offset).reshape(count, 2)
+        offset += 16 * count
+        directions = np.frombuffer(buffer, dtype='<f8', count=2*count,
+                                   offset=offset).reshape(count, 2)
+        offset += 16 * count
+        ticks = np.frombuffer(buffer, dtype='<i4', count=count, offset=offset)
+        return cls((x, y, angle), sizes, positions, directions, mtime, ticks,
+                   bool(flags & WAVE_BOUNCE))
+
+
+def compile_wave(source, target):
+    """
+    Converts the wave JSON file source into the compiled wave file target.
+
+    Parameter source: the wave JSON file
+    Precondition: source is a string naming a wave JSON file
+
+    Parameter target: the compiled file to write
+    Precondition: target is a string naming a writable file
+    """
+    with open(source) as file:
+        data = json.load(file)
+    wave = CompiledWave.from_dict(data, os.stat(source).st_mtime_ns)
+    # Write to a temporary file first, so a reader never sees half a file
+    partial = target + '.partial'
+    with open(partial, 'wb') as file:
+        file.write(wave.to_bytes())
+    os.replace(partial, target)
+
+
+def map_wave(path):
+    """
+    Returns the CompiledWave in the given file, memory-mapped (not read).
+
+    Parameter path: the compiled wave file
+    Precondition: path is a string naming a compiled wave file
+    """
+    with open(path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return CompiledWave.from_buffer(buffer)
+
+
+def find_wave(name, folder=None):
+    """
+    Returns the path of the wave file with the given name, or None if not found.
+
+    The name is tried as given, and then in each of WAVE_FOLDERS of the game
+    folder.
+
+    Parameter name: the wave file name (e.g. DEFAULT_WAVE)
+    Precondition: name is a string
+
+    Parameter folder: the game folder (None for the folder of this module)
+    Precondition: folder is a string naming a folder, or None
+    """
+    if os.path.isfile(name):
+        return name
+    if folder is None:
+        folder = os.path.dirname(os.path.abspath(__file__))
+    for subfolder in WAVE_FOLDERS:
+        path = os.path.join(folder, subfolder, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+class WaveCache(object):
+    """
+    A class that loads waves through an in-memory and an on-disk cache.
+
+    Loading a JSON wave file returns a CompiledWave. The first time, the file is
+    compiled into the __wavecache__ folder beside it (unless that is already up
+    to date). After that the compiled file is memory-mapped, and kept in memory
+    for as long as the JSON file's modification time does not change.
+    """
+    # Attribute _waves: the loaded waves
+    # Invariant: _waves is a dict mapping absolute paths of JSON files to
+    #            CompiledWave objects
+    #
+    # Attribute _hits: the number of loads answered from memory
+    # Invariant: _hits is an int >= 0
+    #
+    # Attribute _misses: the number of loads that had to map (or compile) a file
+    # Invariant: _misses is an int >= 0
+    #
+    # Attribute _lock: the lock held while loading (waves load on other threads)
+    # Invariant: _lock is a threading.Lock
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def get_hits(self):
+        """Returns the number of loads answered from memory."""
+        return self._hits
+
+    def get_misses(self):
+        """Returns the number of loads that had to map (or compile) a file."""
+        return self._misses
+
+    # INITIALIZER
+    def __init__(self):
+        """Initializes an empty cache."""
+        self._waves = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    # ADDITIONAL METHODS
+    def load(self, path):
+        """
+        Returns the CompiledWave for the given wave file.
+
+        A compiled file (ending in WAVE_EXTENSION) is mapped directly. A JSON
+        file is compiled first if its compiled copy is missing or out of date.
+        If the cache folder cannot be written, the JSON file is compiled in
+        memory instead.
+
+        Parameter path: the wave file
+        Precondition: path is a string naming a wave JSON or compiled wave file
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            return self._load(path)
+
+    def clear(self):
+        """Forgets every wave in memory (the files on disk are kept)."""
+        with self._lock:
+            self._waves.clear()
+
+    # HELPER METHODS
+    def _load(self, path):
+        """
+        Returns the CompiledWave for a wave file, while holding the lock.
+
+        Parameter path: the absolute path of the wave file
+        Precondition: path is a string naming a wave JSON or compiled wave file
+        """
+        mtime = os.stat(path).st_mtime_ns
+        wave = self._waves.get(path)
+        if wave is not None and wave.mtime == mtime:
+            self._hits += 1
+            return wave
+        self._misses += 1
+        if path.endswith(WAVE_EXTENSION):
+            wave = map_wave(path)
+            wave.mtime = mtime
+        else:
+            wave = self._load_json(path, mtime)
+        self._waves[path] = wave
+        return wave
+
+    def _load_json(self, path, mtime):
+        """
+        Returns the CompiledWave for a JSON file, compiling it if necessary.
+
+        Parameter path: the absolute path of the JSON file
+        Precondition: path is a string naming a wave JSON file
+
+        Parameter mtime: the modification time of the file (ns)
+        Precondition: mtime is an int
+        """
+        folder = os.path.join(os.path.dirname(path), WAVE_CACHE_FOLDER)
+        name = os.path.splitext(os.path.basename(path))[0] + WAVE_EXTENSION
+        target = os.path.join(folder, name)
+        try:
+            if os.path.isfile(target):
+                try:
+                    wave = map_wave(target)
+                    if wave.mtime == mtime:
+                        return wave
+                except ValueError:
+                    pass # Written by an older version; compile it again
+            os.makedirs(folder, exist_ok=True)
+            compile_wave(path, target)
+            return map_wave(target)
+        except (OSError, ValueError):
+            with open(path) as file:
+                return CompiledWave.from_dict(json.load(file), mtime)
+
+
+# The wave cache shared by the whole game
+WAVE_CACHE = WaveCache()